@@ -0,0 +1,345 @@
+"""
+Benchmark suite for django_roles_access hot paths.
+
+Usage::
+
+    python -m benchmarks.run [--patterns 100 1000 10000] [--iterations 2000]
+
+For each synthetic URLConf size and each configuration of the application,
+it reports requests per second, queries per request, and p50/p99 latency in
+microseconds of:
+
+* middleware: request dispatched by Django with RolesMiddleware.
+* decorator: request dispatched by Django to a view decorated with
+  access_by_role.
+* mixin: request dispatched by Django to a class based view with RolesMixin.
+* check_role: rendering of a template checking many TemplateAccess flags.
+
+Requested views are the last ones of the URLConf and are secured By role, so
+the measured path is the slowest authorized one. Everything runs in an
+in-memory SQLite database; no network is used.
+"""
+from __future__ import print_function
+
+import argparse
+from collections import OrderedDict
+import copy
+import logging
+import os
+import sys
+import time
+import types
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+#: Patterns included for each synthetic application.
+PATTERNS_BY_APP = 100
+
+ROLES_MIDDLEWARE = 'django_roles_access.middleware.RolesMiddleware'
+
+#: Settings of each configuration.
+CONFIGURATIONS = OrderedDict([
+    ('default', {}),
+    ('single-query', {
+        'DJANGO_ROLES_ACCESS_SINGLE_QUERY': True,
+    }),
+    ('policy-cache', {
+        'DJANGO_ROLES_ACCESS_POLICY_CACHE': True,
+    }),
+    ('shared-policy', {
+        'DJANGO_ROLES_ACCESS_POLICY_CACHE': True,
+        'DJANGO_ROLES_ACCESS_SHARED_POLICY': True,
+    }),
+    ('policy+roles-cache', {
+        'DJANGO_ROLES_ACCESS_POLICY_CACHE': True,
+        'DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT': 300,
+    }),
+])
+
+SCENARIOS = ('middleware', 'decorator', 'mixin', 'check_role')
+
+
+def get_arguments(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark django_roles_access hot paths.')
+    parser.add_argument('--patterns', type=int, nargs='+',
+                        default=[100, 1000, 10000],
+                        help='Sizes of the synthetic URLConf.')
+    parser.add_argument('--iterations', type=int, default=2000,
+                        help='Measured requests for each case.')
+    parser.add_argument('--view-access', type=int, default=1000,
+                        help='ViewAccess objects created (at most one for '
+                             'each URL pattern).')
+    parser.add_argument('--groups', type=int, default=200,
+                        help='Groups (roles) created.')
+    parser.add_argument('--user-groups', type=int, default=50,
+                        help='Groups of the requesting user.')
+    parser.add_argument('--flags', type=int, default=30,
+                        help='TemplateAccess flags checked by check_role '
+                             'template.')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                        default=list(SCENARIOS))
+    parser.add_argument('--configurations', nargs='+',
+                        choices=list(CONFIGURATIONS),
+                        default=list(CONFIGURATIONS))
+    return parser.parse_args(argv)
+
+
+def build_urlconf(patterns):
+    """
+    Create and register a URLConf module with *patterns* URL patterns
+    grouped in applications of PATTERNS_BY_APP patterns. The last application
+    ends with the benchmarked views.
+
+    :return: Tuple (module name, names of the views, benchmarked paths).
+    """
+    try:
+        from django.urls import include, re_path as url
+    except ImportError:
+        from django.conf.urls import include, url
+    from django.http import HttpResponse
+    from django.views import View
+
+    from django_roles_access.decorator import access_by_role
+    from django_roles_access.mixin import RolesMixin
+
+    def plain_view(request):
+        return HttpResponse('plain')
+
+    @access_by_role
+    def decorated_view(request):
+        return HttpResponse('decorated')
+
+    class MixinView(RolesMixin, View):
+        def get(self, request, *args, **kwargs):
+            return HttpResponse('mixin')
+
+    apps = max(1, patterns // PATTERNS_BY_APP)
+    urlpatterns = []
+    view_names = []
+    for app_index in range(apps):
+        app_name = 'app-{}'.format(app_index)
+        app_patterns = []
+        for index in range(PATTERNS_BY_APP):
+            name = 'view-{}'.format(index)
+            app_patterns.append(url(r'^{}/$'.format(name), plain_view,
+                                    name=name))
+            view_names.append('{}:{}'.format(app_name, name))
+        if app_index == apps - 1:
+            app_patterns.extend([
+                url(r'^plain/$', plain_view, name='plain'),
+                url(r'^decorated/$', decorated_view, name='decorated'),
+                url(r'^mixin/$', MixinView.as_view(), name='mixin'),
+            ])
+        urlpatterns.append(url(r'^{}/'.format(app_name),
+                               include((app_patterns, app_name))))
+
+    module_name = 'benchmarks_urls_{}'.format(patterns)
+    module = types.ModuleType(module_name)
+    module.urlpatterns = urlpatterns
+    sys.modules[module_name] = module
+    last_app = 'app-{}'.format(apps - 1)
+    paths = {
+        'middleware': '/{}/plain/'.format(last_app),
+        'decorator': '/{}/decorated/'.format(last_app),
+        'mixin': '/{}/mixin/'.format(last_app),
+    }
+    targets = ['{}:{}'.format(last_app, name)
+               for name in ('plain', 'decorated', 'mixin')]
+    return module_name, view_names, targets, paths
+
+
+def create_data(arguments, view_names, targets):
+    """
+    Create groups, the requesting user, ViewAccess and TemplateAccess
+    objects.
+
+    :return: Tuple (user, flags).
+    """
+    from django.contrib.auth.models import Group, User
+
+    from django_roles_access.models import TemplateAccess, ViewAccess
+
+    ViewAccess.objects.all().delete()
+    TemplateAccess.objects.all().delete()
+    User.objects.all().delete()
+    Group.objects.all().delete()
+
+    Group.objects.bulk_create([Group(name='group-{}'.format(i))
+                               for i in range(arguments.groups)])
+    groups = list(Group.objects.order_by('pk'))
+    user = User.objects.create(username='benchmark')
+    user_groups = groups[:arguments.user_groups]
+    user.groups.add(*user_groups)
+    # Last group of the user grants access to benchmarked views and flags.
+    granting_group = user_groups[-1]
+    other_groups = groups[arguments.user_groups:] or groups
+
+    names = view_names[:max(0, arguments.view_access - len(targets))]
+    ViewAccess.objects.bulk_create([ViewAccess(view=name, type='br')
+                                    for name in names + targets])
+    through = ViewAccess.roles.through
+    links = []
+    for index, view_access in enumerate(ViewAccess.objects.order_by('pk')):
+        links.append(through(
+            viewaccess_id=view_access.pk,
+            group_id=other_groups[index % len(other_groups)].pk))
+        if view_access.view in targets:
+            links.append(through(viewaccess_id=view_access.pk,
+                                 group_id=granting_group.pk))
+    through.objects.bulk_create(links)
+
+    flags = ['flag-{}'.format(i) for i in range(arguments.flags)]
+    TemplateAccess.objects.bulk_create([TemplateAccess(flag=flag)
+                                        for flag in flags])
+    through = TemplateAccess.roles.through
+    through.objects.bulk_create([
+        through(templateaccess_id=template_access.pk,
+                group_id=(granting_group if index % 2 else
+                          other_groups[index % len(other_groups)]).pk)
+        for index, template_access in enumerate(
+            TemplateAccess.objects.order_by('pk'))])
+    return User.objects.get(pk=user.pk), flags
+
+
+def get_handler(middleware):
+    from django.core.handlers.base import BaseHandler
+    from django.test import override_settings
+
+    with override_settings(MIDDLEWARE=middleware):
+        handler = BaseHandler()
+        handler.load_middleware()
+    return handler
+
+
+def get_scenario(scenario, user, flags, paths):
+    """
+    :return: Tuple (function to benchmark, function building its argument).
+             Each call gets a new argument, as each request gets a new user
+             object.
+    """
+    from django.template import Context, Template
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+
+    def new_user():
+        return copy.copy(user)
+
+    if scenario == 'check_role':
+        template = Template('{% load roles_tags %}' + ''.join(
+            "{% if user|check_role:'" + flag + "' %}x{% endif %}"
+            for flag in flags))
+
+        def render(_user):
+            return template.render(Context({'user': _user}))
+        return render, new_user
+
+    if scenario == 'middleware':
+        handler = get_handler([ROLES_MIDDLEWARE])
+    else:
+        handler = get_handler([])
+
+    def new_request():
+        request = factory.get(paths[scenario])
+        request.user = new_user()
+        return request
+
+    def dispatch(request):
+        response = handler.get_response(request)
+        if response.status_code != 200:
+            raise AssertionError('Access denied to {}: {}'.format(
+                request.path, response.status_code))
+        return response
+    return dispatch, new_request
+
+
+def run_case(func, new_argument, iterations):
+    """
+    :return: Tuple (requests/s, queries/request, p50, p99). Latencies in
+             microseconds.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(min(50, iterations)):
+        func(new_argument())
+
+    samples = min(100, iterations)
+    arguments = [new_argument() for _ in range(samples)]
+    with CaptureQueriesContext(connection) as queries:
+        for argument in arguments:
+            func(argument)
+    queries_per_request = len(queries) / float(samples)
+
+    arguments = [new_argument() for _ in range(iterations)]
+    timings = []
+    for argument in arguments:
+        start = _clock()
+        func(argument)
+        timings.append(_clock() - start)
+    timings.sort()
+    total = sum(timings)
+
+    def percentile(value):
+        return timings[min(len(timings) - 1,
+                           int(len(timings) * value))] * 1e6
+    return (len(timings) / total if total else float('inf'),
+            queries_per_request, percentile(0.5), percentile(0.99))
+
+
+def reset_caches():
+    from django_roles_access.policy import clear_policies
+    from django_roles_access.recipe import clear_recipes
+    from django_roles_access.roles import forget_role_ids
+
+    clear_policies()
+    clear_recipes()
+    forget_role_ids()
+
+
+ROW = u'{:>8}  {:<11} {:<20} {:>10} {:>12} {:>10} {:>10}'
+
+
+def main(argv=None):
+    arguments = get_arguments(argv)
+    django.setup()
+    # Avoid "Forbidden" warnings if any access is denied.
+    logging.disable(logging.WARNING)
+
+    from django.core.management import call_command
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    print(ROW.format('patterns', 'scenario', 'configuration', 'req/s',
+                     'queries/req', 'p50 (us)', 'p99 (us)'))
+    for patterns in arguments.patterns:
+        urlconf, view_names, targets, paths = build_urlconf(patterns)
+        user, flags = create_data(arguments, view_names, targets)
+        with override_settings(ROOT_URLCONF=urlconf):
+            for scenario in arguments.scenarios:
+                for name in arguments.configurations:
+                    with override_settings(**CONFIGURATIONS[name]):
+                        reset_caches()
+                        func, new_argument = get_scenario(scenario, user,
+                                                          flags, paths)
+                        result = run_case(func, new_argument,
+                                          arguments.iterations)
+                    print(ROW.format(
+                        patterns, scenario, name,
+                        '{:.0f}'.format(result[0]),
+                        '{:.2f}'.format(result[1]),
+                        '{:.1f}'.format(result[2]),
+                        '{:.1f}'.format(result[3])))
+                    sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
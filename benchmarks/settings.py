@@ -0,0 +1,38 @@
+"""
+Settings used by the benchmark suite. See benchmarks/run.py.
+"""
+SECRET_KEY = 'django-roles-benchmarks'
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django_roles_access',
+]
+
+MIDDLEWARE = []
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Replaced by the synthetic URLConf built by benchmarks/run.py.
+ROOT_URLCONF = 'benchmarks.settings'
+urlpatterns = []
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    },
+]
+
+DEBUG = False
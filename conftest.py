@@ -18,3 +18,7 @@ def pytest_configure():
 def pytest_unconfigure(config):
     # Delete created variable for detect if running with pytest.
     del sys._called_from_pytest
+
+
+# Asynchronous views need Python 3.5+ syntax.
+collect_ignore = ['tests/test_aio.py'] if sys.version_info < (3, 5) else []
@@ -1 +1,4 @@
+import django
 
+if django.VERSION < (3, 2):
+    default_app_config = 'django_roles_access.apps.RolesConfig'
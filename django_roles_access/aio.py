@@ -0,0 +1,196 @@
+"""
+Asynchronous access checks.
+
+Used by :class:`django_roles_access.middleware.RolesMiddleware`,
+:func:`django_roles_access.decorator.access_by_role` and
+:class:`django_roles_access.mixin.RolesMixin` when running with ASGI and
+asynchronous views. Requires Django 3.1 or later.
+"""
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:
+    # asgiref < 3.6
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+from django_roles_access.claims import process_role_claims
+from django_roles_access.policy import (POLICY_VERSION_ATTRIBUTE,
+                                        POLICY_VERSION_KEY,
+                                        get_loaded_view_policies,
+                                        get_policy_cache, get_policy_version,
+                                        get_request_policy_version,
+                                        is_policy_cache_enabled)
+from django_roles_access.recipe import AUTHENTICATED, get_recipe
+from django_roles_access.session import (get_session_authentication,
+                                         is_session_auth_enabled,
+                                         is_session_auth_strict,
+                                         is_session_loaded, is_user_loaded)
+from django_roles_access.tools import (ACCESS_DECISION_ATTRIBUTE,
+                                       check_access_by_role,
+                                       get_access_decision, get_app_type,
+                                       get_app_types_index,
+                                       get_no_access_response,
+                                       get_resolver_match)
+
+
+async def acheck_access_by_role(request):
+    """
+    Asynchronous version of
+    :func:`django_roles_access.tools.check_access_by_role`.
+
+    Access is decided in the event loop when no database query is needed
+    (see :func:`get_event_loop_decision`). In other cases the check is run
+    with one call to *sync_to_async*.
+
+    :param request: :class:`django.http.HttpRequest`
+    :return: True if can access the view. False in other case.
+    """
+    resolver_match = get_resolver_match(request)
+    access = get_access_decision(request, resolver_match)
+    if access is not None:
+        return access
+    if is_policy_cache_enabled():
+        await aget_request_policy_version(request)
+    access = get_event_loop_decision(request, resolver_match)
+    if access is not None:
+        setattr(request, ACCESS_DECISION_ATTRIBUTE, (resolver_match, access))
+        return access
+    return await sync_to_async(check_access_by_role)(request)
+
+
+async def aget_request_policy_version(request):
+    """
+    Asynchronous version of
+    :func:`django_roles_access.policy.get_request_policy_version`. The cache
+    is read with *aget* (Django 4.0+), or with *sync_to_async* when it is not
+    available or the version has to be stored.
+    """
+    version = request.__dict__.get(POLICY_VERSION_ATTRIBUTE)
+    if version is not None:
+        return version
+    cache = get_policy_cache()
+    shared_version = None
+    if hasattr(cache, 'aget'):
+        shared_version = await cache.aget(POLICY_VERSION_KEY)
+    if shared_version is None:
+        return await sync_to_async(get_request_policy_version)(request)
+    version = get_policy_version(shared_version)
+    setattr(request, POLICY_VERSION_ATTRIBUTE, version)
+    return version
+
+
+def get_event_loop_decision(request, resolver_match):
+    """
+    Decide access to the view of *resolver_match* without querying the
+    database, so it can be done in the event loop.
+
+    NOT_SECURED and DISABLED applications are always decided. When
+    *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True and the policy table
+    is loaded for the policy version of the request, views whose recipe
+    grants or denies access to every user are decided too, as well as views
+    open to authenticated users if the user is loaded or, with session
+    authentication (not strict), its session is loaded. The policy version
+    must be already read (:func:`aget_request_policy_version`), the cache is
+    not used.
+
+    :return: True or False, or None if the user, its roles or the database
+             are needed.
+    """
+    if not is_policy_cache_enabled():
+        app_type = get_app_type(resolver_match.app_name)
+        if app_type == 'NOT_SECURED':
+            return True
+        if app_type == 'DISABLED':
+            return False
+        return None
+    version = request.__dict__.get(POLICY_VERSION_ATTRIBUTE)
+    if version is None:
+        return None
+    view_policies = get_loaded_view_policies(version)
+    if view_policies is None:
+        return None
+    recipe = get_recipe(resolver_match.app_name, resolver_match.view_name,
+                        get_app_types_index(), view_policies,
+                        resolver_match.func)
+    if recipe is True or recipe is False:
+        return recipe
+    authenticated = get_loaded_authentication(request)
+    if authenticated is False:
+        return False
+    if authenticated and recipe is AUTHENTICATED:
+        return True
+    return None
+
+
+def get_loaded_authentication(request):
+    """
+    :return: True or False if the user of *request* is loaded or, with
+             session authentication (not strict), its session is loaded. None
+             in other case.
+    """
+    if getattr(request, 'user', None) is None:
+        return None
+    if is_user_loaded(request):
+        return bool(request.user.is_authenticated)
+    session = getattr(request, 'session', None)
+    if is_session_auth_enabled() and not is_session_auth_strict() and \
+            session is not None and is_session_loaded(session):
+        return get_session_authentication(request)
+    return None
+
+
+def async_access_by_role(view):
+    """
+    :func:`django_roles_access.decorator.access_by_role` for coroutine views.
+    """
+    @wraps(view)
+    async def _view(request, *args, **kwargs):
+        if await acheck_access_by_role(request):
+            return await view(request, *args, **kwargs)
+        return get_no_access_response()
+
+    _view.access_by_role = True
+    return _view
+
+
+async def adispatch(dispatch, request, *args, **kwargs):
+    """
+    Check access and then call *dispatch* of an asynchronous class based
+    view.
+    """
+    if await acheck_access_by_role(request):
+        return await dispatch(request, *args, **kwargs)
+    return get_no_access_response()
+
+
+def setup_async_middleware(middleware):
+    """
+    Set *middleware* in asynchronous mode: Django will await its call and its
+    *process_view*.
+    """
+    markcoroutinefunction(middleware)
+
+    exempt_paths = middleware.exempt_paths
+
+    async def process_view(request, view_func, view_args, view_kwargs):
+        if exempt_paths and exempt_paths.match(request.path_info):
+            return None
+        if not await acheck_access_by_role(request):
+            return get_no_access_response()
+        return None
+
+    middleware.process_view = process_view
+
+
+async def acall_middleware(middleware, request):
+    response = await middleware.get_response(request)
+
+    # Only useful for unit test.
+    response.django_roles = True
+
+    return process_role_claims(request, response)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RolesConfig(AppConfig):
     name = 'django_roles_access'
     verbose_name = u'Django Roles Access'
+
+    def ready(self):
+        # Connect signal receivers and register system checks.
+        from django_roles_access import checks, signals  # noqa
@@ -0,0 +1,36 @@
+"""
+System checks of django-roles-access settings.
+"""
+from django.conf import settings
+from django.core import checks
+
+from django_roles_access.policy import is_policy_cache_enabled
+
+#: Cache backends whose values are not seen by other processes.
+PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register()
+def check_policy_cache(app_configs, **kwargs):
+    """
+    Warn when *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True and the
+    policy version is kept in a cache of the process: other processes never
+    see policy changes and keep their policy tables until restarted.
+    """
+    if not is_policy_cache_enabled():
+        return []
+    alias = getattr(settings, 'DJANGO_ROLES_ACCESS_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if backend not in PROCESS_CACHE_BACKENDS:
+        return []
+    return [checks.Warning(
+        u'DJANGO_ROLES_ACCESS_POLICY_CACHE is enabled with {} cache '
+        u'"{}".'.format(backend.rsplit('.', 1)[-1], alias),
+        hint=u'Policy changes are only seen by the process where they are '
+             u'done. Use a cache shared by all processes (e.g. Memcached, '
+             u'Redis or database cache) in DJANGO_ROLES_ACCESS_CACHE_ALIAS.',
+        id='django_roles_access.W001',
+    )]
@@ -0,0 +1,197 @@
+"""
+Signed role claims.
+
+When *DJANGO_ROLES_ACCESS_ROLE_CLAIMS* setting is True, together with
+*DJANGO_ROLES_ACCESS_POLICY_CACHE*, By role access is decided from a token
+signed with :mod:`django.core.signing` (the *SECRET_KEY* of the site), so
+the roles of the user need no database lookup. The token carries the user
+id, the roles of the user as a bitmap of the role registry of the view
+policy table, the fingerprint of the registry (derived from its role ids)
+and the membership version of the user
+(:func:`django_roles_access.session.get_membership_version`).
+
+The token is sent in a cookie named by *DJANGO_ROLES_ACCESS_ROLE_CLAIMS_COOKIE*
+setting (default: 'roles_access_claims'), or in the request header named by
+*DJANGO_ROLES_ACCESS_ROLE_CLAIMS_HEADER* setting, if any. It is accepted for
+*DJANGO_ROLES_ACCESS_ROLE_CLAIMS_MAX_AGE* seconds (default: 300), only for a
+registry with the same fingerprint, only for the verified user of the
+session (:func:`django_roles_access.session.get_verified_user_id`) and while
+the membership version of the user does not change. Otherwise roles are
+taken from the session or the database, and a new token is sent with the
+response. Changes to the groups of a user, or its deletion, bump its
+membership version, so the token is revoked on next request.
+
+The membership version is checked in the policy cache
+(*DJANGO_ROLES_ACCESS_CACHE_ALIAS*), so tokens are only accepted by nodes
+sharing that cache. Tokens are neither issued nor accepted when the policy
+cache does not keep values (DummyCache), as their membership version could
+not be checked.
+
+Tokens are issued at login and removed at logout. Cookies and headers are
+written by :class:`django_roles_access.middleware.RolesMiddleware`, which is
+required.
+"""
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core import signing
+
+from django_roles_access.policy import (get_view_policies,
+                                        is_policy_cache_enabled)
+from django_roles_access.session import (get_membership_version,
+                                         get_verified_user_id, is_user_loaded)
+
+SALT = 'django_roles_access.claims'
+
+#: Name of the request attribute where verified claims (tuple user id, role
+#: bitmap, registry fingerprint, membership version) are kept, or False if
+#: there are no valid claims.
+CLAIMS_ATTRIBUTE = '_roles_access_claims'
+#: Name of the request attribute where the token to be sent with the
+#: response is kept, or an empty string to remove it.
+NEW_TOKEN_ATTRIBUTE = '_roles_access_new_claims'
+
+
+def is_role_claims_enabled():
+    return is_policy_cache_enabled() and getattr(
+        settings, 'DJANGO_ROLES_ACCESS_ROLE_CLAIMS', False)
+
+
+def get_claims_cookie_name():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_ROLE_CLAIMS_COOKIE',
+                   'roles_access_claims')
+
+
+def get_claims_header():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_ROLE_CLAIMS_HEADER', None)
+
+
+def get_claims_max_age():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_ROLE_CLAIMS_MAX_AGE', 300)
+
+
+def make_role_claims(user_id, bits, fingerprint, version):
+    """
+    :return: Signed token with *user_id*, role bitmap *bits*, *fingerprint*
+             of the role registry of *bits* and membership *version* of the
+             user.
+    """
+    return signing.dumps([str(user_id), format(bits, 'x'), fingerprint,
+                          version], salt=SALT, compress=True)
+
+
+def read_role_claims(token):
+    """
+    :return: Tuple (user id, role bitmap, registry fingerprint, membership
+             version) of *token*, or None if its signature is not valid or
+             it is older than max age.
+    """
+    try:
+        user_id, bits, fingerprint, version = signing.loads(
+            token, salt=SALT, max_age=get_claims_max_age())
+        return user_id, int(bits, 16), fingerprint, version
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+
+def get_request_token(request):
+    header = get_claims_header()
+    if header:
+        token = request.META.get('HTTP_' + header.upper().replace('-', '_'))
+        if token:
+            return token
+    return request.COOKIES.get(get_claims_cookie_name())
+
+
+def get_request_user_id(request):
+    """
+    :return: Id, as string, of the authenticated user of *request*, taken
+             from the session if the user is not loaded. None if there is no
+             user.
+    """
+    if is_user_loaded(request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        return str(user.pk)
+    session = getattr(request, 'session', None)
+    user_id = session.get(SESSION_KEY) if session is not None else None
+    return None if user_id is None else str(user_id)
+
+
+def get_claims_role_bits(request, registry):
+    """
+    Verify the token of *request* once and return its role bitmap, if it is
+    a bitmap of *registry* issued for current membership version of the
+    verified user of *request*.
+
+    :return: Role bitmap, or None if the token is missing, not valid,
+             outdated, of other registry or of other user.
+    """
+    claims = request.__dict__.get(CLAIMS_ATTRIBUTE)
+    if claims is None:
+        token = get_request_token(request)
+        claims = (token and read_role_claims(token)) or False
+        setattr(request, CLAIMS_ATTRIBUTE, claims)
+    if not claims:
+        return None
+    user_id, bits, fingerprint, version = claims
+    # The user is verified last, it may need to be loaded.
+    if fingerprint != registry.fingerprint or version is None or \
+            version != get_membership_version(user_id) or \
+            user_id != get_verified_user_id(request):
+        return None
+    return bits
+
+
+def issue_role_claims(request, user_id, role_ids, registry=None,
+                      version=None):
+    """
+    Keep in *request* a new token for *user_id* with *role_ids*, to be sent
+    with the response. Nothing is issued if the policy cache does not keep
+    the membership version.
+
+    :param registry: Role registry of the bitmap, by default the registry of
+                     the view policy table.
+    :param version: Membership version of the user read before *role_ids*
+                    were loaded, by default it is read now.
+    """
+    if version is None:
+        version = get_membership_version(user_id)
+        if version is None:
+            return
+    if registry is None:
+        registry = get_view_policies().registry
+    setattr(request, NEW_TOKEN_ATTRIBUTE,
+            make_role_claims(user_id, registry.get_bits(role_ids),
+                             registry.fingerprint, version))
+
+
+def remove_role_claims(request):
+    setattr(request, NEW_TOKEN_ATTRIBUTE, '')
+
+
+def process_role_claims(request, response):
+    """
+    Send with *response* the token issued or removed while processing
+    *request*.
+    """
+    token = request.__dict__.get(NEW_TOKEN_ATTRIBUTE)
+    if token is None:
+        return response
+    name = get_claims_cookie_name()
+    if token:
+        kwargs = {}
+        samesite = getattr(settings, 'SESSION_COOKIE_SAMESITE', None)
+        if samesite:
+            kwargs['samesite'] = samesite
+        response.set_cookie(name, token, max_age=get_claims_max_age(),
+                            path=settings.SESSION_COOKIE_PATH,
+                            domain=settings.SESSION_COOKIE_DOMAIN,
+                            secure=settings.SESSION_COOKIE_SECURE or None,
+                            httponly=True, **kwargs)
+        if get_claims_header():
+            response[get_claims_header()] = token
+    else:
+        response.delete_cookie(name, path=settings.SESSION_COOKIE_PATH,
+                               domain=settings.SESSION_COOKIE_DOMAIN)
+    return response
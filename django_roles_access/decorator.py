@@ -1,12 +1,21 @@
 from functools import wraps
 
-from django_roles_access.tools import check_access_by_role, get_no_access_response
+from django_roles_access.tools import (check_access_by_role,
+                                       get_no_access_response,
+                                       iscoroutinefunction)
 
 
 def access_by_role(view):
     """
     Check if logged user can access the decorated function or method.
+
+    Coroutine views are decorated with
+    :func:`django_roles_access.aio.async_access_by_role`.
     """
+    if iscoroutinefunction(view):
+        from django_roles_access.aio import async_access_by_role
+        return async_access_by_role(view)
+
     @wraps(view)
     def _view(request, *args, **kwargs):
         if check_access_by_role(request):
@@ -0,0 +1,66 @@
+"""
+Paths exempt from access checks.
+
+:class:`django_roles_access.middleware.RolesMiddleware` does not check
+access to requests whose path (*request.path_info*) starts with any prefix
+of *DJANGO_ROLES_ACCESS_EXEMPT_PATH_PREFIXES* setting (e.g. '/static/',
+'/media/') or is any path of *DJANGO_ROLES_ACCESS_EXEMPT_PATHS* setting (e.g.
+'/healthz'). Both are compiled into a :class:`PathTrie` when the middleware
+is created, so a path is matched reading each character at most once
+whatever the number of exempt paths.
+"""
+from django.conf import settings
+
+# Keys of trie nodes marking the end of a prefix or of an exact path. They
+# can not be confused with path characters.
+_PREFIX = 0
+_EXACT = 1
+
+
+class PathTrie(object):
+    """
+    Character trie of path prefixes and exact paths.
+    """
+
+    def __init__(self, prefixes=(), paths=()):
+        self._root = {}
+        for prefix in prefixes:
+            self._add(prefix, _PREFIX)
+        for path in paths:
+            self._add(path, _EXACT)
+
+    def _add(self, path, kind):
+        node = self._root
+        for char in path:
+            node = node.setdefault(char, {})
+        node[kind] = True
+
+    def __bool__(self):
+        return bool(self._root)
+
+    __nonzero__ = __bool__
+
+    def match(self, path):
+        """
+        :return: True if *path* starts with any prefix or is any path of the
+                 trie.
+        """
+        node = self._root
+        if _PREFIX in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if _PREFIX in node:
+                return True
+        return _EXACT in node
+
+
+def get_exempt_paths():
+    """
+    :return: :class:`PathTrie` of the exempt path settings.
+    """
+    return PathTrie(
+        getattr(settings, 'DJANGO_ROLES_ACCESS_EXEMPT_PATH_PREFIXES', ()),
+        getattr(settings, 'DJANGO_ROLES_ACCESS_EXEMPT_PATHS', ()))
@@ -4,12 +4,17 @@ This test module will search for all site's urls and analyze their security
 status.
 """
 from importlib import import_module
+import io
 
 from django.core.management import BaseCommand
+from django.core.management.base import OutputWrapper
+from django.core.management.color import no_style
 from django.conf import settings
 
 from django_roles_access.tools import get_app_type
-from django_roles_access.utils import (walk_site_url, get_views_by_app,
+from django_roles_access.utils import (iter_site_url, get_views_by_app,
+                                       get_view_accesses, get_fork_context,
+                                       analyze_views_by_app,
                                        view_access_analyzer,
                                        OutputReport)
 
@@ -29,23 +34,41 @@ class Command(BaseCommand):
             '--output-format',
             dest='format',
             type=str)
+        parser.add_argument(
+            '--output',
+            dest='output',
+            type=str,
+            help='Write the report to this file instead of standard output.')
+        parser.add_argument(
+            '--jobs',
+            dest='jobs',
+            type=int,
+            default=1,
+            help='Analyze applications with this number of processes.')
 
     def handle(self, *args, **options):
         """
         This method implements checkviewaccess _output behavior.
         """
-        output = OutputReport(self.stdout, self.style)
+        if options.get('output'):
+            with io.open(options['output'], 'w', encoding='utf-8') as report:
+                self.write_report(OutputReport(OutputWrapper(report),
+                                               no_style()), options)
+        else:
+            self.write_report(OutputReport(self.stdout, self.style), options)
+
+    def write_report(self, output, options):
+        """
+        Write the report to *output*. Rows are written as each view is
+        analyzed, and the output is flushed after each application.
+        """
         self.with_format = False
         if options['format']:
             self.with_format = True
             output.set_format('csv')
         output.write_header()
 
-        # 1. Get information. All views are collected and grouped by application
-        url = import_module(settings.ROOT_URLCONF).urlpatterns
-        views_by_app = get_views_by_app(walk_site_url(url))
-
-        # 2. Check if Django roles middleware is active or not
+        # 1. Check if Django roles middleware is active or not
         if DJANGO_ROLE_ACCESS_MIDDLEWARE in settings.MIDDLEWARE:
             site_active = True
         else:
@@ -53,22 +76,54 @@ class Command(BaseCommand):
         output.write_middleware_status(site_active)
 
         output.write_end_of_head()
+        output.flush()
+
+        # 2. Get information. All views are collected and grouped by
+        # application
+        url = import_module(settings.ROOT_URLCONF).urlpatterns
+        views_by_app = get_views_by_app(iter_site_url(url))
+        # All ViewAccess objects and their roles are loaded at once.
+        view_accesses = get_view_accesses()
+
         # 3. Analysis is done by application
-        for app_name, views_list in views_by_app.items():
-            # Get application classification.
-            app_type = get_app_type(app_name)
+        jobs = options.get('jobs') or 1
+        if jobs > 1 and get_fork_context() is None:
+            self.stderr.write('Processes can not be forked in this platform: '
+                              'applications are analyzed in one process.')
+            jobs = 1
+        if jobs > 1:
+            analyzed_apps = analyze_views_by_app(views_by_app, view_accesses,
+                                                 site_active, jobs)
+        else:
+            analyzed_apps = self.analyze_views_by_app(
+                views_by_app, view_accesses, site_active)
+        for app_name, app_type, analyses in analyzed_apps:
+            views_list = views_by_app[app_name]
             output.process_application_data(app_name, app_type, views_list)
 
             # 4. For each view of the analyzed application
-            for url, callback, view_name in views_list:
+            for (url, callback, view_name), analysis in zip(views_list,
+                                                            analyses):
                 output.process_view_data(view_name, url)
-
-                analysis = view_access_analyzer(app_type, callback, view_name,
-                                                site_active)
                 output.write_view_access_analyzer(analysis)
 
             output.close_application_data(app_name)
+            output.flush()
 
         # 6. End of report
         output.write_footer()
 
+    def analyze_views_by_app(self, views_by_app, view_accesses, site_active):
+        """
+        Analyze applications in this process, one at a time.
+
+        :return: Iterator of tuples (app name, app type, iterator with the
+                 analysis of each view).
+        """
+        for app_name, views_list in views_by_app.items():
+            # Get application classification.
+            app_type = get_app_type(app_name)
+            yield app_name, app_type, (
+                view_access_analyzer(app_type, callback, view_name,
+                                     site_active, view_accesses)
+                for url, callback, view_name in views_list)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Write the binary snapshot of ViewAccess policies used by workers.
+"""
+from django.core.management import BaseCommand, CommandError
+
+from django_roles_access.snapshot import (get_snapshot_path,
+                                          save_policy_snapshot)
+
+
+class Command(BaseCommand):
+    """
+    **writepolicysnapshot** management command writes current ViewAccess
+    objects to a snapshot file (see :mod:`django_roles_access.snapshot`).
+    """
+    help = 'Write the policy snapshot file mapped by workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            dest='path',
+            type=str,
+            help='Snapshot file. Default: DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT '
+                 'setting.')
+
+    def handle(self, *args, **options):
+        path = options['path'] or get_snapshot_path()
+        if not path:
+            raise CommandError('No snapshot path: use --path or set '
+                               'DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT.')
+        count = save_policy_snapshot(path)
+        self.stdout.write(u'{} views written to {}'.format(count, path))
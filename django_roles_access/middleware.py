@@ -1,17 +1,49 @@
-from django_roles_access.tools import check_access_by_role, get_no_access_response
+from django_roles_access.claims import process_role_claims
+from django_roles_access.exempt import get_exempt_paths
+from django_roles_access.tools import (check_access_by_role,
+                                       get_no_access_response,
+                                       iscoroutinefunction)
 
 
 class RolesMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        #: :class:`django_roles_access.exempt.PathTrie` of paths not checked.
+        self.exempt_paths = get_exempt_paths()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            from django_roles_access.aio import setup_async_middleware
+            setup_async_middleware(self)
 
     def __call__(self, request):
-        if not check_access_by_role(request):
-            return get_no_access_response()
+        if self.is_async:
+            from django_roles_access.aio import acall_middleware
+            return acall_middleware(self, request)
 
         response = self.get_response(request)
 
         # Only useful for unit test.
         response.django_roles = True
 
-        return response
+        return process_role_claims(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Access is checked once Django has resolved the URL, so the
+        *request.resolver_match* already set by Django is used instead of
+        resolving the URL again.
+
+        Requests to exempt paths (:mod:`django_roles_access.exempt`) are not
+        checked.
+
+        In asynchronous mode, this method is replaced by the coroutine of
+        :func:`django_roles_access.aio.setup_async_middleware`.
+        """
+        if self.exempt_paths and self.exempt_paths.match(request.path_info):
+            return None
+        if not check_access_by_role(request):
+            return get_no_access_response()
+        return None
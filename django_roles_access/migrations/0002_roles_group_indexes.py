@@ -0,0 +1,48 @@
+from django.db import migrations
+
+# Index name -> (model name). Indexes are created on the roles through table
+# of each model, with columns (group_id, <model>_id), to answer "does any of
+# these groups have access" with an index only lookup.
+ROLES_INDEXES = {
+    'django_roles_va_group_idx': 'ViewAccess',
+    'django_roles_ta_group_idx': 'TemplateAccess',
+}
+
+
+def get_index_columns(apps, schema_editor, model_name):
+    model = apps.get_model('django_roles_access', model_name)
+    roles = model._meta.get_field('roles')
+    through = roles.remote_field.through
+    quote_name = schema_editor.quote_name
+    table = quote_name(through._meta.db_table)
+    columns = ', '.join(quote_name(through._meta.get_field(name).column)
+                        for name in (roles.m2m_reverse_field_name(),
+                                     roles.m2m_field_name()))
+    return table, columns
+
+
+def create_indexes(apps, schema_editor):
+    for name, model_name in ROLES_INDEXES.items():
+        table, columns = get_index_columns(apps, schema_editor, model_name)
+        schema_editor.execute('CREATE INDEX {} ON {} ({})'.format(
+            schema_editor.quote_name(name), table, columns))
+
+
+def drop_indexes(apps, schema_editor):
+    for name, model_name in ROLES_INDEXES.items():
+        table, columns = get_index_columns(apps, schema_editor, model_name)
+        sql = 'DROP INDEX {}'.format(schema_editor.quote_name(name))
+        if schema_editor.connection.vendor == 'mysql':
+            sql += ' ON {}'.format(table)
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_roles_access', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,13 +1,21 @@
-from django.utils.decorators import method_decorator
-
-from django_roles_access.decorator import access_by_role
+from django_roles_access.tools import (check_access_by_role,
+                                       get_no_access_response)
 
 
 class RolesMixin(object):
     """
-    A mixin that user access_by_role decorator for dispatch method.
+    A mixin that check access by role before dispatch method, as
+    access_by_role decorator does. Asynchronous views (Django 4.1+) are
+    checked without blocking the event loop.
     """
 
-    @method_decorator(access_by_role)
     def dispatch(self, request, *args, **kwargs):
-        return super(RolesMixin, self).dispatch(request, *args, **kwargs)
+        dispatch = super(RolesMixin, self).dispatch
+        if getattr(self, 'view_is_async', False):
+            from django_roles_access.aio import adispatch
+            return adispatch(dispatch, request, *args, **kwargs)
+        if check_access_by_role(request):
+            return dispatch(request, *args, **kwargs)
+        return get_no_access_response()
+
+    dispatch.access_by_role = True
@@ -0,0 +1,299 @@
+"""
+Compiled access policies.
+
+When *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True, all
+:class:`django_roles_access.models.ViewAccess` objects are loaded once per
+process into a table mapping each view name to its access type and the ids of
+the roles (:class:`django.contrib.auth.models.Group`) with access. Views
+security checks are then done against this table without querying the
+database. In the same way, :class:`django_roles_access.models.TemplateAccess`
+objects are loaded into a table mapping each flag to the ids of its roles.
+In process tables, the roles are integer bitmaps of the
+:class:`django_roles_access.roles.RoleRegistry` of the table.
+
+Any change to ViewAccess or TemplateAccess objects (see
+:mod:`django_roles_access.signals`) bumps a policy version stored in Django's
+cache framework, so every process of the site reloads its table on next use.
+The cache used is the one named by *DJANGO_ROLES_ACCESS_CACHE_ALIAS* setting
+(default: 'default'). Views security checks read the version once per
+request (:func:`get_request_policy_version`).
+
+When *DJANGO_ROLES_ACCESS_SHARED_POLICY* setting is also True, loaded tables
+are stored in that cache under a key including the policy version. The first
+process needing a table for a version loads it from the database, and the
+other processes get it from the cache.
+"""
+from collections import namedtuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from django_roles_access.models import TemplateAccess, ViewAccess
+from django_roles_access.roles import RoleRegistry
+
+#: Compiled version of a ViewAccess object: access type and the roles with
+#: access, a frozenset of ids as loaded from the database or a bitmap in
+#: policy tables.
+ViewPolicy = namedtuple('ViewPolicy', ['type', 'roles'])
+
+POLICY_VERSION_KEY = 'django_roles_access:policy_version'
+POLICY_TABLE_KEY = 'django_roles_access:policy:{name}:{version}'
+
+#: Name of the request attribute where the policy version read for the
+#: request is kept.
+POLICY_VERSION_ATTRIBUTE = '_roles_access_policy_version'
+
+# Table name -> tuple (policy version, table) of the process.
+_tables = {}
+# Bumped with the shared version. Used alone when the configured cache does
+# not keep values (DummyCache).
+_local_version = 0
+
+
+def is_policy_cache_enabled():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_POLICY_CACHE', False)
+
+
+def is_shared_policy_enabled():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_SHARED_POLICY', False)
+
+
+def get_policy_cache():
+    return caches[getattr(settings, 'DJANGO_ROLES_ACCESS_CACHE_ALIAS',
+                          'default')]
+
+
+def get_policy_version(version=None):
+    """
+    Return current policy version. If the version is not in the cache (first
+    use or evicted key) a new one is stored.
+
+    :param version: Version already read from the cache, if any.
+    """
+    if version is None:
+        cache = get_policy_cache()
+        version = cache.get(POLICY_VERSION_KEY)
+        if version is None:
+            cache.add(POLICY_VERSION_KEY, uuid4().hex, None)
+            version = cache.get(POLICY_VERSION_KEY)
+    return version, _local_version
+
+
+def get_request_policy_version(request):
+    """
+    Return the policy version for *request*. It is read once per request, so
+    all checks of the request use the same policies.
+    """
+    version = request.__dict__.get(POLICY_VERSION_ATTRIBUTE)
+    if version is None:
+        version = get_policy_version()
+        setattr(request, POLICY_VERSION_ATTRIBUTE, version)
+    return version
+
+
+def bump_policy_version():
+    """
+    Set a new policy version. All processes will reload their policy table.
+    """
+    global _local_version
+    _local_version += 1
+    get_policy_cache().set(POLICY_VERSION_KEY, uuid4().hex, None)
+
+
+def invalidate_policies(using=None):
+    """
+    Bump policy version. Inside a transaction the version is bumped again on
+    commit, so a table loaded by other process before the commit is not kept.
+    """
+    bump_policy_version()
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(bump_policy_version, using=using)
+
+
+def load_view_policies(view_names=None):
+    """
+    Build the policy table from the database with two queries: one for the
+    ViewAccess objects and one for their roles. If *view_names* is given,
+    only ViewAccess objects of those views are loaded, with one query.
+
+    :return: Dictionary view name -> :class:`ViewPolicy`.
+    """
+    if view_names is not None:
+        roles = {}
+        types = {}
+        for view, _type, group_id in ViewAccess.objects.filter(
+                view__in=view_names).values_list('view', 'type', 'roles'):
+            types[view] = _type
+            if group_id is not None:
+                roles.setdefault(view, set()).add(group_id)
+        return {view: ViewPolicy(_type, frozenset(roles.get(view, ())))
+                for view, _type in types.items()}
+
+    roles = {}
+    for view_access_id, group_id in ViewAccess.roles.through.objects.\
+            values_list('viewaccess_id', 'group_id'):
+        roles.setdefault(view_access_id, set()).add(group_id)
+
+    view_policies = {}
+    for pk, view, _type in ViewAccess.objects.values_list('pk', 'view',
+                                                          'type'):
+        view_policies[view] = ViewPolicy(_type,
+                                         frozenset(roles.get(pk, ())))
+    return view_policies
+
+
+def load_template_policies():
+    """
+    Build the template policy table from the database with one query.
+    TemplateAccess objects without roles are not included.
+
+    :return: Dictionary flag -> frozenset of role ids.
+    """
+    roles = {}
+    for flag, group_id in TemplateAccess.roles.through.objects.values_list(
+            'templateaccess__flag', 'group_id'):
+        roles.setdefault(flag, set()).add(group_id)
+    return {flag: frozenset(role_ids) for flag, role_ids in roles.items()}
+
+
+class PolicyTable(dict):
+    """
+    Policy table of the process: a dictionary whose roles are bitmaps of
+    *registry*.
+    """
+
+    def __init__(self, items=(), registry=None):
+        super(PolicyTable, self).__init__(items)
+        self.registry = registry or RoleRegistry()
+
+
+def compile_view_policies(view_policies):
+    """
+    :param view_policies: Dictionary view name -> :class:`ViewPolicy` with
+                          role ids, as returned by
+                          :func:`load_view_policies`.
+    :return: :class:`PolicyTable` view name -> :class:`ViewPolicy` with role
+             bitmaps.
+    """
+    registry = RoleRegistry(role_id for view_policy in view_policies.values()
+                            for role_id in view_policy.roles)
+    return PolicyTable(
+        ((view, ViewPolicy(view_policy.type,
+                           registry.get_bits(view_policy.roles)))
+         for view, view_policy in view_policies.items()),
+        registry)
+
+
+def compile_template_policies(template_policies):
+    """
+    :param template_policies: Dictionary flag -> frozenset of role ids, as
+                              returned by :func:`load_template_policies`.
+    :return: :class:`PolicyTable` flag -> role bitmap.
+    """
+    registry = RoleRegistry(role_id for role_ids in template_policies.values()
+                            for role_id in role_ids)
+    return PolicyTable(((flag, registry.get_bits(role_ids))
+                        for flag, role_ids in template_policies.items()),
+                       registry)
+
+
+def _load_view_table():
+    return compile_view_policies(load_view_policies())
+
+
+def _load_template_table():
+    return compile_template_policies(load_template_policies())
+
+
+def _get_table(name, loader, version=None):
+    """
+    Return the table *name* of the process, loading it on first use or when
+    policy version has changed.
+
+    :param version: Policy version, by default it is read from the cache.
+    """
+    version = version or get_policy_version()
+    table = _tables.get(name)
+    if table is None or table[0] != version:
+        if is_shared_policy_enabled():
+            table = _tables[name] = (version,
+                                     _get_shared_table(name, loader, version))
+        else:
+            table = _tables[name] = (version, loader())
+    return table[1]
+
+
+def _get_shared_table(name, loader, version):
+    """
+    Return the table *name* for *version* from the policy cache. If it is not
+    there, it is loaded from the database and added to the cache.
+    """
+    cache = get_policy_cache()
+    key = POLICY_TABLE_KEY.format(name=name, version=version[0])
+    table = cache.get(key)
+    if table is None:
+        table = loader()
+        cache.add(key, table)
+    return table
+
+
+def get_view_policies(version=None):
+    """
+    Return the policy snapshot file (see :mod:`django_roles_access.snapshot`),
+    if it is valid for current policy version, or the ViewAccess policy table
+    of the process. Both have *get* method and *registry* attribute of
+    :class:`PolicyTable`.
+
+    :param version: Policy version, by default it is read from the cache.
+    """
+    from django_roles_access.snapshot import get_policy_snapshot
+
+    version = version or get_policy_version()
+    snapshot = get_policy_snapshot(version)
+    if snapshot is not None:
+        return snapshot
+    return _get_table('view', _load_view_table, version)
+
+
+def get_loaded_view_policies(version=None):
+    """
+    Return the same as :func:`get_view_policies` if it is already loaded for
+    current policy version, without querying the database.
+
+    :param version: Policy version, by default it is read from the cache.
+    :return: Policy snapshot, policy table or None.
+    """
+    from django_roles_access.snapshot import get_policy_snapshot
+
+    version = version or get_policy_version()
+    snapshot = get_policy_snapshot(version)
+    if snapshot is not None:
+        return snapshot
+    table = _tables.get('view')
+    if table is not None and table[0] == version:
+        return table[1]
+    return None
+
+
+def get_view_policy(view_name):
+    """
+    :return: :class:`ViewPolicy` for *view_name*, with a role bitmap, or None
+             if there is no ViewAccess object for the view.
+    """
+    return get_view_policies().get(view_name)
+
+
+def get_template_policies():
+    """
+    Return the TemplateAccess policy table of the process.
+    """
+    return _get_table('template', _load_template_table)
+
+
+def clear_policies():
+    """
+    Discard the policy tables. They will be loaded again on next use.
+    """
+    _tables.clear()
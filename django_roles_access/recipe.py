@@ -0,0 +1,131 @@
+"""
+Access decision recipes.
+
+When *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True, access to a view only
+depends on the type of its application, its ViewAccess policy and the user.
+The first two are compiled into a recipe for each application name and view
+name the first time the view is requested, so next requests decide access
+with one dictionary lookup and, at most, a check of the user. Recipes are
+compiled again when the application type settings or the policy table
+change.
+
+Recipes are also kept by view callback, so most requests find them without
+hashing the application and view names. A callback used by URL patterns with
+different names (e.g. included with several namespaces) is only looked up by
+names.
+
+A recipe is one of:
+
+* True or False: access is granted or denied to every user.
+* :data:`AUTHENTICATED`: access is granted to authenticated users.
+* :class:`RoleRecipe`: access is granted to authenticated users with any of
+  the roles.
+"""
+from collections import namedtuple
+
+from django_roles_access.models import ViewAccess
+from django_roles_access.roles import get_role_bits
+
+AUTHENTICATED = 'authenticated'
+
+#: Role bitmap with access and the
+#: :class:`django_roles_access.roles.RoleRegistry` of the bitmap.
+RoleRecipe = namedtuple('RoleRecipe', ['roles', 'registry'])
+
+# Tuple (app types index, view policies, dictionary (app name, view name) ->
+# recipe, dictionary callback -> (app name, view name, recipe)) of the
+# process.
+_recipes = None
+
+# Value for callbacks with more than one view name.
+_AMBIGUOUS = (None, None, None)
+
+
+def compile_recipe(app_type, view_policy, registry):
+    """
+    Compile the access rules of
+    :func:`django_roles_access.tools.evaluate_access_by_role`.
+
+    :param app_type: Type of the application of the view, or None.
+    :param view_policy: :class:`django_roles_access.policy.ViewPolicy` of the
+                        view, or None.
+    :param registry: :class:`django_roles_access.roles.RoleRegistry` of the
+                     role bitmap of *view_policy*.
+    """
+    if app_type == 'NOT_SECURED':
+        return True
+    if app_type == 'DISABLED':
+        return False
+    if view_policy is not None:
+        if view_policy.type == ViewAccess.PUBLIC:
+            return True
+        elif view_policy.type == ViewAccess.AUTHORIZED:
+            return AUTHENTICATED
+        elif view_policy.type == ViewAccess.BY_ROLE:
+            return RoleRecipe(view_policy.roles, registry)
+    if app_type == 'SECURED':
+        return AUTHENTICATED
+    return True
+
+
+def apply_recipe(recipe, user):
+    """
+    :return: True if *user* can access a view with *recipe*. False in other
+             case.
+    """
+    if recipe is True or recipe is False:
+        return recipe
+    if not user.is_authenticated:
+        return False
+    if recipe is AUTHENTICATED:
+        return True
+    return bool(recipe.roles & get_role_bits(user, recipe.registry))
+
+
+def get_recipe(app_name, view_name, app_types_index, view_policies,
+               callback=None):
+    """
+    Return the recipe of the view, compiling it on first use.
+
+    :param app_types_index: Dictionary application name -> type, as
+                            returned by *tools.get_app_types_index*.
+    :param view_policies: View policy table, as returned by
+                          :func:`django_roles_access.policy.get_view_policies`.
+    :param callback: View function of the resolved URL, if known.
+    """
+    global _recipes
+    recipes = _recipes
+    if (recipes is None or recipes[0] is not app_types_index or
+            recipes[1] is not view_policies):
+        recipes = _recipes = (app_types_index, view_policies, {}, {})
+    by_callback = recipes[3]
+    if callback is not None:
+        try:
+            entry = by_callback.get(callback)
+        except TypeError:
+            # Not hashable callback.
+            callback = entry = None
+        if entry is not None and entry[1] == view_name and \
+                entry[0] == app_name:
+            return entry[2]
+    key = (app_name, view_name)
+    try:
+        recipe = recipes[2][key]
+    except KeyError:
+        recipe = recipes[2][key] = compile_recipe(
+            app_types_index.get(app_name), view_policies.get(view_name),
+            view_policies.registry)
+    if callback is not None:
+        if entry is None:
+            by_callback[callback] = (app_name, view_name, recipe)
+        elif entry is not _AMBIGUOUS:
+            by_callback[callback] = _AMBIGUOUS
+    return recipe
+
+
+def clear_recipes():
+    """
+    Discard compiled recipes.
+    """
+    global _recipes
+    _recipes = None
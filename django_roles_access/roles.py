@@ -0,0 +1,200 @@
+"""
+Roles of users.
+
+The ids of the roles (:class:`django.contrib.auth.models.Group`) of a user
+are loaded once and kept in the user object, as Django does with
+permissions, so they are queried at most once per request.
+
+When *DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT* setting is greater than 0, they
+are also kept for that number of seconds in a process cache keyed by user id,
+holding at most *DJANGO_ROLES_ACCESS_ROLES_CACHE_MAX_SIZE* users (default:
+10000) and discarding the least recently used ones. Changes to users' groups
+(see :mod:`django_roles_access.signals`) remove the changed users from the
+cache of the process where the change is done. Other processes see the
+change when the timeout expires.
+
+Policy tables keep the roles with access as integer bitmaps of a
+:class:`RoleRegistry`, and the roles of a user are converted once per table
+with :func:`get_role_bits`.
+"""
+from collections import OrderedDict
+import hashlib
+from threading import Lock
+import time
+
+from django.conf import settings
+
+#: Name of the user attribute where role ids are kept.
+ROLE_IDS_ATTRIBUTE = '_roles_access_role_ids'
+#: Name of the user attribute where role bits of the last registry are kept.
+ROLE_BITS_ATTRIBUTE = '_roles_access_role_bits'
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class RoleIdsCache(object):
+    """
+    Least recently used cache user id -> frozenset of role ids, with expiry
+    time.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, user_id):
+        with self._lock:
+            try:
+                expires, role_ids = self._data.pop(user_id)
+            except KeyError:
+                return None
+            if expires <= _clock():
+                return None
+            # Reinsert as most recently used.
+            self._data[user_id] = (expires, role_ids)
+            return role_ids
+
+    def set(self, user_id, role_ids, timeout, max_size, generation=None):
+        """
+        Add *role_ids* for *user_id*. If *generation* is given and any user
+        has been deleted from the cache since it was read, role ids could be
+        outdated and are not added.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data.pop(user_id, None)
+            self._data[user_id] = (_clock() + timeout, role_ids)
+            while len(self._data) > max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, user_id):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+role_ids_cache = RoleIdsCache()
+
+
+class RoleRegistry(object):
+    """
+    Dense bit index of the roles referenced by a policy table. A set of roles
+    is an integer with the bit of each role set. Roles not in the registry
+    have no bit, as they do not grant access to anything in the table.
+    """
+
+    def __init__(self, role_ids=()):
+        #: Tuple of role ids in the order of their bits.
+        self.role_ids = tuple(sorted(set(role_ids)))
+        self._masks = {role_id: 1 << bit
+                       for bit, role_id in enumerate(self.role_ids)}
+        #: Hash of the role ids: bitmaps of registries with the same
+        #: fingerprint have the same meaning.
+        self.fingerprint = hashlib.sha1(','.join(
+            str(role_id) for role_id in self.role_ids).encode(
+            'ascii')).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.role_ids)
+
+    def __getstate__(self):
+        return self.role_ids
+
+    def __setstate__(self, role_ids):
+        self.__init__(role_ids)
+
+    def get_bits(self, role_ids):
+        """
+        :return: Integer bitmap of *role_ids*.
+        """
+        bits = 0
+        masks = self._masks
+        for role_id in role_ids:
+            bits |= masks.get(role_id, 0)
+        return bits
+
+    def get_role_ids(self, bits):
+        """
+        :return: frozenset of the role ids in *bits*.
+        """
+        return frozenset(role_id for bit, role_id in enumerate(self.role_ids)
+                         if bits >> bit & 1)
+
+
+def get_roles_cache_timeout():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT', 0)
+
+
+def get_roles_cache_max_size():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_ROLES_CACHE_MAX_SIZE', 10000)
+
+
+def get_role_ids(user):
+    """
+    Return a frozenset with the ids of the roles of *user*. Anonymous users
+    have no roles.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    role_ids = getattr(user, ROLE_IDS_ATTRIBUTE, None)
+    if role_ids is None:
+        role_ids = load_role_ids(user)
+        setattr(user, ROLE_IDS_ATTRIBUTE, role_ids)
+    return role_ids
+
+
+def get_role_bits(user, registry):
+    """
+    Return the roles of *user* as a bitmap of *registry*. The bitmap is kept
+    in *user* for the last registry used.
+    """
+    if not user.is_authenticated:
+        return 0
+    role_bits = user.__dict__.get(ROLE_BITS_ATTRIBUTE)
+    if role_bits is None or role_bits[0] is not registry:
+        role_bits = (registry, registry.get_bits(get_role_ids(user)))
+        setattr(user, ROLE_BITS_ATTRIBUTE, role_bits)
+    return role_bits[1]
+
+
+def load_role_ids(user):
+    """
+    Return role ids of *user* from the process cache, if enabled, or from the
+    database.
+    """
+    timeout = get_roles_cache_timeout()
+    if not timeout:
+        return frozenset(user.groups.values_list('id', flat=True))
+    role_ids = role_ids_cache.get(user.pk)
+    if role_ids is None:
+        generation = role_ids_cache.generation
+        role_ids = frozenset(user.groups.values_list('id', flat=True))
+        role_ids_cache.set(user.pk, role_ids, timeout,
+                           get_roles_cache_max_size(), generation)
+    return role_ids
+
+
+def forget_role_ids(user=None, user_ids=None):
+    """
+    Remove cached role ids of *user* instance and of users with ids in
+    *user_ids*. Without arguments the whole process cache is cleared.
+    """
+    if user is None and user_ids is None:
+        role_ids_cache.clear()
+        return
+    if user is not None:
+        user.__dict__.pop(ROLE_IDS_ATTRIBUTE, None)
+        user.__dict__.pop(ROLE_BITS_ATTRIBUTE, None)
+        role_ids_cache.delete(user.pk)
+    for user_id in user_ids or ():
+        role_ids_cache.delete(user_id)
@@ -0,0 +1,254 @@
+"""
+Access checks from session data.
+
+Django's *AuthenticationMiddleware* sets *request.user* as a lazy object:
+the first use of the user reads the session and selects the user row. Many
+access checks only need to know if the user is authenticated. When
+*DJANGO_ROLES_ACCESS_SESSION_AUTH* setting is True, those checks are decided
+from the authentication keys of the session, and the user is only loaded
+when its roles are needed.
+
+A session is taken as authenticated when it has a user id and the
+authentication backend of the session is still configured, as Django does
+before loading the user. Unlike Django, the user row is not read: a user
+deactivated or deleted keeps access to views open to authenticated users
+until the session ends (or the user is loaded by the view). When
+*DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT* setting is also True, the session
+hash is verified against the user password, and the user is checked with
+*user_can_authenticate* of the session backend (e.g. *is_active* for
+*ModelBackend*), reading only the password and *is_active* columns. If
+verification fails, *request.user* is used.
+
+When *DJANGO_ROLES_ACCESS_SESSION_ROLES* setting is True, the ids of the
+roles of the user are stored in the session at login, together with a
+membership version kept in the policy cache (see
+:mod:`django_roles_access.policy`). Changes to the user's groups (see
+:mod:`django_roles_access.signals`) bump the version, and role ids are loaded
+again and stored in the session on next request. With the policy cache,
+By role access is then decided from the session. Role ids of the session are
+only trusted for a user verified as Django does: the user is loaded, unless
+the session was verified by strict session authentication. Deleting a user
+bumps its membership version too.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user_model, load_backend)
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject, empty
+
+from django_roles_access.policy import get_policy_cache
+
+#: Session key of the tuple (user id, membership version, role ids).
+SESSION_ROLES_KEY = '_roles_access_roles'
+#: Name of the request attribute where the result of
+#: :func:`get_session_authentication` is kept.
+SESSION_AUTH_ATTRIBUTE = '_roles_access_session_auth'
+
+MEMBERSHIP_VERSION_KEY = 'django_roles_access:membership_version'
+USER_MEMBERSHIP_VERSION_KEY = 'django_roles_access:membership_version:{}'
+
+
+def is_session_auth_enabled():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_SESSION_AUTH', False)
+
+
+def is_session_auth_strict():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT', False)
+
+
+def is_user_loaded(request):
+    """
+    :return: False if *request.user* is the lazy user of
+             *AuthenticationMiddleware* not evaluated yet. True in other
+             case.
+    """
+    user = getattr(request, 'user', None)
+    return not (isinstance(user, SimpleLazyObject) and user._wrapped is empty)
+
+
+def is_session_loaded(session):
+    """
+    :return: True if the data of *session* was already loaded by its engine,
+             so reading it does no I/O.
+    """
+    return hasattr(session, '_session_cache')
+
+
+def get_session_authentication(request):
+    """
+    Decide if the user of *request* is authenticated without loading it.
+
+    :return: True or False, or None if it can not be decided from the
+             session (no session, user already loaded or strict verification
+             failed) and *request.user* must be used.
+    """
+    session = getattr(request, 'session', None)
+    if session is None or is_user_loaded(request):
+        return None
+    if SESSION_AUTH_ATTRIBUTE in request.__dict__:
+        return request.__dict__[SESSION_AUTH_ATTRIBUTE]
+    authenticated = _get_session_authentication(session)
+    setattr(request, SESSION_AUTH_ATTRIBUTE, authenticated)
+    return authenticated
+
+
+def _get_session_authentication(session):
+    user_id = session.get(SESSION_KEY)
+    if user_id is None:
+        return False
+    backend = session.get(BACKEND_SESSION_KEY)
+    if backend not in settings.AUTHENTICATION_BACKENDS:
+        return False
+    if is_session_auth_strict():
+        return verify_session_hash(session, user_id, backend)
+    return True
+
+
+def get_verified_user_id(request):
+    """
+    Return the id of the authenticated user of *request*, verified as Django
+    does: the user is loaded, unless the session is verified by strict
+    session authentication.
+
+    :return: User id as string, or None if the user is not authenticated.
+    """
+    if not is_user_loaded(request) and is_session_auth_enabled() and \
+            is_session_auth_strict() and get_session_authentication(request):
+        return str(request.session.get(SESSION_KEY))
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return str(user.pk)
+
+
+def verify_session_hash(session, user_id, backend):
+    """
+    Verify the session hash of *user_id* selecting only its password, and
+    its *is_active* field if any. The user must be accepted by
+    *user_can_authenticate* of *backend*, as Django does when the user is
+    loaded.
+
+    :param backend: Path of the authentication backend of the session.
+    :return: True if the hash is valid and the user can authenticate, None
+             in other case.
+    """
+    user_model = get_user_model()
+    fields = ['password']
+    try:
+        user_model._meta.get_field('is_active')
+        fields.append('is_active')
+    except FieldDoesNotExist:
+        pass
+    try:
+        user = user_model._default_manager.only(*fields).get(
+            pk=user_model._meta.pk.to_python(user_id))
+    except (user_model.DoesNotExist, ValidationError):
+        # Django decides.
+        return None
+    user_can_authenticate = getattr(load_backend(backend),
+                                    'user_can_authenticate', None)
+    if user_can_authenticate is not None and \
+            not user_can_authenticate(user):
+        return None
+    session_hash = session.get(HASH_SESSION_KEY)
+    if session_hash and constant_time_compare(session_hash,
+                                              user.get_session_auth_hash()):
+        return True
+    return None
+
+
+def is_session_roles_enabled():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_SESSION_ROLES', False)
+
+
+def get_membership_version(user_id):
+    """
+    Return the membership version of *user_id*: a list with the version of
+    all users and the version of the user. Missing versions are created.
+
+    :return: List of two strings, or None if the policy cache does not keep
+             values (DummyCache).
+    """
+    cache = get_policy_cache()
+    keys = [MEMBERSHIP_VERSION_KEY,
+            USER_MEMBERSHIP_VERSION_KEY.format(user_id)]
+    values = cache.get_many(keys)
+    version = []
+    for key in keys:
+        value = values.get(key)
+        if value is None:
+            cache.add(key, uuid4().hex, None)
+            value = cache.get(key)
+            if value is None:
+                return None
+        version.append(value)
+    return version
+
+
+def bump_membership_version(user_ids=None):
+    """
+    Set a new membership version for users with ids in *user_ids*, or for
+    all users if it is None. Their role ids are loaded again on next request.
+    """
+    cache = get_policy_cache()
+    if user_ids is None:
+        cache.set(MEMBERSHIP_VERSION_KEY, uuid4().hex, None)
+    else:
+        cache.set_many({USER_MEMBERSHIP_VERSION_KEY.format(user_id):
+                        uuid4().hex for user_id in user_ids}, None)
+
+
+def load_user_role_ids(user_id):
+    """
+    :return: frozenset of the ids of the groups of *user_id*, queried from
+             the user groups through table.
+    """
+    field = get_user_model()._meta.get_field('groups')
+    return frozenset(field.remote_field.through.objects.filter(
+        **{field.m2m_field_name(): user_id}).values_list(
+        field.m2m_reverse_field_name(), flat=True))
+
+
+def store_session_role_ids(session, user_id):
+    """
+    Load the role ids of *user_id* and store them in *session* with current
+    membership version.
+
+    :return: frozenset of role ids.
+    """
+    return _store_role_ids(session, user_id, get_membership_version(user_id))
+
+
+def get_session_role_ids(request):
+    """
+    Return role ids of the session user, kept in the session. If they are
+    missing or outdated, they are loaded and stored again. The user is
+    verified first (see :func:`get_verified_user_id`).
+
+    :return: frozenset of role ids, or None if the session has no user or
+             it is not the verified request user.
+    """
+    session = getattr(request, 'session', None)
+    if session is None:
+        return None
+    user_id = session.get(SESSION_KEY)
+    if user_id is None or get_verified_user_id(request) != str(user_id):
+        return None
+    version = get_membership_version(user_id)
+    data = session.get(SESSION_ROLES_KEY)
+    if version is not None and data is not None and \
+            data[0] == str(user_id) and list(data[1]) == version:
+        return frozenset(data[2])
+    return _store_role_ids(session, user_id, version)
+
+
+def _store_role_ids(session, user_id, version):
+    # Version is read before role ids: if they change meanwhile, stored role
+    # ids are already outdated and they will be loaded again.
+    role_ids = load_user_role_ids(user_id)
+    if version is not None:
+        session[SESSION_ROLES_KEY] = (str(user_id), version, sorted(role_ids))
+    return role_ids
@@ -0,0 +1,121 @@
+"""
+Signal receivers keeping cached policies up to date.
+
+Any change to ViewAccess or TemplateAccess objects, to their roles, or the
+deletion of a Group, invalidates the policy tables of all processes
+(:func:`django_roles_access.policy.invalidate_policies`).
+
+Changes to users' groups remove their cached role ids
+(:func:`django_roles_access.roles.forget_role_ids`) and bump their
+membership version
+(:func:`django_roles_access.session.bump_membership_version`), as well as
+deleting users.
+
+When *DJANGO_ROLES_ACCESS_SESSION_ROLES* setting is True, role ids of the
+user are stored in the session at login. When
+*DJANGO_ROLES_ACCESS_ROLE_CLAIMS* setting is True (it requires the policy
+cache), a role claims token is issued at login and removed at logout.
+
+Changes to NOT_SECURED, DISABLED, PUBLIC or SECURED settings (e.g. with
+*override_settings*) clear the application types index
+(:func:`django_roles_access.tools.clear_app_types_index`).
+"""
+from django.contrib.auth import (get_user_model, user_logged_in,
+                                 user_logged_out)
+from django.contrib.auth.models import Group
+from django.core.signals import setting_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from django_roles_access.claims import (is_role_claims_enabled,
+                                        issue_role_claims, remove_role_claims)
+from django_roles_access.models import TemplateAccess, ViewAccess
+from django_roles_access.policy import invalidate_policies
+from django_roles_access.roles import forget_role_ids, get_role_ids
+from django_roles_access.session import (bump_membership_version,
+                                         is_session_roles_enabled,
+                                         store_session_role_ids)
+from django_roles_access.tools import APP_TYPES, clear_app_types_index
+
+M2M_CHANGES = ('post_add', 'post_remove', 'post_clear')
+
+
+@receiver(post_save, sender=ViewAccess)
+@receiver(post_save, sender=TemplateAccess)
+@receiver(post_delete, sender=ViewAccess)
+@receiver(post_delete, sender=TemplateAccess)
+@receiver(post_delete, sender=Group)
+def policy_changed(sender, using=None, **kwargs):
+    invalidate_policies(using)
+
+
+@receiver(m2m_changed, sender=ViewAccess.roles.through)
+@receiver(m2m_changed, sender=TemplateAccess.roles.through)
+def policy_roles_changed(sender, action, using=None, **kwargs):
+    if action in M2M_CHANGES:
+        invalidate_policies(using)
+
+
+def user_roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in M2M_CHANGES:
+        return
+    if not reverse:
+        # instance is the user.
+        forget_role_ids(user=instance)
+        bump_membership_version([instance.pk])
+    elif pk_set is None:
+        # All users removed from instance group.
+        forget_role_ids()
+        bump_membership_version()
+    else:
+        forget_role_ids(user_ids=pk_set)
+        bump_membership_version(pk_set)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, **kwargs):
+    forget_role_ids()
+    bump_membership_version()
+
+
+@receiver(post_delete, sender=get_user_model())
+def user_deleted(sender, instance, **kwargs):
+    forget_role_ids(user_ids=[instance.pk])
+    bump_membership_version([instance.pk])
+
+
+def connect_user_roles_changed(user_model):
+    """
+    Connect :func:`user_roles_changed` to the groups of *user_model*. Custom
+    user models without groups have no roles to watch.
+    """
+    if hasattr(user_model, 'groups'):
+        m2m_changed.connect(user_roles_changed,
+                            sender=user_model.groups.through)
+
+
+connect_user_roles_changed(get_user_model())
+
+
+@receiver(user_logged_in)
+def user_logged_in_roles(sender, request, user, **kwargs):
+    session = getattr(request, 'session', None)
+    role_ids = None
+    if session is not None and is_session_roles_enabled():
+        role_ids = store_session_role_ids(session, user.pk)
+    if request is not None and is_role_claims_enabled():
+        if role_ids is None:
+            role_ids = get_role_ids(user)
+        issue_role_claims(request, user.pk, role_ids)
+
+
+@receiver(user_logged_out)
+def user_logged_out_roles(sender, request, **kwargs):
+    if request is not None and is_role_claims_enabled():
+        remove_role_claims(request)
+
+
+@receiver(setting_changed)
+def app_types_changed(sender, setting, **kwargs):
+    if setting in APP_TYPES:
+        clear_app_types_index()
@@ -0,0 +1,295 @@
+"""
+Binary snapshot of the view policy table.
+
+*writepolicysnapshot* management command writes the ViewAccess policy table
+to the file named by *DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT* setting. When the
+policy cache is enabled, processes map that file read-only with
+:mod:`mmap` and look views up directly in it, so the operating system shares
+the same pages between all workers and no Python objects are built for the
+whole table.
+
+The snapshot keeps the policy version it was written for. Once any
+ViewAccess object changes the version is bumped, and views are looked up in
+the policy table of the process until a new snapshot is written. While
+there is no valid snapshot, the file is checked for changes at most once
+every *DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT_INTERVAL* seconds (default: 1).
+The policy version must be kept in a cache shared by all processes (not
+*locmem*) for workers to use a snapshot written by the command.
+
+File layout (little endian)::
+
+    header:   magic (8 bytes), entries count (uint32), version length
+              (uint32), registry length (uint32), padding (4 bytes)
+    version:  ASCII policy version, padded to 8 bytes
+    hashes:   sorted hashes of view names (uint64)
+    entries:  in the order of hashes; name offset (uint32), name length
+              (uint16), role bitmap offset (uint32), role bitmap length
+              (uint32), access type (2 bytes)
+    registry: role ids (uint32) in the order of their bits
+    data:     role bitmaps (little endian) and UTF-8 view names
+"""
+import binascii
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+from django.conf import settings
+
+from django_roles_access.policy import (ViewPolicy, compile_view_policies,
+                                        get_policy_version, load_view_policies)
+from django_roles_access.roles import RoleRegistry
+
+MAGIC = b'DRAPOLS2'
+HEADER = struct.Struct('<8sIII4x')
+ENTRY = struct.Struct('<IHII2s')
+ROLE = struct.Struct('<I')
+HASH = struct.Struct('<Q')
+
+# Tuple ((path, policy version), file modification time, snapshot or None,
+# time of next file check) of the process.
+_snapshot = None
+_clock = getattr(time, 'monotonic', time.time)
+
+
+def get_snapshot_path():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT', None)
+
+
+def get_snapshot_interval():
+    return getattr(settings, 'DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT_INTERVAL', 1)
+
+
+def hash_view_name(name):
+    """
+    Names are compared once the hash is found, so the hash only needs to be
+    well distributed and stable between processes.
+
+    :param name: UTF-8 encoded view name.
+    :return: 64 bits integer.
+    """
+    return ((zlib.crc32(name) & 0xffffffff) << 32 |
+            zlib.adler32(name) & 0xffffffff)
+
+
+def bits_to_bytes(bits):
+    """
+    :return: Little endian bytes of the integer *bits*.
+    """
+    length = (bits.bit_length() + 7) // 8
+    if hasattr(bits, 'to_bytes'):
+        return bits.to_bytes(length, 'little')
+    return binascii.unhexlify('{:0{}x}'.format(bits, length * 2))[::-1]
+
+
+def bytes_to_bits(data):
+    """
+    :return: Integer of little endian bytes *data*.
+    """
+    if hasattr(int, 'from_bytes'):
+        return int.from_bytes(data, 'little')
+    return int(binascii.hexlify(data[::-1]) or b'0', 16)
+
+
+def write_policy_snapshot(path, view_policies, version):
+    """
+    Write *view_policies* (dictionary view name -> ViewPolicy with role ids)
+    for policy *version* to *path*. The file is replaced atomically, so
+    processes with the old file mapped keep reading it.
+    """
+    table = compile_view_policies(view_policies)
+    version = (version or '').encode('ascii')
+    padding = b'\0' * (-(HEADER.size + len(version)) % HASH.size)
+    entries = sorted((hash_view_name(view.encode('utf-8')),
+                      view.encode('utf-8'), view_policy)
+                     for view, view_policy in table.items())
+    offset = (HEADER.size + len(version) + len(padding) +
+              (HASH.size + ENTRY.size) * len(entries) +
+              ROLE.size * len(table.registry))
+    hashes = []
+    index = []
+    data = []
+    for key, name, view_policy in entries:
+        bits = bits_to_bytes(view_policy.roles)
+        hashes.append(HASH.pack(key))
+        index.append(ENTRY.pack(offset + len(bits), len(name), offset,
+                                len(bits), view_policy.type.encode('ascii')))
+        data.extend((bits, name))
+        offset += len(bits) + len(name)
+
+    temporary_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, len(entries), len(version),
+                                        len(table.registry)))
+        snapshot_file.write(version + padding)
+        snapshot_file.write(b''.join(hashes))
+        snapshot_file.write(b''.join(index))
+        snapshot_file.write(b''.join(ROLE.pack(role_id)
+                                     for role_id in table.registry.role_ids))
+        snapshot_file.write(b''.join(data))
+    getattr(os, 'replace', os.rename)(temporary_path, path)
+
+
+class PolicySnapshot(object):
+    """
+    Read-only view policy table mapped from a snapshot file.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as snapshot_file:
+            self._buffer = mmap.mmap(snapshot_file.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+        magic, self._count, version_length, registry_length = \
+            HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError('{} is not a policy snapshot'.format(path))
+        self.version = self._buffer[
+            HEADER.size:HEADER.size + version_length].decode('ascii')
+        self._hashes = (HEADER.size + version_length +
+                        -(HEADER.size + version_length) % HASH.size)
+        self._entries = self._hashes + HASH.size * self._count
+        self._keys = _get_array(self._buffer, self._hashes, self._count, HASH)
+        #: :class:`django_roles_access.roles.RoleRegistry` of role bitmaps.
+        self.registry = RoleRegistry(_get_array(
+            self._buffer, self._entries + ENTRY.size * self._count,
+            registry_length, ROLE))
+
+    def __len__(self):
+        return self._count
+
+    def get(self, view_name):
+        """
+        :return: :class:`django_roles_access.policy.ViewPolicy`, with a role
+                 bitmap of *registry*, for *view_name* or None if there is
+                 no ViewAccess object for the view.
+        """
+        name = view_name.encode('utf-8')
+        key = hash_view_name(name)
+        buffer = self._buffer
+        keys = self._keys
+        position = bisect_left(keys, key)
+        # Different names could have the same hash.
+        while position < self._count and keys[position] == key:
+            name_offset, name_length, bits_offset, bits_length, _type = \
+                ENTRY.unpack_from(buffer,
+                                  self._entries + position * ENTRY.size)
+            if buffer[name_offset:name_offset + name_length] == name:
+                bits = bytes_to_bits(
+                    buffer[bits_offset:bits_offset + bits_length])
+                return ViewPolicy(_type.decode('ascii'), bits)
+            position += 1
+        return None
+
+
+class _Array(object):
+    """
+    Sequence of little endian integers of a snapshot, as needed by bisect and
+    to build the registry.
+    """
+
+    def __init__(self, buffer, offset, count, item):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self._item = item
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def __getitem__(self, index):
+        return self._item.unpack_from(
+            self._buffer, self._offset + index * self._item.size)[0]
+
+
+def _get_array(buffer, offset, count, item):
+    """
+    Return *count* integers of *item* struct from *offset* of *buffer* as a
+    sequence. On little endian platforms with Python 3 a memoryview of the
+    mapped file is used, so indexing and bisect do not call Python code.
+    """
+    if sys.byteorder == 'little' and hasattr(memoryview, 'cast'):
+        view = memoryview(buffer)[offset:offset + count * item.size]
+        return view.cast(item.format[-1])
+    return _Array(buffer, offset, count, item)
+
+
+def open_policy_snapshot(path):
+    """
+    :return: :class:`PolicySnapshot` or None if the file does not exist or is
+             not valid.
+    """
+    try:
+        return PolicySnapshot(path)
+    except (EnvironmentError, ValueError, struct.error):
+        return None
+
+
+def get_policy_snapshot(version=None):
+    """
+    Return the snapshot of the process if it was written for current policy
+    version, or None. The file is opened again when the version changes or,
+    while there is no valid snapshot, when the file is modified.
+
+    :param version: Policy version, by default it is read from the cache.
+    """
+    global _snapshot
+    path = get_snapshot_path()
+    if not path:
+        return None
+    key = (path, (version or get_policy_version())[0])
+    if _snapshot is not None and _snapshot[0] == key:
+        if _snapshot[2] is not None:
+            return _snapshot[2]
+        now = _clock()
+        if now < _snapshot[3]:
+            return None
+        modified = _get_modification_time(path)
+        if modified == _snapshot[1]:
+            _snapshot = _snapshot[:3] + (now + get_snapshot_interval(),)
+            return None
+    else:
+        now = _clock()
+        modified = _get_modification_time(path)
+    snapshot = open_policy_snapshot(path)
+    if snapshot is not None and snapshot.version != key[1]:
+        snapshot = None
+    _snapshot = (key, modified, snapshot, now + get_snapshot_interval())
+    return snapshot
+
+
+def _get_modification_time(path):
+    try:
+        return os.stat(path).st_mtime
+    except EnvironmentError:
+        return None
+
+
+def save_policy_snapshot(path=None):
+    """
+    Write a snapshot of current ViewAccess objects to *path* (default:
+    *DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT* setting).
+
+    :return: Number of views in the snapshot.
+    """
+    path = path or get_snapshot_path()
+    # Version is read first: if policies change while they are loaded, the
+    # snapshot is already outdated and it will not be used.
+    version = get_policy_version()[0]
+    view_policies = load_view_policies()
+    write_policy_snapshot(path, view_policies, version)
+    return len(view_policies)
+
+
+def clear_policy_snapshot():
+    """
+    Forget the snapshot of the process.
+    """
+    global _snapshot
+    _snapshot = None
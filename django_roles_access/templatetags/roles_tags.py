@@ -1,8 +1,34 @@
 from django import template
-from django_roles_access.models import TemplateAccess
+from django_roles_access.policy import (is_policy_cache_enabled,
+                                        compile_template_policies,
+                                        get_template_policies,
+                                        load_template_policies)
+from django_roles_access.roles import get_role_bits
 
 register = template.Library()
 
+#: Name of the user attribute where the template policy table is kept when
+#: the process policy cache is not enabled.
+TEMPLATE_POLICIES_ATTRIBUTE = '_roles_access_template_policies'
+
+
+def get_flags_roles(user):
+    """
+    Return the :class:`django_roles_access.policy.PolicyTable` flag -> role
+    bitmap used to check *user* access.
+
+    It is the process table when *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is
+    True. If not, the table is loaded once and kept in *user*, so it is
+    queried once per request however many flags are checked.
+    """
+    if is_policy_cache_enabled():
+        return get_template_policies()
+    flags_roles = getattr(user, TEMPLATE_POLICIES_ATTRIBUTE, None)
+    if flags_roles is None:
+        flags_roles = compile_template_policies(load_template_policies())
+        setattr(user, TEMPLATE_POLICIES_ATTRIBUTE, flags_roles)
+    return flags_roles
+
 
 @register.filter(name='check_role')
 def check_role(user, flag):
@@ -18,10 +44,29 @@ def check_role(user, flag):
     try:
         if user.is_superuser:
             return True
-        template_flag = TemplateAccess.objects.get(flag__exact=flag)
-        for group in user.groups.all():
-            if group in template_flag.roles.all():
-                return True
-        return False
+        flags_roles = get_flags_roles(user)
+        flag_roles = flags_roles.get(flag)
+        if not flag_roles:
+            return False
+        return bool(flag_roles & get_role_bits(user, flags_roles.registry))
     except:
         return False
+
+
+@register.simple_tag(name='load_role_flags')
+def load_role_flags(user, *flags):
+    """
+    Check many flags at once, with the same rules than
+    :func:`check_role`, and return a dictionary flag -> True or False. All
+    flags are resolved with the same template policy table.
+
+    Usage::
+
+        {% load_role_flags request.user 'menu_admin' 'menu_reports' as flags %}
+        {% if flags.menu_admin %} ... {% endif %}
+
+    :param user:
+    :param flags: :attribute:`roles.models.TemplateAccess.flag` values.
+    :return: Dictionary flag -> boolean.
+    """
+    return {flag: check_role(user, flag) for flag in flags}
@@ -1,15 +1,73 @@
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.http import HttpResponseForbidden, HttpResponseRedirect
 try:
     from django.utils.translation import ugettex as _
 except:
     from django.utils.translation import gettext as _
-from django.urls import resolve
+from django.urls import get_resolver, get_urlconf, resolve
+try:
+    from django.db.models import Exists, OuterRef
+except ImportError:
+    # Django < 1.11
+    Exists = OuterRef = None
+try:
+    from asgiref.sync import iscoroutinefunction
+except ImportError:
+    try:
+        from asyncio import iscoroutinefunction
+    except ImportError:
+        # Python 2
+        def iscoroutinefunction(func):
+            return False
 
+from django_roles_access.claims import (get_claims_role_bits,
+                                        get_request_user_id,
+                                        is_role_claims_enabled,
+                                        issue_role_claims)
 from django_roles_access.models import ViewAccess
+from django_roles_access.policy import (is_policy_cache_enabled,
+                                        compile_view_policies,
+                                        get_request_policy_version,
+                                        get_view_policies, load_view_policies)
+from django_roles_access.recipe import (AUTHENTICATED, apply_recipe,
+                                        compile_recipe, get_recipe)
+from django_roles_access.roles import (ROLE_IDS_ATTRIBUTE, get_role_bits,
+                                       get_role_ids)
+from django_roles_access.session import (get_membership_version,
+                                         get_session_authentication,
+                                         get_session_role_ids,
+                                         get_verified_user_id,
+                                         is_session_auth_enabled,
+                                         is_session_roles_enabled,
+                                         is_user_loaded)
 
 DEFAULT_FORBIDDEN_MESSAGE = _(u'<h1>403 Forbidden</h1>')
 
+#: Application types in the order they are checked.
+APP_TYPES = ('NOT_SECURED', 'DISABLED', 'PUBLIC', 'SECURED')
+
+#: Name of the request attribute where the access decision is kept.
+ACCESS_DECISION_ATTRIBUTE = '_roles_access_decision'
+
+# Dictionary application name -> type used by get_app_types_index.
+_app_types_index = None
+
+
+def get_resolver_match(request):
+    """
+    Return the :class:`django.urls.ResolverMatch` of the request.
+
+    *request.resolver_match* is set by Django before views and middleware
+    *process_view* are called. URL is only resolved when it is missing, and
+    the result is kept in the request so it is resolved once.
+    """
+    resolver_match = getattr(request, 'resolver_match', None)
+    if resolver_match is None:
+        resolver_match = resolve(request.path_info)
+        request.resolver_match = resolver_match
+    return resolver_match
+
 
 def get_view_access(request):
     """
@@ -26,35 +84,221 @@ def get_view_access(request):
     done to conclude if request user have access or not. In case request user
     do not have access, PermissionDenied is raised.
 
+    When *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True, the ViewAccess
+    object is searched in the process policy table
+    (:mod:`django_roles_access.policy`) instead of the database.
+    When *DJANGO_ROLES_ACCESS_SINGLE_QUERY* setting is True, the access is
+    decided with a single query (:func:`get_view_access_single_query`).
+
     :return: True if user have access. Or raise PermissionDenied.
     """
     user = request.user
-    current_url = resolve(request.path_info)
-    view_name = current_url.view_name
+    view_name = get_resolver_match(request).view_name
+
+    if is_policy_cache_enabled():
+        view_policies = get_view_policies(get_request_policy_version(request))
+        view_policy = view_policies.get(view_name)
+        if view_policy:
+            if view_policy.type == ViewAccess.AUTHORIZED:
+                return is_request_authenticated(request)
+            if view_policy.type == ViewAccess.BY_ROLE:
+                return (is_request_authenticated(request) and
+                        has_request_roles(request, view_policy.roles,
+                                          view_policies.registry))
+            return check_view_policy(user, view_policy,
+                                     view_policies.registry)
+        return None
+
+    if is_single_query_enabled():
+        user_id = None
+        if is_request_authenticated(request):
+            user_id = get_request_user_id(request)
+        return get_user_id_view_access(
+            user_id, view_name,
+            lambda: get_verified_user_id(request) == user_id)
 
     view_access = ViewAccess.objects.filter(view=view_name).first()
     if view_access:
         if view_access.type == 'pu':
             return True
         elif view_access.type == 'au':
-            if user.is_authenticated:
-                return True
-            else:
-                return False
+            return is_request_authenticated(request)
         elif view_access.type == 'br':
             if user.is_authenticated:
-                access = list(set(user.groups.all()) &
-                              set(view_access.roles.all()))
-                if access:
-                    return True
-                else:
-                    return False
+                return has_view_role(user, view_access)
             else:
                 return False
         else:
             return None
 
 
+def get_user_groups_query(user):
+    """
+    Return a query with the ids of the groups of *user*, to be used as
+    subquery. It only uses user groups through table.
+    """
+    return get_user_id_groups_query(user.pk)
+
+
+def get_user_id_groups_query(user_id):
+    """
+    Same as :func:`get_user_groups_query` for the user with *user_id*,
+    without loading the user.
+    """
+    field = get_user_model()._meta.get_field('groups')
+    return field.remote_field.through.objects.filter(
+        **{field.m2m_field_name(): user_id}).values(
+        field.m2m_reverse_field_name())
+
+
+def has_view_role(user, view_access):
+    """
+    Check if *user* belongs to any role of *view_access* with a single EXISTS
+    query joining the roles through table with the user groups through
+    table.
+
+    :return: True or False.
+    """
+    roles = view_access.roles
+    return roles.through.objects.filter(**{
+        roles.source_field_name: view_access.pk,
+        roles.target_field_name + '__in': get_user_groups_query(user)
+    }).exists()
+
+
+def is_single_query_enabled():
+    return Exists is not None and getattr(
+        settings, 'DJANGO_ROLES_ACCESS_SINGLE_QUERY', False)
+
+
+def get_view_access_single_query(user, view_name):
+    """
+    Decide access of *user* to *view_name* with a single SQL statement: the
+    ViewAccess type is selected together with an EXISTS subquery over the
+    roles through table and the user groups through table. Requires Django
+    1.11 or later.
+
+    :return: True if user have access, False if not, None if there is no
+             ViewAccess object for the view or its type is unknown.
+    """
+    return get_user_id_view_access(
+        user.pk if user.is_authenticated else None, view_name)
+
+
+def get_user_id_view_access(user_id, view_name, verify_user=None):
+    """
+    Same as :func:`get_view_access_single_query` for the authenticated user
+    with *user_id*, or an anonymous user if it is None. The user is not
+    loaded.
+
+    :param verify_user: Function called when access is granted by the roles
+                        of the user. Access is denied if it returns False.
+    """
+    queryset = ViewAccess.objects.filter(view=view_name)
+    if user_id is not None:
+        roles = ViewAccess._meta.get_field('roles')
+        has_role = Exists(roles.remote_field.through.objects.filter(**{
+            roles.m2m_field_name(): OuterRef('pk'),
+            roles.m2m_reverse_field_name() + '__in':
+                get_user_id_groups_query(user_id)
+        }))
+        row = queryset.annotate(has_role=has_role).values_list(
+            'type', 'has_role').first()
+    else:
+        row = queryset.values_list('type').first()
+        if row:
+            row = (row[0], False)
+    if row is None:
+        return None
+    view_type, has_role = row
+    if view_type == ViewAccess.PUBLIC:
+        return True
+    elif view_type == ViewAccess.AUTHORIZED:
+        return user_id is not None
+    elif view_type == ViewAccess.BY_ROLE:
+        return bool(has_role) and (verify_user is None or verify_user())
+    return None
+
+
+def check_view_policy(user, view_policy, registry):
+    """
+    Check access of *user* against a compiled ViewAccess object.
+
+    :param user: Request user.
+    :param view_policy: :class:`django_roles_access.policy.ViewPolicy` with
+                        a role bitmap.
+    :param registry: :class:`django_roles_access.roles.RoleRegistry` of the
+                     role bitmap.
+    :return: True if user have access, False if not, None if the access type
+             is unknown.
+    """
+    if view_policy.type == ViewAccess.PUBLIC:
+        return True
+    elif view_policy.type == ViewAccess.AUTHORIZED:
+        return bool(user.is_authenticated)
+    elif view_policy.type == ViewAccess.BY_ROLE:
+        if user.is_authenticated:
+            return bool(view_policy.roles & get_role_bits(user, registry))
+        return False
+    return None
+
+
+def is_request_authenticated(request):
+    """
+    Check if the user of *request* is authenticated. When
+    *DJANGO_ROLES_ACCESS_SESSION_AUTH* setting is True, it is decided from
+    the session if possible, without loading the user
+    (:mod:`django_roles_access.session`).
+
+    :return: True or False.
+    """
+    if is_session_auth_enabled():
+        authenticated = get_session_authentication(request)
+        if authenticated is not None:
+            return authenticated
+    return bool(request.user.is_authenticated)
+
+
+def has_request_roles(request, roles, registry):
+    """
+    Check if the authenticated user of *request* has any role of *roles*.
+    When *DJANGO_ROLES_ACCESS_ROLE_CLAIMS* setting is True, roles are taken
+    from the signed token of the request (:mod:`django_roles_access.claims`),
+    and a new token is issued when it can not be used. When
+    *DJANGO_ROLES_ACCESS_SESSION_ROLES* setting is True, role ids are taken
+    from the session (:mod:`django_roles_access.session`).
+
+    :param roles: Role bitmap of *registry*, the registry of the view policy
+                  table.
+    :return: True or False.
+    """
+    with_claims = is_role_claims_enabled()
+    if with_claims:
+        bits = get_claims_role_bits(request, registry)
+        if bits is not None:
+            return bool(roles & bits)
+        # Version is read before role ids: if they change meanwhile, the new
+        # token is already outdated and it will not be used.
+        user_id = get_request_user_id(request)
+        version = get_membership_version(user_id)
+    role_ids = None
+    if is_session_roles_enabled():
+        role_ids = get_session_role_ids(request)
+        if role_ids is not None and is_user_loaded(request):
+            # Later checks of the user (check_role) use them too.
+            setattr(request.user, ROLE_IDS_ATTRIBUTE, role_ids)
+    if role_ids is None:
+        bits = get_role_bits(request.user, registry)
+        if with_claims:
+            # Already loaded by get_role_bits.
+            role_ids = get_role_ids(request.user)
+    else:
+        bits = registry.get_bits(role_ids)
+    if with_claims:
+        issue_role_claims(request, user_id, role_ids, registry, version)
+    return bool(roles & bits)
+
+
 def get_setting_dictionary():
     """
     Return django-roles settings variable or None.
@@ -87,23 +331,102 @@ def get_setting_dictionary():
     return settings_dictionary
 
 
+def get_app_types_index():
+    """
+    Return a dictionary application name -> application type, built from
+    :func:`get_setting_dictionary`.
+
+    The dictionary is built once. It is built again after
+    :func:`clear_app_types_index`, called when any of the NOT_SECURED,
+    DISABLED, PUBLIC or SECURED settings change through Django's
+    *setting_changed* signal (see :mod:`django_roles_access.signals`).
+    Settings assigned directly require calling it. If an application is
+    listed in more than one setting, its type is the first of
+    :data:`APP_TYPES`, that is the precedence used to check access.
+    """
+    global _app_types_index
+    if _app_types_index is None:
+        setting_dictionary = get_setting_dictionary()
+        index = {}
+        for app_type in sorted(setting_dictionary, key=_app_type_precedence):
+            for app_name in setting_dictionary[app_type]:
+                index.setdefault(app_name, app_type)
+        _app_types_index = index
+    return _app_types_index
+
+
+def clear_app_types_index():
+    global _app_types_index
+    _app_types_index = None
+
+
+def _app_type_precedence(app_type):
+    if app_type in APP_TYPES:
+        return APP_TYPES.index(app_type)
+    return len(APP_TYPES)
+
+
 def check_access_by_role(request):
     """
     Given a request to access a view the function check if user (logged or
     not) can access required view.
 
+    The decision is kept in the request, so when RolesMiddleware and
+    access_by_role decorator or RolesMixin are used for the same view, access
+    is evaluated once.
+
     :param request: :class:`django.http.HttpRequest`
     :return: True if can access the view. False in other case.
     """
-    current_url = resolve(request.path_info)
-    app_name = current_url.app_name
-    setting_dictionary = get_setting_dictionary()
+    resolver_match = get_resolver_match(request)
+    access = get_access_decision(request, resolver_match)
+    if access is None:
+        access = evaluate_access_by_role(request, resolver_match)
+        setattr(request, ACCESS_DECISION_ATTRIBUTE, (resolver_match, access))
+    return access
+
+
+def get_access_decision(request, resolver_match):
+    """
+    Return the decision kept in the request by check_access_by_role for
+    *resolver_match*, or None if access to the view was not checked yet.
+    """
+    decision = request.__dict__.get(ACCESS_DECISION_ATTRIBUTE)
+    if decision is not None and decision[0] is resolver_match:
+        return decision[1]
+    return None
+
+
+def evaluate_access_by_role(request, resolver_match):
+    """
+    Check if user can access the view of *resolver_match*. Called by
+    check_access_by_role when access was not checked yet.
+
+    When *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is True, the rules below
+    are applied with the compiled recipe of the view
+    (:mod:`django_roles_access.recipe`).
+    """
+    if is_policy_cache_enabled():
+        recipe = get_recipe(resolver_match.app_name, resolver_match.view_name,
+                            get_app_types_index(),
+                            get_view_policies(
+                                get_request_policy_version(request)),
+                            resolver_match.func)
+        if recipe is True or recipe is False:
+            return recipe
+        if not is_request_authenticated(request):
+            return False
+        if recipe is AUTHENTICATED:
+            return True
+        return has_request_roles(request, recipe.roles, recipe.registry)
+
+    app_type = get_app_type(resolver_match.app_name)
 
     # NOT_SECURED applications are ignored
-    if app_name in setting_dictionary['NOT_SECURED']:
+    if app_type == 'NOT_SECURED':
         return True
     # DISABLED applications are denied
-    if app_name in setting_dictionary['DISABLED']:
+    if app_type == 'DISABLED':
         return False
     # If view has an access configuration, this takes precedence over
     # the classification of the application
@@ -111,19 +434,79 @@ def check_access_by_role(request):
     if view_access is not None:
         return view_access
     # Check for public applications
-    if app_name in setting_dictionary['PUBLIC']:
+    if app_type == 'PUBLIC':
         return True
-    if app_name in setting_dictionary['SECURED']:
-        if not request.user.is_authenticated:
-            return False
+    if app_type == 'SECURED':
+        return is_request_authenticated(request)
     return True
 
 
 def get_app_type(app_name):
-    for key, val in get_setting_dictionary().items():
-        if app_name in val:
-            return key
-    return None
+    return get_app_types_index().get(app_name)
+
+
+def get_view_app_name(view_name, resolver=None):
+    """
+    Return the application name of *view_name* as
+    :class:`django.urls.ResolverMatch` *app_name* would be for a request to
+    the view: application names of the namespaces of *view_name* joined by
+    ':'. Namespaces are looked up as :func:`django.urls.reverse` does.
+
+    :return: Application name or None if the view has no namespace or it is
+             not found.
+    """
+    if resolver is None:
+        resolver = get_resolver(get_urlconf())
+    app_names = []
+    for namespace in view_name.split(':')[:-1]:
+        if namespace not in resolver.namespace_dict:
+            # Application namespace: default instance.
+            instances = resolver.app_dict.get(namespace)
+            if not instances:
+                return None
+            if namespace not in instances:
+                namespace = instances[0]
+        resolver = resolver.namespace_dict[namespace][1]
+        if resolver.app_name:
+            app_names.append(resolver.app_name)
+    return ':'.join(app_names) or None
+
+
+def can_access_many(user, view_names):
+    """
+    Check if *user* can access each view of *view_names*, as
+    :func:`check_access_by_role` would for requests to them, without
+    requests. Useful to build menus.
+
+    ViewAccess objects of all views are loaded with one query, or taken from
+    the policy table when *DJANGO_ROLES_ACCESS_POLICY_CACHE* setting is
+    True, and the roles of *user* are loaded at most once.
+
+    :param user: A user, authenticated or anonymous.
+    :param view_names: Iterable of view names with their namespaces, as used
+                       by ViewAccess objects.
+    :return: Dictionary view name -> True or False.
+    """
+    view_names = list(view_names)
+    app_types_index = get_app_types_index()
+    resolver = get_resolver(get_urlconf())
+    policy_cache = is_policy_cache_enabled()
+    if policy_cache:
+        view_policies = get_view_policies()
+    else:
+        view_policies = compile_view_policies(load_view_policies(view_names))
+    result = {}
+    for view_name in view_names:
+        app_name = get_view_app_name(view_name, resolver)
+        if policy_cache:
+            recipe = get_recipe(app_name, view_name, app_types_index,
+                                view_policies)
+        else:
+            recipe = compile_recipe(app_types_index.get(app_name),
+                                    view_policies.get(view_name),
+                                    view_policies.registry)
+        result[view_name] = apply_recipe(recipe, user)
+    return result
 
 
 def get_forbidden_message():
@@ -1,6 +1,9 @@
 """
 Code used by checkviewaccess management _output
 """
+import multiprocessing
+import os
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -10,6 +13,7 @@ except:
     from django.utils.translation import ugettext as _
 
 from django_roles_access.models import ViewAccess
+from django_roles_access.tools import get_app_type
 
 User = get_user_model()
 APP_NAME_FOR_NONE = _(u'Undefined app')
@@ -38,7 +42,17 @@ NONE_TYPE_DEFAULT = _(u'ERROR: Django roles access middleware is active; or '
 
 def walk_site_url(_url_patterns, recursive_url='',
                   view_name=None, app_name=None):
-    result = []
+    return list(iter_site_url(_url_patterns, recursive_url, view_name,
+                              app_name))
+
+
+def iter_site_url(_url_patterns, recursive_url='',
+                  view_name=None, app_name=None):
+    """
+    Generator version of :func:`walk_site_url`. Each URL is yielded as a
+    tuple (url, callback, view name, app name) once it is found, so no list
+    is built for each included URLConf.
+    """
     for url in _url_patterns:
         if hasattr(url, 'pattern'):
             # Running With Django 2
@@ -56,18 +70,17 @@ def walk_site_url(_url_patterns, recursive_url='',
                     new_view_name = url.namespace
             else:
                 new_view_name = None
-            result.extend(walk_site_url(url.url_patterns,
-                                        recursive_url + pattern,
-                                        new_view_name, url.app_name))
+            for site_url in iter_site_url(url.url_patterns,
+                                          recursive_url + pattern,
+                                          new_view_name, url.app_name):
+                yield site_url
         else:
             if view_name:
                 new_view_name = view_name + ":" + url.name
             else:
                 new_view_name = url.name
-            result.append((recursive_url + pattern, url.callback,
-                           new_view_name, app_name))
-
-    return result
+            yield (recursive_url + pattern, url.callback, new_view_name,
+                   app_name)
 
 
 def get_views_by_app(site_urls):
@@ -109,7 +122,19 @@ def check_django_roles_is_used(view):
     return False
 
 
+def get_view_accesses():
+    """
+    Load all ViewAccess objects with their roles in two queries.
+
+    :return: Dictionary view name -> ViewAccess object, as needed by
+             :func:`view_access_analyzer`.
+    """
+    return {view_access.view: view_access for view_access in
+            ViewAccess.objects.prefetch_related('roles')}
+
+
 def analyze_by_role(view_access):
+    # With prefetched roles, count and all do not query the database.
     result = u''
     if view_access.type == 'br':
         if view_access.roles.count() != 0:
@@ -122,12 +147,21 @@ def analyze_by_role(view_access):
     return result
 
 
-def view_access_analyzer(app_type, callback, view_name, site_active):
+def view_access_analyzer(app_type, callback, view_name, site_active,
+                         view_accesses=None):
+    """
+    :param view_accesses: Dictionary view name -> ViewAccess object, as
+                          returned by :func:`get_view_accesses`. If it is not
+                          given, the ViewAccess object of the view is queried.
+    """
     result = _(u'No Django roles access tool used. Access to view depends on '
                u'its implementation.')
     if app_type in ['NOT_SECURED', 'DISABLED']:
         return get_view_analyze_report(app_type)
-    view_access = ViewAccess.objects.filter(view=view_name).first()
+    if view_accesses is None:
+        view_access = ViewAccess.objects.filter(view=view_name).first()
+    else:
+        view_access = view_accesses.get(view_name)
     if site_active:
         if view_access:
             view_access_type = dict(ViewAccess.ACCESS_TYPES)[view_access.type]
@@ -153,6 +187,64 @@ def view_access_analyzer(app_type, callback, view_name, site_active):
     return result
 
 
+# Tuple (views by app, view accesses, site active) analyzed by worker
+# processes. It is inherited when workers are forked, so callbacks and
+# ViewAccess objects are never pickled.
+_analysis = None
+
+
+def get_fork_context():
+    """
+    :return: Multiprocessing context starting processes with fork, or None if
+             the platform can not fork.
+    """
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2 always forks on POSIX systems.
+        return multiprocessing if os.name == 'posix' else None
+    except ValueError:
+        return None
+
+
+def analyze_application(app_name):
+    """
+    Analyze the views of *app_name* in a worker process. No query is done:
+    ViewAccess objects were loaded with :func:`get_view_accesses`.
+
+    :return: Tuple (application type, list with the analysis of each view).
+    """
+    views_by_app, view_accesses, site_active = _analysis
+    app_type = get_app_type(app_name)
+    return app_type, [view_access_analyzer(app_type, callback, view_name,
+                                           site_active, view_accesses)
+                      for url, callback, view_name in views_by_app[app_name]]
+
+
+def analyze_views_by_app(views_by_app, view_accesses, site_active, jobs):
+    """
+    Analyze applications of *views_by_app* with a pool of *jobs* forked
+    processes (see :func:`get_fork_context`).
+
+    :return: Iterator of tuples (app name, app type, list with the analysis
+             of each view), in the order of *views_by_app* whatever the
+             order in which workers finish.
+    """
+    global _analysis
+    _analysis = (views_by_app, view_accesses, site_active)
+    pool = get_fork_context().Pool(jobs)
+    try:
+        app_names = list(views_by_app)
+        for app_name, (app_type, analyses) in zip(
+                app_names, pool.imap(analyze_application, app_names)):
+            yield app_name, app_type, analyses
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+        _analysis = None
+
+
 class OutputReport(object):
 
     HEADER = _(u'Start checking views access.\nStart gathering information.')
@@ -166,13 +258,31 @@ class OutputReport(object):
         self.stdout = stdout
         self.style = style
         self._format = 'console'
-        self._row = u''
+        # CSV row is kept as a list of parts and joined once when written.
+        self._row_parts = []
+
+    @property
+    def _row(self):
+        return u''.join(self._row_parts)
+
+    @_row.setter
+    def _row(self, value):
+        self._row_parts = [value] if value else []
 
     def set_format(self, _format):
         self._format = _format
 
     def add_to_row(self, data):
-        self._row += data
+        self._row_parts.append(data)
+
+    def flush(self):
+        """
+        Flush written text, if the output stream supports it, so a report
+        redirected to a file or a pipe can be followed while it is built.
+        """
+        flush = getattr(self.stdout, 'flush', None)
+        if flush is not None:
+            flush()
 
     def write(self, text):
         self.stdout.write(self.style.SUCCESS(text))
@@ -228,21 +338,21 @@ class OutputReport(object):
             else:
                 self.write('\t\t' + text)
         elif self._format == self.CSV:
-            _row = self._row.split(',')
             if 'ERROR:' in text:
                 self.add_to_row(u'Error,{}\n'.format(text.split('ERROR: ')[1]))
-                _output = self.style.ERROR(self._row)
+                style = self.style.ERROR
             elif 'WARNING:' in text:
                 self.add_to_row(u'Warning,{}\n'.format(
                     text.split('WARNING: ')[1]))
-                _output = self.style.WARNING(self._row)
+                style = self.style.WARNING
             else:
                 self.add_to_row(u'Normal,{}\n'.format(text))
-                _output = self.style.SUCCESS(self._row)
-            self.stdout.write(_output)
+                style = self.style.SUCCESS
+            row = self._row
+            self.stdout.write(style(row))
             # Delete view information to start cycle again.
             # only app_name and app_type are left.
-            self._row = _row[0] + ',' + _row[1] + ','
+            self._row = u','.join(row.split(',', 2)[:2]) + ','
 
     def close_application_data(self, app_name):
         if self._format == self.CONSOLE:
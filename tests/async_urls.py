@@ -0,0 +1,15 @@
+from django.urls import include, path
+
+from . import async_views
+
+app_patterns = [
+    path('view/', async_views.async_view, name='async_view'),
+    path('protected/', async_views.async_protected_view,
+         name='async_protected_view'),
+    path('mixin/', async_views.AsyncMixinView.as_view(),
+         name='async_mixin_view'),
+]
+
+urlpatterns = [
+    path('async/', include((app_patterns, 'async-app'))),
+]
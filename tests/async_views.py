@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from django.views import View
+
+from django_roles_access.decorator import access_by_role
+from django_roles_access.mixin import RolesMixin
+
+
+async def async_view(request):
+    return HttpResponse('async view')
+
+
+@access_by_role
+async def async_protected_view(request):
+    return HttpResponse('async protected view')
+
+
+class AsyncMixinView(RolesMixin, View):
+
+    async def get(self, request, *args, **kwargs):
+        return HttpResponse('async mixin view')
@@ -0,0 +1,291 @@
+import asyncio
+import unittest
+
+import django
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user, get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
+try:
+    from unittest.mock import Mock, patch
+except:
+    from mock import Mock, patch
+
+from django_roles_access.models import ViewAccess
+from django_roles_access.policy import (POLICY_VERSION_ATTRIBUTE,
+                                        clear_policies, get_policy_version,
+                                        get_view_policies)
+from django_roles_access.recipe import clear_recipes
+from django_roles_access.session import is_user_loaded
+from django_roles_access.tools import clear_app_types_index
+
+User = get_user_model()
+
+ASYNC = django.VERSION >= (3, 1)
+
+if ASYNC:
+    from asgiref.sync import async_to_sync
+
+    from django_roles_access.aio import acheck_access_by_role
+    from django_roles_access.decorator import access_by_role
+    from django_roles_access.middleware import RolesMiddleware
+    from tests.async_views import AsyncMixinView, async_protected_view
+
+ROLES_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django_roles_access.middleware.RolesMiddleware',
+]
+
+
+@unittest.skipUnless(ASYNC, 'Asynchronous views need Django 3.1+')
+class UnitTestAcheckAccessByRole(unittest.TestCase):
+
+    def setUp(self):
+        self.request = Mock()
+        self.request.resolver_match.app_name = 'fake-app'
+
+    @patch('django_roles_access.aio.check_access_by_role')
+    @patch('django_roles_access.aio.get_app_type')
+    def test_not_secured_is_decided_in_event_loop(
+            self, mock_get_app_type, mock_check_access_by_role
+    ):
+        mock_get_app_type.return_value = 'NOT_SECURED'
+        self.assertTrue(async_to_sync(acheck_access_by_role)(self.request))
+        mock_check_access_by_role.assert_not_called()
+
+    @patch('django_roles_access.aio.check_access_by_role')
+    @patch('django_roles_access.aio.get_app_type')
+    def test_disabled_is_decided_in_event_loop(
+            self, mock_get_app_type, mock_check_access_by_role
+    ):
+        mock_get_app_type.return_value = 'DISABLED'
+        self.assertFalse(async_to_sync(acheck_access_by_role)(self.request))
+        mock_check_access_by_role.assert_not_called()
+
+    @patch('django_roles_access.aio.check_access_by_role')
+    @patch('django_roles_access.aio.get_app_type')
+    def test_other_types_use_check_access_by_role(
+            self, mock_get_app_type, mock_check_access_by_role
+    ):
+        mock_get_app_type.return_value = 'SECURED'
+        mock_check_access_by_role.return_value = False
+        self.assertFalse(async_to_sync(acheck_access_by_role)(self.request))
+        mock_check_access_by_role.assert_called_once_with(self.request)
+
+
+@unittest.skipUnless(ASYNC, 'Asynchronous views need Django 3.1+')
+class UnitTestAsyncAccessByRole(unittest.TestCase):
+
+    def test_coroutine_view_is_decorated_with_coroutine(self):
+        self.assertTrue(asyncio.iscoroutinefunction(async_protected_view))
+        self.assertIs(async_protected_view.access_by_role, True)
+
+    def test_sync_view_is_decorated_with_function(self):
+        @access_by_role
+        def view(request):
+            pass
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+    @patch('django_roles_access.aio.acheck_access_by_role')
+    def test_access_is_denied(self, mock_acheck_access_by_role):
+        async def acheck(request):
+            return False
+        mock_acheck_access_by_role.side_effect = acheck
+        response = async_to_sync(async_protected_view)(Mock())
+        self.assertEqual(response.status_code, 403)
+
+    @patch('django_roles_access.aio.acheck_access_by_role')
+    def test_access_is_granted(self, mock_acheck_access_by_role):
+        async def acheck(request):
+            return True
+        mock_acheck_access_by_role.side_effect = acheck
+        response = async_to_sync(async_protected_view)(Mock())
+        self.assertEqual(response.content, b'async protected view')
+
+    def test_mixin_dispatch_keeps_attribute(self):
+        self.assertIs(AsyncMixinView.as_view().access_by_role, True)
+
+
+@unittest.skipUnless(ASYNC, 'Asynchronous views need Django 3.1+')
+class UnitTestAsyncMiddleware(unittest.TestCase):
+
+    def test_sync_get_response(self):
+        middleware = RolesMiddleware(Mock(return_value=HttpResponse()))
+        self.assertFalse(asyncio.iscoroutinefunction(middleware))
+        self.assertFalse(asyncio.iscoroutinefunction(middleware.process_view))
+
+    def test_async_get_response(self):
+        async def get_response(request):
+            return HttpResponse()
+        middleware = RolesMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertTrue(asyncio.iscoroutinefunction(middleware.process_view))
+        response = async_to_sync(middleware)(Mock())
+        self.assertIs(response.django_roles, True)
+
+
+@unittest.skipUnless(ASYNC, 'Asynchronous views need Django 3.1+')
+@override_settings(ROOT_URLCONF='tests.async_urls')
+class TestIntegratedAsync(TestCase):
+
+    def setUp(self):
+        settings.__setattr__('SECURED', ['async-app'])
+        clear_app_types_index()
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.async_client.force_login(self.u1)
+
+    def tearDown(self):
+        settings.__delattr__('SECURED')
+        clear_app_types_index()
+
+    def get(self, path):
+        async def get():
+            return await self.async_client.get(path)
+        return async_to_sync(get)()
+
+    def add_view_access(self, view):
+        view_access = ViewAccess.objects.create(view=view, type='br')
+        view_access.roles.add(self.g1)
+
+    def test_decorated_coroutine_view_denied(self):
+        self.add_view_access('async-app:async_protected_view')
+        response = self.get('/async/protected/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_decorated_coroutine_view_granted(self):
+        self.u1.groups.add(self.g1)
+        self.add_view_access('async-app:async_protected_view')
+        response = self.get('/async/protected/')
+        self.assertEqual(response.content, b'async protected view')
+
+    @unittest.skipUnless(django.VERSION >= (4, 1),
+                         'Asynchronous class based views need Django 4.1+')
+    def test_async_mixin_view_denied(self):
+        self.add_view_access('async-app:async_mixin_view')
+        response = self.get('/async/mixin/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(MIDDLEWARE=ROLES_MIDDLEWARE)
+    def test_middleware_denied(self):
+        self.add_view_access('async-app:async_view')
+        response = self.get('/async/view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(MIDDLEWARE=ROLES_MIDDLEWARE)
+    def test_middleware_granted(self):
+        self.u1.groups.add(self.g1)
+        self.add_view_access('async-app:async_view')
+        response = self.get('/async/view/')
+        self.assertEqual(response.content, b'async view')
+        self.assertIs(response.django_roles, True)
+
+    @override_settings(MIDDLEWARE=ROLES_MIDDLEWARE,
+                       DJANGO_ROLES_ACCESS_EXEMPT_PATH_PREFIXES=['/async/'])
+    def test_middleware_exempt_path(self):
+        self.add_view_access('async-app:async_view')
+        response = self.get('/async/view/')
+        self.assertEqual(response.content, b'async view')
+
+
+@unittest.skipUnless(ASYNC, 'Asynchronous views need Django 3.1+')
+@override_settings(ROOT_URLCONF='tests.async_urls',
+                   DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                   SECURED=['async-app'])
+class TestAcheckAccessByRoleWithRecipes(TestCase):
+
+    def setUp(self):
+        clear_policies()
+        clear_recipes()
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.client.force_login(self.u1)
+
+    def tearDown(self):
+        clear_policies()
+        clear_recipes()
+
+    def get_request(self, path='/async/view/', user=None):
+        request = RequestFactory().get(path)
+        request.resolver_match = resolve(path)
+        request.session = self.client.session
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        if user is not None:
+            request.user = user
+        return request
+
+    def check(self, request):
+        # Policy table is loaded for current version.
+        get_view_policies()
+        with patch('django_roles_access.aio.check_access_by_role') as mock:
+            mock.return_value = 'fake-access'
+            return async_to_sync(acheck_access_by_role)(request), mock.called
+
+    def test_public_view_is_decided_in_event_loop(self):
+        ViewAccess.objects.create(view='async-app:async_view', type='pu')
+        self.assertEqual(self.check(self.get_request()), (True, False))
+
+    @override_settings(DISABLED=['async-app'])
+    def test_disabled_application_is_decided_in_event_loop(self):
+        self.assertEqual(self.check(self.get_request()), (False, False))
+
+    def test_loaded_user_is_decided_in_event_loop(self):
+        request = self.get_request(user=self.u1)
+        self.assertEqual(self.check(request), (True, False))
+        request = self.get_request(user=AnonymousUser())
+        self.assertEqual(self.check(request), (False, False))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_loaded_session_is_decided_in_event_loop(self):
+        request = self.get_request()
+        request.session.get(SESSION_KEY)
+        self.assertEqual(self.check(request), (True, False))
+        self.assertFalse(is_user_loaded(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_session_not_loaded_is_checked_in_thread(self):
+        self.assertEqual(self.check(self.get_request()),
+                         ('fake-access', True))
+
+    def test_roles_are_checked_in_thread(self):
+        view_access = ViewAccess.objects.create(view='async-app:async_view',
+                                                type='br')
+        view_access.roles.add(self.g1)
+        request = self.get_request(user=self.u1)
+        self.assertEqual(self.check(request), ('fake-access', True))
+
+    def test_policy_version_is_not_read_in_event_loop(self):
+        ViewAccess.objects.create(view='async-app:async_view', type='pu')
+        get = LocMemCache.get
+        event_loop_reads = []
+
+        def fake_get(cache, *args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                event_loop_reads.append(args)
+            except RuntimeError:
+                pass
+            return get(cache, *args, **kwargs)
+
+        with patch.object(LocMemCache, 'get', fake_get):
+            self.assertEqual(self.check(self.get_request()), (True, False))
+        self.assertEqual(event_loop_reads, [])
+
+    def test_policy_version_is_kept_in_request(self):
+        ViewAccess.objects.create(view='async-app:async_view', type='pu')
+        request = self.get_request()
+        self.assertEqual(self.check(request), (True, False))
+        self.assertEqual(getattr(request, POLICY_VERSION_ATTRIBUTE),
+                         get_policy_version())
+
+    def test_policy_table_not_loaded_is_checked_in_thread(self):
+        request = self.get_request(user=self.u1)
+        with patch('django_roles_access.aio.check_access_by_role') as mock:
+            mock.return_value = 'fake-access'
+            self.assertEqual(async_to_sync(acheck_access_by_role)(request),
+                             'fake-access')
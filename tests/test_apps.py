@@ -12,3 +12,7 @@ class ReportsConfigTest(TestCase):
         # Test the app
         self.assertEqual(apps.get_app_config('django_roles_access').name,
                          'django_roles_access')
+
+    def test_app_config_is_used(self):
+        self.assertIsInstance(apps.get_app_config('django_roles_access'),
+                              RolesConfig)
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase, override_settings
+
+from django_roles_access.checks import check_policy_cache
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+DUMMY = 'django.core.cache.backends.dummy.DummyCache'
+DATABASE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+class TestCheckPolicyCache(SimpleTestCase):
+
+    @override_settings(CACHES={'default': {'BACKEND': LOCMEM}})
+    def test_no_warning_without_policy_cache(self):
+        self.assertEqual(check_policy_cache(None), [])
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       CACHES={'default': {'BACKEND': LOCMEM}})
+    def test_warning_with_local_memory_cache(self):
+        warnings = check_policy_cache(None)
+        self.assertEqual([warning.id for warning in warnings],
+                         ['django_roles_access.W001'])
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       CACHES={'default': {'BACKEND': DUMMY}})
+    def test_warning_with_dummy_cache(self):
+        self.assertEqual(len(check_policy_cache(None)), 1)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       DJANGO_ROLES_ACCESS_CACHE_ALIAS='shared',
+                       CACHES={'default': {'BACKEND': LOCMEM},
+                               'shared': {'BACKEND': DATABASE,
+                                          'LOCATION': 'cache_table'}})
+    def test_no_warning_with_shared_cache(self):
+        self.assertEqual(check_policy_cache(None), [])
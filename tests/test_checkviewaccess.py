@@ -1,3 +1,7 @@
+import os
+import shutil
+import tempfile
+
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.utils import timezone
@@ -7,6 +11,7 @@ except:
     from io import StringIO
 
 from django_roles_access.models import ViewAccess
+from django_roles_access.tools import clear_app_types_index
 
 try:
     from unittest.mock import Mock, patch, MagicMock, ANY, PropertyMock
@@ -20,6 +25,8 @@ from django_roles_access.utils import (NONE_TYPE_DEFAULT, NOT_SECURED_DEFAULT,
                                        APP_NAME_FOR_NONE, DISABLED_DEFAULT)
 
 
+@patch('django_roles_access.management.commands.checkviewaccess'
+       '.get_view_accesses', Mock(return_value={}))
 @patch('django_roles_access.management.commands.checkviewaccess.import_module')
 @patch('django_roles_access.management.commands.checkviewaccess.settings')
 class UnitTestCheckViewAccessCommon(UnitTestCase):
@@ -92,34 +99,34 @@ class UnitTestCheckViewAccessCommon(UnitTestCase):
         call_command('checkviewaccess')
         mock_import_module.assert_called_once_with(self.root_urlconf)
 
-    @patch('django_roles_access.management.commands.checkviewaccess.walk_site_url')
-    def test_walk_site_url_is_called(
-            self, mock_walk_site_url, mock_settings, mock_import_module,
+    @patch('django_roles_access.management.commands.checkviewaccess.iter_site_url')
+    def test_iter_site_url_is_called(
+            self, mock_iter_site_url, mock_settings, mock_import_module,
 
     ):
         mock_import_module.urlpatterns = 'fake-url-pattern'
         call_command('checkviewaccess')
-        assert mock_walk_site_url.called
+        assert mock_iter_site_url.called
 
-    @patch('django_roles_access.management.commands.checkviewaccess.walk_site_url')
-    def test_walk_site_url_is_called_once(
-            self, mock_walk_site_url, mock_settings, mock_import_module,
+    @patch('django_roles_access.management.commands.checkviewaccess.iter_site_url')
+    def test_iter_site_url_is_called_once(
+            self, mock_iter_site_url, mock_settings, mock_import_module,
 
     ):
         mock_import_module.urlpatterns = 'fake-url-pattern'
         call_command('checkviewaccess')
-        self.assertEqual(mock_walk_site_url.call_count, 1)
+        self.assertEqual(mock_iter_site_url.call_count, 1)
 
-    @patch('django_roles_access.management.commands.checkviewaccess.walk_site_url')
-    def test_walk_site_url_is_called_once_with(
-            self, mock_walk_site_url, mock_settings, mock_import_module,
+    @patch('django_roles_access.management.commands.checkviewaccess.iter_site_url')
+    def test_iter_site_url_is_called_once_with(
+            self, mock_iter_site_url, mock_settings, mock_import_module,
 
     ):
         urlpatterns = Mock()
         urlpatterns.urlpatterns = 'fake-urlpatterns'
         mock_import_module.return_value = urlpatterns
         call_command('checkviewaccess')
-        mock_walk_site_url.assert_called_once_with('fake-urlpatterns')
+        mock_iter_site_url.assert_called_once_with('fake-urlpatterns')
 
     @patch('django_roles_access.management.commands.checkviewaccess.get_views_by_app')
     def test_get_views_by_app_is_called(
@@ -139,14 +146,14 @@ class UnitTestCheckViewAccessCommon(UnitTestCase):
         call_command('checkviewaccess')
         self.assertEqual(mock_get_views_by_app.call_count, 1)
 
-    @patch('django_roles_access.management.commands.checkviewaccess.walk_site_url')
+    @patch('django_roles_access.management.commands.checkviewaccess.iter_site_url')
     @patch('django_roles_access.management.commands.checkviewaccess.get_views_by_app')
     def test_get_views_by_app_is_called_once_with(
-            self, mock_get_views_by_app, mock_walk_site_url, mock_settings,
+            self, mock_get_views_by_app, mock_iter_site_url, mock_settings,
             mock_import_module,
     ):
         mock_settings.ROOT_URLCONF = self.root_urlconf
-        mock_walk_site_url.return_value = 'fake-result'
+        mock_iter_site_url.return_value = 'fake-result'
         call_command('checkviewaccess')
         mock_get_views_by_app.assert_called_once_with('fake-result')
 
@@ -239,12 +246,18 @@ class UnitTestCheckViewAccessCommon(UnitTestCase):
         mock_write_footer.assert_called_once_with()
 
 
+@patch('django_roles_access.management.commands.checkviewaccess'
+       '.get_view_accesses', Mock(return_value={}))
 @patch('django_roles_access.management.commands.checkviewaccess.import_module')
 @patch('django_roles_access.management.commands.checkviewaccess.settings')
 class UnitTestCheckViewAccessWithoutArguments(UnitTestCase):
 
     def setUp(self):
         self.root_urlconf = Mock()
+        clear_app_types_index()
+
+    def tearDown(self):
+        clear_app_types_index()
 
     @patch('django_roles_access.management.commands.checkviewaccess'
            '.OutputReport.set_format')
@@ -499,7 +512,8 @@ class UnitTestCheckViewAccessWithoutArguments(UnitTestCase):
         call_command('checkviewaccess')
         mock_view_access_analyzer.assert_called_with('fake-app-type',
                                                      'fake-callback-1',
-                                                     'fake-view-1', False)
+                                                     'fake-view-1', False,
+                                                     {})
 
     @patch('django_roles_access.management.commands.checkviewaccess.get_views_by_app')
     @patch('django_roles_access.management.commands.checkviewaccess.'
@@ -571,6 +585,8 @@ class UnitTestCheckViewAccessWithoutArguments(UnitTestCase):
         mock_write_report.assert_called_once_with(u'fake-analysis')
 
 
+@patch('django_roles_access.management.commands.checkviewaccess'
+       '.get_view_accesses', Mock(return_value={}))
 @patch('django_roles_access.management.commands.checkviewaccess.import_module')
 @patch('django_roles_access.management.commands.checkviewaccess.settings')
 class UnitTestCheckViewAccessCSVOutput(UnitTestCase):
@@ -661,7 +677,8 @@ class UnitTestCheckViewAccessCSVOutput(UnitTestCase):
         Normal case: There is app name, it has a type, there is also a view
         name.
         """
-        def view_analyze(app_type, callback, view_name, site_active):
+        def view_analyze(app_type, callback, view_name, site_active,
+                         view_accesses):
             if view_name is None:
                 return None
             if view_name == 'fake-view-1':
@@ -764,14 +781,17 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         # Clean up
         try:
             settings.__delattr__('NOT_SECURED')
+            clear_app_types_index()
         except:
             pass
         try:
             settings.__delattr__('PUBLIC')
+            clear_app_types_index()
         except:
             pass
         try:
             settings.__delattr__('SECURED')
+            clear_app_types_index()
         except:
             pass
 
@@ -818,6 +838,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
 
     def test_no_django_roles_used_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -827,6 +848,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -843,6 +865,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
 
     def test_decorator_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is NOT_SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -851,11 +874,13 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_DISABLED(self):
         settings.__setattr__('DISABLED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is DISABLED type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -864,11 +889,13 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('DISABLED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -877,11 +904,13 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is PUBLIC type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -890,6 +919,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -908,6 +938,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
 
     def test_decorator_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -918,6 +949,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -934,6 +966,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
 
     def test_mixin_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is NOT_SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:mixin_class_view\n'
@@ -942,11 +975,13 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
     def test_mixin_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:mixin_class_view\n'
@@ -955,11 +990,13 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
     def test_mixin_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is PUBLIC type.'
         expected_2 = u'Analysis for view: app-ns2:mixin_class_view\n'
@@ -968,6 +1005,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -986,6 +1024,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
 
     def test_mixin_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:view_protected_by_role\n'
@@ -996,6 +1035,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1018,6 +1058,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is NOT_SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1026,6 +1067,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1034,6 +1076,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1042,6 +1085,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1050,6 +1094,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is PUBLIC type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1058,6 +1103,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1082,6 +1128,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is NOT_SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1093,6 +1140,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1101,6 +1149,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is SECURED type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1118,6 +1167,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1126,6 +1176,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
     })
     def test_site_active_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected_1 = u'\n\tAnalyzing: django_roles_access'
         expected_1 += u'\n\t\tdjango_roles_access is PUBLIC type.'
         expected_2 = u'Analysis for view: app-ns2:middleware_view_func\n'
@@ -1136,6 +1187,7 @@ class IntegratedTestCheckViewAccessWithoutArgument(TestCase):
         out = StringIO()
         call_command('checkviewaccess', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected_1, out.getvalue())
         self.assertIn(expected_2, out.getvalue())
 
@@ -1171,14 +1223,17 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         # Clean up
         try:
             settings.__delattr__('NOT_SECURED')
+            clear_app_types_index()
         except:
             pass
         try:
             settings.__delattr__('PUBLIC')
+            clear_app_types_index()
         except:
             pass
         try:
             settings.__delattr__('SECURED')
+            clear_app_types_index()
         except:
             pass
         # self.header = u'Reported: {}\n'.format(timezone.now())
@@ -1205,6 +1260,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
 
     def test_no_django_roles_used_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Normal,'
         expected += u'No Django roles access tool used. Access to '
@@ -1212,6 +1268,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_None(self):
@@ -1224,30 +1281,36 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
 
     def test_decorator_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,NOT_SECURED,app-ns2:view_protected_by_role,'
         expected += u'role-included2/view_by_role/,Warning'
         expected += u',' + NOT_SECURED_DEFAULT.split('WARNING: ')[1]
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:view_protected_by_role,'
         expected += u'role-included2/view_by_role/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_decorator_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,PUBLIC,app-ns2:view_protected_by_role,'
         expected += u'role-included2/view_by_role/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_decorator_view_access_object_app_type_None(self):
@@ -1262,6 +1325,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
 
     def test_decorator_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:view_protected_by_role,'
         expected += u'role-included2/view_by_role/,Normal,'
         expected += u'View access is of type Public.'
@@ -1270,6 +1334,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_mixin_no_view_access_object_app_type_None(self):
@@ -1282,30 +1347,36 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
 
     def test_mixin_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,NOT_SECURED,app-ns2:mixin_class_view,'
         expected += u'role-included2/mixin_class_view/,Warning'
         expected += u',' + NOT_SECURED_DEFAULT.split('WARNING: ')[1]
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_mixin_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:mixin_class_view,'
         expected += u'role-included2/mixin_class_view/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_mixin_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,PUBLIC,app-ns2:mixin_class_view,'
         expected += u'role-included2/mixin_class_view/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     def test_mixin_view_access_object_app_type_None(self):
@@ -1320,6 +1391,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
 
     def test_mixin_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:view_protected_by_role,'
         expected += u'role-included2/view_by_role/,Normal,'
         expected += u'View access is of type Public.'
@@ -1328,6 +1400,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1346,12 +1419,14 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,NOT_SECURED,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Warning'
         expected += u',' + NOT_SECURED_DEFAULT.split('WARNING: ')[1]
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1359,11 +1434,13 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1371,11 +1448,13 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_no_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,PUBLIC,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Normal,'
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1396,6 +1475,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_view_access_object_app_type_NOT_SECURED(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,NOT_SECURED,'
         expected += u'app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Warning,'
@@ -1406,6 +1486,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1413,6 +1494,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_view_access_object_app_type_SECURED(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,SECURED,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Normal,'
         expected += u'View access is of type By role.'
@@ -1428,6 +1510,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
 
     @modify_settings(MIDDLEWARE={
@@ -1435,6 +1518,7 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
     })
     def test_site_active_view_access_object_app_type_PUBLIC(self):
         settings.__setattr__('PUBLIC', ['django_roles_access'])
+        clear_app_types_index()
         expected = u'django_roles_access,PUBLIC,app-ns2:middleware_view_func,'
         expected += u'role-included2/middleware_view_func/,Normal,'
         expected += u'View access is of type Authorized.'
@@ -1443,4 +1527,60 @@ class IntegratedTestCheckViewAccessOutputCSVFormat(TestCase):
         out = StringIO()
         call_command('checkviewaccess', '--output-format', 'csv', stdout=out)
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertIn(expected, out.getvalue())
+
+    def test_report_is_done_with_constant_number_of_queries(self):
+        role_1, created = Group.objects.get_or_create(name='role-1')
+        for view in ('app-ns2:middleware_view_func',
+                     'django_roles_access:middleware_view_class',
+                     'direct_access_view'):
+            view_access = ViewAccess.objects.create(view=view, type='br')
+            view_access.roles.add(role_1)
+        out = StringIO()
+        with self.assertNumQueries(2):
+            call_command('checkviewaccess', '--output-format', 'csv',
+                         stdout=out)
+        self.assertIn(u'Roles with access: role-1', out.getvalue())
+
+    def test_report_with_jobs_is_the_same(self):
+        role_1, created = Group.objects.get_or_create(name='role-1')
+        view_access = ViewAccess.objects.create(
+            view='app-ns2:middleware_view_func', type='br')
+        view_access.roles.add(role_1)
+        out = StringIO()
+        call_command('checkviewaccess', stdout=out)
+        out_with_jobs = StringIO()
+        call_command('checkviewaccess', '--jobs', '3', stdout=out_with_jobs)
+        self.assertEqual(out.getvalue(), out_with_jobs.getvalue())
+
+    @patch('django_roles_access.management.commands.checkviewaccess'
+           '.analyze_views_by_app')
+    @patch('django_roles_access.management.commands.checkviewaccess'
+           '.get_fork_context')
+    def test_jobs_without_fork_are_ignored(
+            self, mock_get_fork_context, mock_analyze_views_by_app
+    ):
+        mock_get_fork_context.return_value = None
+        out = StringIO()
+        err = StringIO()
+        call_command('checkviewaccess', '--jobs', '2', stdout=out, stderr=err)
+        self.assertFalse(mock_analyze_views_by_app.called)
+        self.assertIn(u'analyzed in one process', err.getvalue())
+        self.assertIn(u'End checking view access.', out.getvalue())
+
+    def test_report_is_written_to_output_file(self):
+        expected = u'django_roles_access,no type,app-ns2:middleware_view_func,'
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'report.csv')
+        out = StringIO()
+        try:
+            call_command('checkviewaccess', '--output-format', 'csv',
+                         '--output', path, stdout=out)
+            with open(path, 'rb') as report:
+                result = report.read().decode('utf-8')
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(out.getvalue(), u'')
+        self.assertIn(u'App Name,Type,View Name,Url,Status', result)
+        self.assertIn(expected, result)
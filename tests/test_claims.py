@@ -0,0 +1,206 @@
+from django.contrib.auth import logout
+from django.contrib.auth.models import Group, User
+from django.http import HttpResponse
+from django.test import (RequestFactory, TestCase, modify_settings,
+                         override_settings)
+
+from django_roles_access.claims import (CLAIMS_ATTRIBUTE,
+                                        NEW_TOKEN_ATTRIBUTE,
+                                        get_claims_cookie_name,
+                                        get_claims_role_bits,
+                                        issue_role_claims, make_role_claims,
+                                        process_role_claims,
+                                        read_role_claims)
+from django_roles_access.models import ViewAccess
+from django_roles_access.policy import (bump_policy_version, clear_policies,
+                                        get_view_policies)
+from django_roles_access.roles import RoleRegistry
+from django_roles_access.session import (bump_membership_version,
+                                         get_membership_version)
+
+DUMMY_CACHES = {'default': {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class TestRoleClaimsToken(TestCase):
+
+    def test_token_is_read(self):
+        token = make_role_claims(3, 0b101, 'fake-registry', ['v1', 'v2'])
+        self.assertEqual(read_role_claims(token),
+                         ('3', 0b101, 'fake-registry', ['v1', 'v2']))
+
+    def test_modified_token_is_not_valid(self):
+        token = make_role_claims(3, 0b101, 'fake-registry', ['v1', 'v2'])
+        self.assertIsNone(read_role_claims(token[:-1] + 'x'))
+        self.assertIsNone(read_role_claims('fake-token'))
+
+    @override_settings(DJANGO_ROLES_ACCESS_ROLE_CLAIMS_MAX_AGE=-1)
+    def test_expired_token_is_not_valid(self):
+        token = make_role_claims(3, 0b101, 'fake-registry', ['v1', 'v2'])
+        self.assertIsNone(read_role_claims(token))
+
+
+class TestRequestRoleClaims(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test-user')
+        self.factory = RequestFactory()
+        self.registry = RoleRegistry([1, 2])
+
+    def get_request(self, user_id, version=None, **extra):
+        request = self.factory.get('/', **extra)
+        request.user = self.user
+        token = make_role_claims(user_id, 0b11, self.registry.fingerprint,
+                                 version or get_membership_version(user_id))
+        request.COOKIES[get_claims_cookie_name()] = token
+        return request
+
+    def test_role_bits_of_the_user(self):
+        request = self.get_request(self.user.pk)
+        self.assertEqual(get_claims_role_bits(request, self.registry), 0b11)
+
+    def test_claims_are_verified_once(self):
+        request = self.get_request(self.user.pk)
+        get_claims_role_bits(request, self.registry)
+        request.COOKIES[get_claims_cookie_name()] = 'fake-token'
+        self.assertEqual(get_claims_role_bits(request, self.registry), 0b11)
+        self.assertEqual(getattr(request, CLAIMS_ATTRIBUTE)[1], 0b11)
+
+    def test_claims_of_other_user_are_ignored(self):
+        request = self.get_request(self.user.pk + 1)
+        self.assertIsNone(get_claims_role_bits(request, self.registry))
+
+    def test_claims_of_other_membership_version_are_ignored(self):
+        request = self.get_request(self.user.pk, ['fake', 'version'])
+        self.assertIsNone(get_claims_role_bits(request, self.registry))
+
+    def test_claims_are_revoked_by_membership_change(self):
+        request = self.get_request(self.user.pk)
+        bump_membership_version([self.user.pk])
+        self.assertIsNone(get_claims_role_bits(request, self.registry))
+
+    def test_claims_do_not_depend_on_policy_version(self):
+        request = self.get_request(self.user.pk)
+        bump_policy_version()
+        self.assertEqual(get_claims_role_bits(request, self.registry), 0b11)
+
+    def test_claims_of_other_registry_are_ignored(self):
+        request = self.get_request(self.user.pk)
+        self.assertIsNone(get_claims_role_bits(request,
+                                               RoleRegistry([1, 3])))
+
+    def test_claims_without_shared_membership_version_are_ignored(self):
+        request = self.get_request(self.user.pk)
+        with override_settings(CACHES=DUMMY_CACHES):
+            self.assertIsNone(get_claims_role_bits(request, self.registry))
+
+    @override_settings(CACHES=DUMMY_CACHES)
+    def test_claims_are_not_issued_without_shared_membership_version(self):
+        request = self.factory.get('/')
+        issue_role_claims(request, self.user.pk, [1], self.registry)
+        self.assertNotIn(NEW_TOKEN_ATTRIBUTE, request.__dict__)
+
+    @override_settings(DJANGO_ROLES_ACCESS_ROLE_CLAIMS_HEADER='X-Roles-Claims')
+    def test_claims_from_header(self):
+        token = make_role_claims(self.user.pk, 0b1, self.registry.fingerprint,
+                                 get_membership_version(self.user.pk))
+        request = self.get_request(self.user.pk, HTTP_X_ROLES_CLAIMS=token)
+        self.assertEqual(get_claims_role_bits(request, self.registry), 0b1)
+
+    @override_settings(DJANGO_ROLES_ACCESS_ROLE_CLAIMS=True,
+                       DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_logout_removes_token(self):
+        request = self.get_request(self.user.pk)
+        request.session = self.client.session
+        logout(request)
+        response = process_role_claims(request, HttpResponse())
+        cookie = response.cookies[get_claims_cookie_name()]
+        self.assertEqual(cookie.value, '')
+        self.assertEqual(cookie['max-age'], 0)
+
+
+@modify_settings(MIDDLEWARE={
+    'append': 'django_roles_access.middleware.RolesMiddleware'
+})
+@override_settings(DJANGO_ROLES_ACCESS_ROLE_CLAIMS=True,
+                   DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                   DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+class TestRoleClaimsAccess(TestCase):
+
+    def setUp(self):
+        clear_policies()
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.user = User.objects.create_user(username='test-user')
+        self.user.groups.add(self.g1)
+        view_access = ViewAccess.objects.create(view='direct_access_view',
+                                                type='br')
+        view_access.roles.add(self.g1)
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        clear_policies()
+
+    def test_token_is_issued(self):
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(get_claims_cookie_name(), response.cookies)
+
+    def test_roles_are_taken_from_token(self):
+        self.client.get('/direct_access_view/')
+        # Session and user, to verify it.
+        with self.assertNumQueries(2):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(get_claims_cookie_name(), response.cookies)
+
+    def test_token_is_issued_again_after_registry_change(self):
+        self.client.get('/direct_access_view/')
+        g2, created = Group.objects.get_or_create(name='test-group-2')
+        ViewAccess.objects.get(view='direct_access_view').roles.add(g2)
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(get_claims_cookie_name(), response.cookies)
+
+    def test_token_is_revoked_when_user_leaves_group(self):
+        self.client.get('/direct_access_view/')
+        self.user.groups.remove(self.g1)
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn(get_claims_cookie_name(), response.cookies)
+
+    def test_token_of_inactive_user_is_forbidden(self):
+        self.client.get('/direct_access_view/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_of_deleted_user_is_forbidden(self):
+        self.client.get('/direct_access_view/')
+        self.user.delete()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_without_roles_is_forbidden(self):
+        self.client.get('/direct_access_view/')
+        self.client.cookies[get_claims_cookie_name()] = make_role_claims(
+            self.user.pk, 0, get_view_policies().registry.fingerprint,
+            get_membership_version(self.user.pk))
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(CACHES=DUMMY_CACHES)
+    def test_token_is_not_used_without_shared_membership_version(self):
+        g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.user.groups.set([g2])
+        self.client.cookies[get_claims_cookie_name()] = make_role_claims(
+            self.user.pk, 0b1, get_view_policies().registry.fingerprint, None)
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn(get_claims_cookie_name(), response.cookies)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=False)
+    def test_token_is_not_issued_without_policy_cache(self):
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(get_claims_cookie_name(), response.cookies)
@@ -12,7 +12,8 @@ except:
 
 from django_roles_access.models import ViewAccess
 from django_roles_access.decorator import access_by_role
-from django_roles_access.tools import DEFAULT_FORBIDDEN_MESSAGE
+from django_roles_access.tools import (DEFAULT_FORBIDDEN_MESSAGE,
+                                       clear_app_types_index)
 
 User = get_user_model()
 
@@ -156,11 +157,13 @@ class IntegratedTestAccessByRoleDecorator(TestCase):
 
     def setUp(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         # User
         self.u1, created = User.objects.get_or_create(username='test-1')
 
     def tearDown(self):
         settings.__delattr__('SECURED')
+        clear_app_types_index()
 
     def test_get_200_status_with_view_function(self):
         self.client.force_login(self.u1)
@@ -0,0 +1,50 @@
+from unittest import TestCase as UnitTestCase
+
+from django.test import override_settings
+
+from django_roles_access.exempt import PathTrie, get_exempt_paths
+
+
+class UnitTestPathTrie(UnitTestCase):
+
+    def setUp(self):
+        self.trie = PathTrie(['/static/', '/media/', '/api/v1/public'],
+                             ['/healthz', '/'])
+
+    def test_prefixes(self):
+        self.assertTrue(self.trie.match('/static/'))
+        self.assertTrue(self.trie.match('/static/css/site.css'))
+        self.assertTrue(self.trie.match('/media/image.png'))
+        self.assertTrue(self.trie.match('/api/v1/public-list/'))
+
+    def test_exact_paths(self):
+        self.assertTrue(self.trie.match('/healthz'))
+        self.assertTrue(self.trie.match('/'))
+        self.assertFalse(self.trie.match('/healthz/'))
+        self.assertFalse(self.trie.match('/healthzz'))
+
+    def test_not_exempt_paths(self):
+        self.assertFalse(self.trie.match('/stat'))
+        self.assertFalse(self.trie.match('/static'))
+        self.assertFalse(self.trie.match('/admin/'))
+        self.assertFalse(self.trie.match('/api/v1/'))
+        self.assertFalse(self.trie.match(''))
+
+    def test_empty_prefix_matches_all_paths(self):
+        self.assertTrue(PathTrie([''], []).match('/any/'))
+
+    def test_empty_trie(self):
+        self.assertFalse(PathTrie())
+        self.assertFalse(PathTrie().match('/'))
+        self.assertTrue(self.trie)
+
+    @override_settings(DJANGO_ROLES_ACCESS_EXEMPT_PATH_PREFIXES=['/static/'],
+                       DJANGO_ROLES_ACCESS_EXEMPT_PATHS=['/healthz'])
+    def test_get_exempt_paths(self):
+        trie = get_exempt_paths()
+        self.assertTrue(trie.match('/static/site.css'))
+        self.assertTrue(trie.match('/healthz'))
+        self.assertFalse(trie.match('/admin/'))
+
+    def test_get_exempt_paths_without_settings(self):
+        self.assertFalse(get_exempt_paths())
@@ -3,7 +3,8 @@ import unittest
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponseForbidden, HttpResponseRedirect
 
-from django_roles_access.tools import DEFAULT_FORBIDDEN_MESSAGE
+from django_roles_access.tools import (DEFAULT_FORBIDDEN_MESSAGE,
+                                       clear_app_types_index)
 try:
     from unittest.mock import Mock, patch
 except:
@@ -40,17 +41,23 @@ class MiddlewareUnitTest(unittest.TestCase):
         response = self.middleware(self.request)
         assert response.django_roles
 
-    def test_middleware_call_check_access_by_role(
+    def test_middleware_call_does_not_check_access(
             self, mock_check_access_by_role
     ):
         self.middleware(self.request)
+        assert not mock_check_access_by_role.called
+
+    def test_process_view_call_check_access_by_role(
+            self, mock_check_access_by_role
+    ):
+        self.middleware.process_view(self.request, Mock(), (), {})
         assert mock_check_access_by_role.called
         self.assertEqual(mock_check_access_by_role.call_count, 1)
 
-    def test_middleware_call_check_access_by_roles_with_request(
+    def test_process_view_call_check_access_by_roles_with_request(
             self, mock_check_access_by_role
     ):
-        self.middleware(self.request)
+        self.middleware.process_view(self.request, Mock(), (), {})
         mock_check_access_by_role.assert_called_once_with(self.request)
 
     def test_middleware_get_response(
@@ -68,19 +75,26 @@ class MiddlewareUnitTest(unittest.TestCase):
         response = self.middleware(self.request)
         assert response == func(self.request)
 
-    def test_middleware_return_http_forbidden_if_not_check_access(
+    def test_process_view_return_none_if_check_access(
+            self, mock_check_access_by_role
+    ):
+        mock_check_access_by_role.return_value = True
+        response = self.middleware.process_view(self.request, Mock(), (), {})
+        self.assertIsNone(response)
+
+    def test_process_view_return_http_forbidden_if_not_check_access(
             self, mock_check_access_by_role
     ):
         mock_check_access_by_role.return_value = False
-        response = self.middleware(self.request)
+        response = self.middleware.process_view(self.request, Mock(), (), {})
         self.assertIsInstance(response, HttpResponseForbidden)
 
-    def test_middleware_redirect_if_not_check_access(
+    def test_process_view_redirect_if_not_check_access(
             self, mock_check_access_by_role
     ):
         settings.__setattr__('DJANGO_ROLES_ACCESS_REDIRECT', True)
         mock_check_access_by_role.return_value = False
-        response = self.middleware(self.request)
+        response = self.middleware.process_view(self.request, Mock(), (), {})
         settings.__delattr__('DJANGO_ROLES_ACCESS_REDIRECT')
         self.assertIsInstance(response, HttpResponseRedirect)
         self.assertEqual(response.url, settings.LOGIN_URL)
@@ -90,7 +104,7 @@ class MiddlewareUnitTest(unittest.TestCase):
             self, mock_get_no_access_response, mock_check_access_by_role
     ):
         mock_check_access_by_role.return_value = False
-        self.middleware(self.request)
+        self.middleware.process_view(self.request, Mock(), (), {})
         assert mock_get_no_access_response.called
 
     @patch('django_roles_access.middleware.get_no_access_response')
@@ -98,7 +112,7 @@ class MiddlewareUnitTest(unittest.TestCase):
             self, mock_get_no_access_response, mock_check_access_by_role
     ):
         mock_check_access_by_role.return_value = False
-        self.middleware(self.request)
+        self.middleware.process_view(self.request, Mock(), (), {})
         assert mock_get_no_access_response.call_count == 1
 
 
@@ -110,11 +124,13 @@ class MiddlewareIntegratedTestSecuredApp(TestCase):
 
     def setUp(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         # User
         self.u1, created = User.objects.get_or_create(username='test-1')
 
     def tearDown(self):
         settings.__delattr__('SECURED')
+        clear_app_types_index()
 
     def test_get_access_view_function(self):
         self.client.force_login(self.u1)
@@ -142,12 +158,35 @@ class MiddlewareIntegratedTestSecuredApp(TestCase):
 
     def test_default_behavior_when_no_configuration(self):
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.client.logout()
         response = self.client.get(
             '/role-included2/middleware_view_func/')
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         self.assertEqual(response.status_code, 200)
 
+    @override_settings(
+        DJANGO_ROLES_ACCESS_EXEMPT_PATH_PREFIXES=['/role-included2/'])
+    @patch('django_roles_access.middleware.check_access_by_role')
+    def test_exempt_path_prefix_is_not_checked(self, mock_check_access):
+        self.client.logout()
+        response = self.client.get(
+            '/role-included2/middleware_view_func/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(mock_check_access.called)
+
+    @override_settings(DJANGO_ROLES_ACCESS_EXEMPT_PATHS=[
+        '/role-included2/middleware_view_func/'])
+    def test_exempt_path_is_not_checked(self):
+        self.client.logout()
+        response = self.client.get(
+            '/role-included2/middleware_view_func/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            '/role-included2/middleware_view_class/')
+        self.assertEqual(response.status_code, 403)
+
     def test_forbidden_behavior_without_configuration(self):
         self.client.logout()
         response = self.client.get(
@@ -172,3 +211,31 @@ class MiddlewareIntegratedTestSecuredApp(TestCase):
         settings.__delattr__('DJANGO_ROLES_ACCESS_REDIRECT')
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, settings.LOGIN_URL)
+
+    @patch('django_roles_access.tools.resolve')
+    def test_url_is_not_resolved_again(self, mock_resolve):
+        self.client.force_login(self.u1)
+        response = self.client.get(
+            '/role-included2/middleware_view_func/')
+        self.assertEqual(response.status_code, 200)
+        assert not mock_resolve.called
+
+    @patch('django_roles_access.tools.evaluate_access_by_role')
+    def test_access_is_evaluated_once_with_decorator(
+            self, mock_evaluate_access_by_role
+    ):
+        mock_evaluate_access_by_role.return_value = True
+        self.client.force_login(self.u1)
+        response = self.client.get('/role-included2/view_by_role/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_evaluate_access_by_role.call_count, 1)
+
+    @patch('django_roles_access.tools.evaluate_access_by_role')
+    def test_access_is_evaluated_once_with_mixin(
+            self, mock_evaluate_access_by_role
+    ):
+        mock_evaluate_access_by_role.return_value = True
+        self.client.force_login(self.u1)
+        response = self.client.get('/role-included2/mixin_class_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_evaluate_access_by_role.call_count, 1)
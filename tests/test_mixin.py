@@ -8,6 +8,7 @@ try:
 except:
     from mock import Mock, patch
 
+from django_roles_access.tools import clear_app_types_index
 from tests.views import ProtectedMixinView
 
 User = get_user_model()
@@ -29,11 +30,13 @@ class TestIntegratedRolesMixin(TestCase):
 
     def setUp(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         # User
         self.u1, created = User.objects.get_or_create(username='test-1')
 
     def tearDown(self):
         settings.__delattr__('SECURED')
+        clear_app_types_index()
 
     def test_get_access_class_view(self):
         self.client.force_login(self.u1)
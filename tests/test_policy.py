@@ -0,0 +1,248 @@
+import pickle
+from unittest import TestCase as UnitTestCase
+
+from django.contrib.auth.models import Group
+from django.test import (RequestFactory, TestCase, modify_settings,
+                         override_settings)
+try:
+    from unittest.mock import patch
+except:
+    from mock import patch
+
+from django_roles_access.models import TemplateAccess, ViewAccess
+from django_roles_access.policy import (ViewPolicy, bump_policy_version,
+                                        clear_policies,
+                                        compile_template_policies,
+                                        compile_view_policies,
+                                        get_policy_version,
+                                        get_request_policy_version,
+                                        get_view_policies, get_view_policy,
+                                        load_view_policies,
+                                        get_template_policies,
+                                        load_template_policies)
+
+
+class TestLoadViewPolicies(TestCase):
+
+    def setUp(self):
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+
+    def test_empty_table(self):
+        self.assertEqual(load_view_policies(), {})
+
+    def test_view_access_without_roles(self):
+        ViewAccess.objects.create(view='app:view', type='au')
+        self.assertEqual(load_view_policies(),
+                         {'app:view': ViewPolicy('au', frozenset())})
+
+    def test_view_access_with_roles(self):
+        view_access = ViewAccess.objects.create(view='app:view', type='br')
+        view_access.roles.add(self.g1, self.g2)
+        ViewAccess.objects.create(view='other', type='pu')
+        self.assertEqual(load_view_policies(), {
+            'app:view': ViewPolicy('br', frozenset([self.g1.pk, self.g2.pk])),
+            'other': ViewPolicy('pu', frozenset()),
+        })
+
+    def test_load_view_names(self):
+        view_access = ViewAccess.objects.create(view='app:view', type='br')
+        view_access.roles.add(self.g1, self.g2)
+        ViewAccess.objects.create(view='other', type='pu')
+        ViewAccess.objects.create(view='not-loaded', type='pu')
+        with self.assertNumQueries(1):
+            self.assertEqual(load_view_policies(['app:view', 'other',
+                                                 'unknown']), {
+                'app:view': ViewPolicy('br', frozenset([self.g1.pk,
+                                                        self.g2.pk])),
+                'other': ViewPolicy('pu', frozenset()),
+            })
+
+    def test_load_is_done_with_two_queries(self):
+        for i in range(5):
+            view_access = ViewAccess.objects.create(view='view-{}'.format(i),
+                                                    type='br')
+            view_access.roles.add(self.g1)
+        with self.assertNumQueries(2):
+            load_view_policies()
+
+
+class TestLoadTemplatePolicies(TestCase):
+
+    def setUp(self):
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+
+    def test_template_policies(self):
+        template_access = TemplateAccess.objects.create(flag='flag-1')
+        template_access.roles.add(self.g1, self.g2)
+        template_access = TemplateAccess.objects.create(flag='flag-2')
+        template_access.roles.add(self.g2)
+        TemplateAccess.objects.create(flag='no-roles')
+        with self.assertNumQueries(1):
+            self.assertEqual(load_template_policies(), {
+                'flag-1': frozenset([self.g1.pk, self.g2.pk]),
+                'flag-2': frozenset([self.g2.pk]),
+            })
+
+    def test_template_policies_table_is_invalidated(self):
+        template_access = TemplateAccess.objects.create(flag='flag-1')
+        self.assertEqual(get_template_policies(), {})
+        template_access.roles.add(self.g1)
+        self.assertEqual(get_template_policies(), {'flag-1': 1})
+
+
+class UnitTestCompilePolicies(UnitTestCase):
+
+    def test_compile_view_policies(self):
+        table = compile_view_policies({
+            'view-1': ViewPolicy('br', frozenset([7, 3])),
+            'view-2': ViewPolicy('br', frozenset([5])),
+            'view-3': ViewPolicy('au', frozenset()),
+        })
+        self.assertEqual(table.registry.role_ids, (3, 5, 7))
+        self.assertEqual(table, {
+            'view-1': ViewPolicy('br', 0b101),
+            'view-2': ViewPolicy('br', 0b010),
+            'view-3': ViewPolicy('au', 0),
+        })
+
+    def test_compile_template_policies(self):
+        table = compile_template_policies({'flag-1': frozenset([9, 2]),
+                                           'flag-2': frozenset([9])})
+        self.assertEqual(table.registry.role_ids, (2, 9))
+        self.assertEqual(table, {'flag-1': 0b11, 'flag-2': 0b10})
+
+    def test_table_is_pickled_with_registry(self):
+        table = compile_template_policies({'flag-1': frozenset([9, 2])})
+        table = pickle.loads(pickle.dumps(table, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(table, {'flag-1': 0b11})
+        self.assertEqual(table.registry.get_bits([9]), 0b10)
+
+
+class TestGetViewPolicies(TestCase):
+
+    def setUp(self):
+        clear_policies()
+
+    def tearDown(self):
+        clear_policies()
+
+    @patch('django_roles_access.policy.load_view_policies')
+    def test_table_is_loaded_once(self, mock_load_view_policies):
+        mock_load_view_policies.return_value = {}
+        get_view_policies()
+        get_view_policies()
+        self.assertEqual(mock_load_view_policies.call_count, 1)
+
+    @patch('django_roles_access.policy.load_view_policies')
+    def test_table_is_loaded_again_after_clear(self, mock_load_view_policies):
+        mock_load_view_policies.return_value = {}
+        get_view_policies()
+        clear_policies()
+        get_view_policies()
+        self.assertEqual(mock_load_view_policies.call_count, 2)
+
+    def test_get_view_policy(self):
+        ViewAccess.objects.create(view='app:view', type='au')
+        self.assertEqual(get_view_policy('app:view'), ViewPolicy('au', 0))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_view_policy('app:other-view'))
+
+
+class TestPolicyVersion(TestCase):
+
+    def test_version_is_stable(self):
+        self.assertEqual(get_policy_version(), get_policy_version())
+
+    def test_bump_policy_version(self):
+        version = get_policy_version()
+        bump_policy_version()
+        self.assertNotEqual(version, get_policy_version())
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_bump_policy_version_without_shared_cache(self):
+        version = get_policy_version()
+        bump_policy_version()
+        self.assertNotEqual(version, get_policy_version())
+
+    @patch('django_roles_access.policy.load_view_policies')
+    def test_table_is_loaded_again_after_bump(self, mock_load_view_policies):
+        mock_load_view_policies.return_value = {}
+        get_view_policies()
+        bump_policy_version()
+        get_view_policies()
+        self.assertEqual(mock_load_view_policies.call_count, 2)
+
+    def test_version_already_read_is_used(self):
+        version = get_policy_version()
+        with self.assertNumQueries(0), \
+                patch('django_roles_access.policy.get_policy_cache') as mock:
+            self.assertEqual(get_policy_version(version[0]), version)
+        mock.assert_not_called()
+
+    def test_request_version_is_read_once(self):
+        request = RequestFactory().get('/')
+        version = get_request_policy_version(request)
+        bump_policy_version()
+        self.assertEqual(get_request_policy_version(request), version)
+
+    @modify_settings(MIDDLEWARE={
+        'append': 'django_roles_access.middleware.RolesMiddleware'
+    })
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_version_is_read_once_per_request(self):
+        ViewAccess.objects.create(view='direct_access_view', type='pu')
+        self.client.get('/direct_access_view/')
+        with patch('django_roles_access.policy.get_policy_version',
+                   wraps=get_policy_version) as mock_get_policy_version:
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get_policy_version.call_count, 1)
+
+
+@override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                   DJANGO_ROLES_ACCESS_SHARED_POLICY=True)
+class TestSharedPolicy(TestCase):
+
+    def setUp(self):
+        clear_policies()
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        view_access = ViewAccess.objects.create(view='app:view', type='br')
+        view_access.roles.add(self.g1)
+
+    def tearDown(self):
+        clear_policies()
+
+    def test_table_is_loaded_from_shared_cache(self):
+        get_view_policies()
+        # Other processes have an empty table.
+        clear_policies()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_view_policy('app:view'), ViewPolicy('br', 1))
+            self.assertEqual(get_view_policies().registry.role_ids,
+                             (self.g1.pk,))
+
+    def test_shared_table_is_loaded_again_after_change(self):
+        get_view_policies()
+        ViewAccess.objects.create(view='app:other-view', type='au')
+        clear_policies()
+        self.assertEqual(get_view_policy('app:other-view'),
+                         ViewPolicy('au', 0))
+
+    @patch('django_roles_access.policy.load_template_policies')
+    def test_template_table_is_shared(self, mock_load_template_policies):
+        mock_load_template_policies.return_value = {}
+        get_template_policies()
+        clear_policies()
+        get_template_policies()
+        self.assertEqual(mock_load_template_policies.call_count, 1)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_dummy_cache_loads_from_database(self):
+        get_view_policies()
+        clear_policies()
+        with self.assertNumQueries(2):
+            get_view_policies()
@@ -0,0 +1,200 @@
+from unittest import TestCase as UnitTestCase
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.conf import settings
+from django.test import RequestFactory, TestCase, override_settings
+try:
+    from unittest.mock import Mock, patch
+except:
+    from mock import Mock, patch
+
+from django_roles_access.models import ViewAccess
+from django_roles_access.policy import (ViewPolicy, clear_policies,
+                                        compile_view_policies)
+from django_roles_access.recipe import (AUTHENTICATED, RoleRecipe,
+                                        apply_recipe, clear_recipes,
+                                        compile_recipe, get_recipe)
+from django_roles_access.roles import ROLE_IDS_ATTRIBUTE, RoleRegistry
+from django_roles_access.tools import (check_access_by_role,
+                                       clear_app_types_index)
+
+User = get_user_model()
+
+
+class UnitTestCompileRecipe(UnitTestCase):
+
+    def setUp(self):
+        self.registry = RoleRegistry([1])
+
+    def test_not_secured_and_disabled_take_precedence(self):
+        view_policy = ViewPolicy('br', 1)
+        self.assertIs(compile_recipe('NOT_SECURED', view_policy,
+                                     self.registry), True)
+        self.assertIs(compile_recipe('DISABLED', view_policy,
+                                     self.registry), False)
+
+    def test_view_policy_takes_precedence_over_app_type(self):
+        self.assertIs(compile_recipe('SECURED', ViewPolicy('pu', 0),
+                                     self.registry), True)
+        self.assertIs(compile_recipe('PUBLIC', ViewPolicy('au', 0),
+                                     self.registry), AUTHENTICATED)
+        self.assertEqual(compile_recipe(None, ViewPolicy('br', 1),
+                                        self.registry),
+                         RoleRecipe(1, self.registry))
+
+    def test_unknown_view_policy_type_uses_app_type(self):
+        self.assertIs(compile_recipe('SECURED', ViewPolicy('xx', 0),
+                                     self.registry), AUTHENTICATED)
+
+    def test_without_view_policy(self):
+        self.assertIs(compile_recipe('PUBLIC', None, self.registry), True)
+        self.assertIs(compile_recipe('SECURED', None, self.registry),
+                      AUTHENTICATED)
+        self.assertIs(compile_recipe(None, None, self.registry), True)
+
+
+class UnitTestApplyRecipe(UnitTestCase):
+
+    def setUp(self):
+        self.user = Mock()
+        self.user.is_authenticated = True
+        setattr(self.user, ROLE_IDS_ATTRIBUTE, frozenset([2]))
+
+    def test_constant_recipes(self):
+        self.assertIs(apply_recipe(True, AnonymousUser()), True)
+        self.assertIs(apply_recipe(False, self.user), False)
+
+    def test_authenticated(self):
+        self.assertTrue(apply_recipe(AUTHENTICATED, self.user))
+        self.assertFalse(apply_recipe(AUTHENTICATED, AnonymousUser()))
+
+    def test_roles(self):
+        registry = RoleRegistry([1, 2])
+        self.assertTrue(apply_recipe(RoleRecipe(0b10, registry), self.user))
+        self.assertFalse(apply_recipe(RoleRecipe(0b01, registry), self.user))
+        self.assertFalse(apply_recipe(RoleRecipe(0b10, registry),
+                                      AnonymousUser()))
+
+
+class UnitTestGetRecipe(UnitTestCase):
+
+    def setUp(self):
+        clear_recipes()
+        self.app_types_index = {'app': 'SECURED'}
+        self.view_policies = compile_view_policies(
+            {'app:view': ViewPolicy('pu', frozenset())})
+
+    def tearDown(self):
+        clear_recipes()
+
+    @patch('django_roles_access.recipe.compile_recipe')
+    def test_recipe_is_compiled_once(self, mock_compile_recipe):
+        get_recipe('app', 'app:view', self.app_types_index,
+                   self.view_policies)
+        get_recipe('app', 'app:view', self.app_types_index,
+                   self.view_policies)
+        mock_compile_recipe.assert_called_once_with(
+            'SECURED', ViewPolicy('pu', 0), self.view_policies.registry)
+
+    @patch('django_roles_access.recipe.compile_recipe')
+    def test_recipe_is_compiled_again_for_new_policies(
+            self, mock_compile_recipe
+    ):
+        get_recipe('app', 'app:view', self.app_types_index,
+                   self.view_policies)
+        get_recipe('app', 'app:view', self.app_types_index,
+                   compile_view_policies({}))
+        get_recipe('app', 'app:view', {}, self.view_policies)
+        self.assertEqual(mock_compile_recipe.call_count, 3)
+
+
+class UnitTestGetRecipeByCallback(UnitTestCase):
+
+    def setUp(self):
+        clear_recipes()
+        self.app_types_index = {'app': 'SECURED'}
+        self.view_policies = compile_view_policies(
+            {'ns-1:view': ViewPolicy('pu', frozenset())})
+
+    def tearDown(self):
+        clear_recipes()
+
+    def get(self, view_name, callback):
+        return get_recipe('app', view_name, self.app_types_index,
+                          self.view_policies, callback)
+
+    def test_recipe_is_found_by_callback(self):
+        callback = Mock()
+        self.get('ns-1:view', callback)
+        self.view_policies.get = Mock()
+        with patch('django_roles_access.recipe.compile_recipe') as \
+                mock_compile_recipe:
+            self.assertIs(self.get('ns-1:view', callback), True)
+        assert not mock_compile_recipe.called
+
+    def test_callback_with_many_view_names(self):
+        callback = Mock()
+        self.assertIs(self.get('ns-1:view', callback), True)
+        self.assertIs(self.get('ns-2:view', callback), AUTHENTICATED)
+        self.assertIs(self.get('ns-1:view', callback), True)
+        self.assertIs(self.get('ns-2:view', callback), AUTHENTICATED)
+
+    def test_not_hashable_callback(self):
+        self.assertIs(self.get('ns-1:view', {}), True)
+
+
+@override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+class TestCheckAccessByRoleWithRecipes(TestCase):
+
+    def setUp(self):
+        settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
+        clear_policies()
+        clear_recipes()
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.path = '/role-included1/view_by_role/'
+
+    def tearDown(self):
+        settings.__delattr__('SECURED')
+        clear_app_types_index()
+        clear_policies()
+        clear_recipes()
+
+    def check(self, user):
+        request = RequestFactory().get(self.path)
+        request.user = user
+        return check_access_by_role(request)
+
+    def test_secured_application(self):
+        self.assertTrue(self.check(self.u1))
+        self.assertFalse(self.check(AnonymousUser()))
+
+    def test_by_role(self):
+        view_access = ViewAccess.objects.create(
+            view='django_roles_access:view_protected_by_role', type='br')
+        view_access.roles.add(self.g1)
+        self.assertFalse(self.check(self.u1))
+        self.u1.groups.add(self.g1)
+        self.assertTrue(self.check(User.objects.get(pk=self.u1.pk)))
+
+    def test_policy_change_is_seen(self):
+        self.assertFalse(self.check(AnonymousUser()))
+        ViewAccess.objects.create(
+            view='django_roles_access:view_protected_by_role', type='pu')
+        self.assertTrue(self.check(AnonymousUser()))
+
+    def test_same_callback_in_two_namespaces(self):
+        ViewAccess.objects.create(
+            view='app-ns2:view_protected_by_role', type='pu')
+        self.assertFalse(self.check(AnonymousUser()))
+        self.path = '/role-included2/view_by_role/'
+        self.assertTrue(self.check(AnonymousUser()))
+        self.path = '/role-included1/view_by_role/'
+        self.assertFalse(self.check(AnonymousUser()))
+
+    def test_no_queries_once_compiled(self):
+        self.check(self.u1)
+        with self.assertNumQueries(0):
+            self.check(self.u1)
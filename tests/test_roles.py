@@ -0,0 +1,217 @@
+from unittest import TestCase as UnitTestCase
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.test import TestCase, override_settings
+try:
+    from unittest.mock import patch
+except:
+    from mock import patch
+
+from django_roles_access.roles import (ROLE_BITS_ATTRIBUTE, RoleIdsCache,
+                                       RoleRegistry, forget_role_ids,
+                                       get_role_bits, get_role_ids,
+                                       role_ids_cache)
+
+User = get_user_model()
+
+
+class UnitTestRoleIdsCache(UnitTestCase):
+
+    def setUp(self):
+        self.cache = RoleIdsCache()
+
+    def test_get_missing_user(self):
+        self.assertIsNone(self.cache.get(1))
+
+    def test_set_and_get(self):
+        self.cache.set(1, frozenset([2, 3]), 60, 10)
+        self.assertEqual(self.cache.get(1), frozenset([2, 3]))
+
+    @patch('django_roles_access.roles._clock')
+    def test_expired_entry(self, mock_clock):
+        mock_clock.return_value = 100
+        self.cache.set(1, frozenset([2]), 60, 10)
+        mock_clock.return_value = 159
+        self.assertEqual(self.cache.get(1), frozenset([2]))
+        mock_clock.return_value = 160
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_discarded(self):
+        self.cache.set(1, frozenset([1]), 60, 2)
+        self.cache.set(2, frozenset([2]), 60, 2)
+        self.cache.get(1)
+        self.cache.set(3, frozenset([3]), 60, 2)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.get(1), frozenset([1]))
+        self.assertEqual(self.cache.get(3), frozenset([3]))
+
+    def test_delete(self):
+        self.cache.set(1, frozenset([1]), 60, 10)
+        self.cache.delete(1)
+        self.assertIsNone(self.cache.get(1))
+
+    def test_clear(self):
+        self.cache.set(1, frozenset([1]), 60, 10)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_outdated_generation_is_not_set(self):
+        generation = self.cache.generation
+        self.cache.delete(1)
+        self.cache.set(1, frozenset([1]), 60, 10, generation)
+        self.assertIsNone(self.cache.get(1))
+
+
+class TestGetRoleIds(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.u1.groups.add(self.g1, self.g2)
+        forget_role_ids()
+
+    def tearDown(self):
+        forget_role_ids()
+
+    def test_anonymous_user_has_no_roles(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(get_role_ids(AnonymousUser()), frozenset())
+
+    def test_role_ids(self):
+        self.assertEqual(get_role_ids(self.u1),
+                         frozenset([self.g1.pk, self.g2.pk]))
+
+    def test_role_ids_are_kept_in_user(self):
+        get_role_ids(self.u1)
+        with self.assertNumQueries(0):
+            get_role_ids(self.u1)
+
+    def test_process_cache_is_disabled_by_default(self):
+        get_role_ids(self.u1)
+        self.assertEqual(len(role_ids_cache), 0)
+        user = User.objects.get(pk=self.u1.pk)
+        with self.assertNumQueries(1):
+            get_role_ids(user)
+
+    @override_settings(DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT=60)
+    def test_process_cache(self):
+        get_role_ids(self.u1)
+        user = User.objects.get(pk=self.u1.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_role_ids(user),
+                             frozenset([self.g1.pk, self.g2.pk]))
+
+    @override_settings(DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT=60,
+                       DJANGO_ROLES_ACCESS_ROLES_CACHE_MAX_SIZE=1)
+    def test_process_cache_max_size(self):
+        u2 = User.objects.create(username='test-2')
+        get_role_ids(self.u1)
+        get_role_ids(u2)
+        self.assertEqual(len(role_ids_cache), 1)
+        self.assertIsNone(role_ids_cache.get(self.u1.pk))
+
+
+@override_settings(DJANGO_ROLES_ACCESS_ROLES_CACHE_TIMEOUT=60)
+class TestRoleIdsInvalidation(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.u1.groups.add(self.g1)
+        forget_role_ids()
+        get_role_ids(self.u1)
+
+    def tearDown(self):
+        forget_role_ids()
+
+    def reloaded_role_ids(self):
+        return get_role_ids(User.objects.get(pk=self.u1.pk))
+
+    def test_group_added_to_user(self):
+        self.u1.groups.add(self.g2)
+        self.assertEqual(get_role_ids(self.u1),
+                         frozenset([self.g1.pk, self.g2.pk]))
+        self.assertEqual(self.reloaded_role_ids(),
+                         frozenset([self.g1.pk, self.g2.pk]))
+
+    def test_group_removed_from_user(self):
+        self.u1.groups.remove(self.g1)
+        self.assertEqual(get_role_ids(self.u1), frozenset())
+        self.assertEqual(self.reloaded_role_ids(), frozenset())
+
+    def test_user_groups_cleared(self):
+        self.u1.groups.clear()
+        self.assertEqual(self.reloaded_role_ids(), frozenset())
+
+    def test_user_added_to_group(self):
+        self.g2.user_set.add(self.u1)
+        self.assertEqual(self.reloaded_role_ids(),
+                         frozenset([self.g1.pk, self.g2.pk]))
+
+    def test_group_users_cleared(self):
+        self.g1.user_set.clear()
+        self.assertEqual(self.reloaded_role_ids(), frozenset())
+
+    def test_group_deleted(self):
+        self.g1.delete()
+        self.assertEqual(self.reloaded_role_ids(), frozenset())
+
+
+class UnitTestRoleRegistry(UnitTestCase):
+
+    def setUp(self):
+        self.registry = RoleRegistry([30, 10, 20, 10])
+
+    def test_dense_bits(self):
+        self.assertEqual(len(self.registry), 3)
+        self.assertEqual(self.registry.role_ids, (10, 20, 30))
+        self.assertEqual(self.registry.get_bits([10, 30]), 0b101)
+
+    def test_unknown_roles_have_no_bit(self):
+        self.assertEqual(self.registry.get_bits([40, 20]), 0b010)
+        self.assertEqual(self.registry.get_bits([]), 0)
+
+    def test_get_role_ids(self):
+        self.assertEqual(self.registry.get_role_ids(0b110),
+                         frozenset([20, 30]))
+
+    def test_fingerprint(self):
+        self.assertEqual(self.registry.fingerprint,
+                         RoleRegistry([10, 20, 30]).fingerprint)
+        self.assertNotEqual(self.registry.fingerprint,
+                            RoleRegistry([10, 20]).fingerprint)
+
+
+class TestGetRoleBits(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.u1.groups.add(self.g1)
+        self.registry = RoleRegistry([self.g1.pk + 1, self.g1.pk])
+
+    def test_anonymous_user(self):
+        self.assertEqual(get_role_bits(AnonymousUser(), self.registry), 0)
+
+    def test_role_bits(self):
+        self.assertEqual(get_role_bits(self.u1, self.registry), 0b01)
+
+    def test_role_bits_are_kept_in_user(self):
+        get_role_bits(self.u1, self.registry)
+        with self.assertNumQueries(0):
+            get_role_bits(self.u1, self.registry)
+
+    def test_role_bits_are_computed_for_other_registry(self):
+        get_role_bits(self.u1, self.registry)
+        self.assertEqual(get_role_bits(self.u1, RoleRegistry([self.g1.pk])),
+                         0b1)
+
+    def test_forget_role_ids_removes_role_bits(self):
+        get_role_bits(self.u1, self.registry)
+        forget_role_ids(user=self.u1)
+        self.assertNotIn(ROLE_BITS_ATTRIBUTE, self.u1.__dict__)
@@ -1,6 +1,6 @@
 from unittest import TestCase as UnitTestCase
 from django.template import Template, Context
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 
@@ -11,7 +11,11 @@ except:
     from mock import Mock, patch
 
 from django_roles_access.models import TemplateAccess
-from django_roles_access.templatetags.roles_tags import check_role
+from django_roles_access.policy import compile_template_policies
+from django_roles_access.roles import ROLE_IDS_ATTRIBUTE
+from django_roles_access.templatetags.roles_tags import (
+    TEMPLATE_POLICIES_ATTRIBUTE, check_role, get_flags_roles,
+    load_role_flags)
 
 User = get_user_model()
 
@@ -23,30 +27,76 @@ class UnitTestRolesTags(UnitTestCase):
         user.is_superuser = True
         self.assertTrue(check_role(user=user, flag='fake-flag'))
 
-    @patch('django_roles_access.templatetags.roles_tags.TemplateAccess.objects')
+    @patch('django_roles_access.templatetags.roles_tags.get_flags_roles')
     def test_roles_tags_show_content_for_flag_and_user_in_roles(
-            self, mock_ta_objects
+            self, mock_get_flags_roles
     ):
         user = Mock()
         user.is_superuser = False
-        user.groups.all.return_value = ['fake-group']
-        template_flag = Mock()
-        template_flag.roles.all.return_value = ['fake-group', 'other-group']
-        mock_ta_objects.get.return_value = template_flag
+        setattr(user, ROLE_IDS_ATTRIBUTE, None)
+        user.groups.values_list.return_value = [1]
+        mock_get_flags_roles.return_value = compile_template_policies(
+            {'fake-flag': frozenset([1, 2])})
         self.assertTrue(check_role(user=user, flag='fake-flag'))
 
-    @patch('django_roles_access.templatetags.roles_tags.TemplateAccess.objects')
+    @patch('django_roles_access.templatetags.roles_tags.get_flags_roles')
     def test_roles_tags_not_show_content_for_flag_and_user_not_in_roles(
-            self, mock_ta_objects
+            self, mock_get_flags_roles
     ):
         user = Mock()
         user.is_superuser = False
-        user.groups.all.return_value = ['no-group']
-        template_flag = Mock()
-        template_flag.roles.all.return_value = ['fake-group', 'other-group']
-        mock_ta_objects.get.return_value = template_flag
+        setattr(user, ROLE_IDS_ATTRIBUTE, None)
+        user.groups.values_list.return_value = [3]
+        mock_get_flags_roles.return_value = compile_template_policies(
+            {'fake-flag': frozenset([1, 2])})
         self.assertFalse(check_role(user=user, flag='fake-flag'))
 
+    @patch('django_roles_access.templatetags.roles_tags.get_flags_roles')
+    def test_roles_tags_not_show_content_for_unknown_flag(
+            self, mock_get_flags_roles
+    ):
+        user = Mock()
+        user.is_superuser = False
+        mock_get_flags_roles.return_value = compile_template_policies({})
+        self.assertFalse(check_role(user=user, flag='fake-flag'))
+        assert not user.groups.values_list.called
+
+    @patch('django_roles_access.templatetags.roles_tags.'
+           'load_template_policies')
+    def test_flags_roles_are_kept_in_user(self, mock_load_template_policies):
+        user = Mock()
+        setattr(user, TEMPLATE_POLICIES_ATTRIBUTE, None)
+        mock_load_template_policies.return_value = {}
+        get_flags_roles(user)
+        get_flags_roles(user)
+        self.assertEqual(mock_load_template_policies.call_count, 1)
+
+
+class UnitTestLoadRoleFlags(UnitTestCase):
+
+    def test_all_flags_for_superuser(self):
+        user = Mock()
+        user.is_superuser = True
+        self.assertEqual(load_role_flags(user, 'flag-a', 'flag-b'),
+                         {'flag-a': True, 'flag-b': True})
+
+    @patch('django_roles_access.templatetags.roles_tags.get_flags_roles')
+    def test_flags(self, mock_get_flags_roles):
+        user = Mock()
+        user.is_superuser = False
+        setattr(user, ROLE_IDS_ATTRIBUTE, None)
+        user.groups.values_list.return_value = [1]
+        mock_get_flags_roles.return_value = compile_template_policies(
+            {'flag-a': frozenset([1, 2]), 'flag-b': frozenset([2])})
+        self.assertEqual(load_role_flags(user, 'flag-a', 'flag-b', 'flag-c'),
+                         {'flag-a': True, 'flag-b': False, 'flag-c': False})
+
+    def test_no_flags(self):
+        self.assertEqual(load_role_flags(Mock()), {})
+
+    def test_no_user(self):
+        self.assertEqual(load_role_flags(None, 'flag-a'), {'flag-a': False})
+
 
 class IntegratedTestRolesTags(TestCase):
 
@@ -92,3 +142,53 @@ class IntegratedTestRolesTags(TestCase):
         self.user.save()
         rendered = self.TEMPLATE.render(Context({'request': self.request}))
         self.assertNotIn('checked access', rendered)
+
+    def test_template_access_is_queried_once_per_render(self):
+        flags = ['test-flag-{}'.format(i) for i in range(30)]
+        for flag in flags:
+            template_access = TemplateAccess.objects.create(flag=flag)
+            template_access.roles.add(self.group)
+        self.user.groups.add(self.group)
+        template = Template(
+            "{% load roles_tags %}" + "".join(
+                "{% if request.user|check_role:'" + flag + "' %}"
+                "[" + flag + "]{% endif %}" for flag in flags))
+        request = RequestFactory()
+        request.user = User.objects.get(pk=self.user.pk)
+        # One query for template access and one for user roles.
+        with self.assertNumQueries(2):
+            rendered = template.render(Context({'request': request}))
+        for flag in flags:
+            self.assertIn('[' + flag + ']', rendered)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_template_access_with_policy_cache(self):
+        template_acces, created = TemplateAccess.objects.get_or_create(
+            flag='test-flag')
+        template_acces.roles.add(self.group)
+        self.user.groups.add(self.group)
+        rendered = self.TEMPLATE.render(Context({'request': self.request}))
+        self.assertIn('checked access', rendered)
+        template_acces.roles.remove(self.group)
+        self.request.user = User.objects.get(pk=self.user.pk)
+        rendered = self.TEMPLATE.render(Context({'request': self.request}))
+        self.assertNotIn('checked access', rendered)
+
+    def test_load_role_flags(self):
+        for flag in ['flag_a', 'flag_b', 'flag_c']:
+            TemplateAccess.objects.create(flag=flag)
+        TemplateAccess.objects.get(flag='flag_a').roles.add(self.group)
+        TemplateAccess.objects.get(flag='flag_c').roles.add(self.group)
+        self.user.groups.add(self.group)
+        template = Template(
+            "{% load roles_tags %}"
+            "{% load_role_flags request.user 'flag_a' 'flag_b' 'flag_c' "
+            "as flags %}"
+            "{% if flags.flag_a %}[a]{% endif %}"
+            "{% if flags.flag_b %}[b]{% endif %}"
+            "{% if flags.flag_c %}[c]{% endif %}")
+        request = RequestFactory()
+        request.user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(2):
+            rendered = template.render(Context({'request': request}))
+        self.assertEqual(rendered, '[a][c]')
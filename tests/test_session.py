@@ -0,0 +1,329 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY, get_user)
+from django.contrib.auth.models import Group, User
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.functional import SimpleLazyObject
+
+from django_roles_access.models import ViewAccess
+from django_roles_access.session import (SESSION_ROLES_KEY,
+                                         get_membership_version,
+                                         get_session_authentication,
+                                         get_session_role_ids,
+                                         is_user_loaded)
+from django_roles_access.policy import get_view_policies
+from django_roles_access.tools import get_view_access, is_request_authenticated
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+ALLOW_ALL_BACKEND = 'django.contrib.auth.backends.AllowAllUsersModelBackend'
+
+
+class TestSessionAuthentication(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test-user',
+                                             password='test-password')
+
+    def get_request(self, user_id=None, backend=MODEL_BACKEND,
+                    session_hash=None):
+        """
+        Request as processed by SessionMiddleware and
+        AuthenticationMiddleware.
+        """
+        request = RequestFactory().get('/')
+        request.session = import_module(
+            settings.SESSION_ENGINE).SessionStore()
+        if user_id is not None:
+            request.session[SESSION_KEY] = str(user_id)
+            request.session[BACKEND_SESSION_KEY] = backend
+            request.session[HASH_SESSION_KEY] = (
+                session_hash or self.user.get_session_auth_hash())
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        return request
+
+    def test_authenticated_session(self):
+        request = self.get_request(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(get_session_authentication(request), True)
+        self.assertFalse(is_user_loaded(request))
+
+    def test_anonymous_session(self):
+        request = self.get_request()
+        self.assertIs(get_session_authentication(request), False)
+
+    def test_session_of_unknown_backend(self):
+        request = self.get_request(self.user.pk, backend='fake.Backend')
+        self.assertIs(get_session_authentication(request), False)
+
+    def test_loaded_user_is_used(self):
+        request = self.get_request(self.user.pk)
+        request.user.is_authenticated
+        self.assertIsNone(get_session_authentication(request))
+
+    def test_request_without_session(self):
+        request = RequestFactory().get('/')
+        self.assertIsNone(get_session_authentication(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_strict_mode_verifies_session_hash(self):
+        request = self.get_request(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertIs(get_session_authentication(request), True)
+        self.assertFalse(is_user_loaded(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_strict_mode_with_invalid_session_hash(self):
+        request = self.get_request(self.user.pk, session_hash='fake-hash')
+        self.assertIsNone(get_session_authentication(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_strict_mode_with_deleted_user(self):
+        request = self.get_request(self.user.pk)
+        self.user.delete()
+        self.assertIsNone(get_session_authentication(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_strict_mode_with_inactive_user(self):
+        request = self.get_request(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(get_session_authentication(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True,
+                       AUTHENTICATION_BACKENDS=[ALLOW_ALL_BACKEND])
+    def test_strict_mode_with_inactive_user_of_backend_allowing_it(self):
+        request = self.get_request(self.user.pk, backend=ALLOW_ALL_BACKEND)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIs(get_session_authentication(request), True)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_request_user_is_used_when_verification_fails(self):
+        request = self.get_request(self.user.pk, session_hash='fake-hash')
+        self.assertIs(is_request_authenticated(request), False)
+        self.assertTrue(is_user_loaded(request))
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_is_request_authenticated_from_session(self):
+        request = self.get_request(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(is_request_authenticated(request), True)
+
+    def test_is_request_authenticated_without_setting(self):
+        request = self.get_request(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertIs(is_request_authenticated(request), True)
+        self.assertTrue(is_user_loaded(request))
+
+
+@override_settings(DJANGO_ROLES_ACCESS_SESSION_ROLES=True)
+class TestSessionRoles(TestCase):
+
+    def setUp(self):
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.user = User.objects.create_user(username='test-user',
+                                             password='test-password')
+        self.user.groups.add(self.g1)
+        self.client.force_login(self.user)
+        self.request = RequestFactory().get('/')
+        self.request.session = self.client.session
+        # Session is loaded before checks.
+        self.request.session.get(SESSION_KEY)
+        self.request.user = SimpleLazyObject(
+            lambda: get_user(self.request))
+
+    def test_role_ids_are_stored_at_login(self):
+        self.assertEqual(list(self.request.session[SESSION_ROLES_KEY][2]),
+                         [self.g1.pk])
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_role_ids_are_read_from_session(self):
+        # Session verification.
+        with self.assertNumQueries(1):
+            self.assertEqual(get_session_role_ids(self.request),
+                             frozenset([self.g1.pk]))
+        self.assertFalse(is_user_loaded(self.request))
+
+    def test_user_is_loaded_without_strict_session_authentication(self):
+        # User.
+        with self.assertNumQueries(1):
+            self.assertEqual(get_session_role_ids(self.request),
+                             frozenset([self.g1.pk]))
+        self.assertTrue(is_user_loaded(self.request))
+
+    def test_inactive_user_has_no_session_role_ids(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(get_session_role_ids(self.request))
+
+    def test_role_ids_are_loaded_again_after_change(self):
+        self.user.groups.add(self.g2)
+        # User and role ids.
+        with self.assertNumQueries(2):
+            self.assertEqual(get_session_role_ids(self.request),
+                             frozenset([self.g1.pk, self.g2.pk]))
+        with self.assertNumQueries(0):
+            get_session_role_ids(self.request)
+
+    def test_role_ids_are_loaded_again_after_group_cleared(self):
+        self.g1.user_set.clear()
+        self.assertEqual(get_session_role_ids(self.request), frozenset())
+
+    def test_anonymous_session_has_no_role_ids(self):
+        self.request.session.flush()
+        self.assertIsNone(get_session_role_ids(self.request))
+
+    def test_other_loaded_user_has_no_session_role_ids(self):
+        self.request.user = User.objects.create_user(username='other-user')
+        self.assertIsNone(get_session_role_ids(self.request))
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_role_ids_are_loaded_without_shared_cache(self):
+        # User and role ids.
+        with self.assertNumQueries(2):
+            self.assertEqual(get_session_role_ids(self.request),
+                             frozenset([self.g1.pk]))
+
+    def add_view_access(self):
+        view_access = ViewAccess.objects.create(view='direct_access_view',
+                                                type='br')
+        view_access.roles.add(self.g1)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_by_role_view_does_not_load_user(self):
+        self.add_view_access()
+        self.client.get('/direct_access_view/')
+        # Session and session verification.
+        with self.assertNumQueries(2):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.user.groups.remove(self.g1)
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_by_role_view_loads_user_without_strict_mode(self):
+        self.add_view_access()
+        self.client.get('/direct_access_view/')
+        # Session and user.
+        with self.assertNumQueries(2):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_by_role_view_is_forbidden_to_inactive_user(self):
+        self.add_view_access()
+        self.client.get('/direct_access_view/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_by_role_view_is_forbidden_to_deleted_user(self):
+        self.add_view_access()
+        self.client.get('/direct_access_view/')
+        self.user.delete()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_deleted_user_membership_version_is_bumped(self):
+        version = get_membership_version(self.user.pk)
+        user_id = self.user.pk
+        self.user.delete()
+        self.assertNotEqual(get_membership_version(user_id), version)
+
+
+class TestSessionAuthenticationAccess(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test-user',
+                                             password='test-password')
+        ViewAccess.objects.create(view='direct_access_view', type='au')
+
+    def test_authorized_view_without_setting(self):
+        self.client.force_login(self.user)
+        # Session, user and ViewAccess object.
+        with self.assertNumQueries(3):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_authorized_view_does_not_load_user(self):
+        self.client.force_login(self.user)
+        # Session and ViewAccess object.
+        with self.assertNumQueries(2):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SESSION_AUTH_STRICT=True)
+    def test_authorized_view_is_forbidden_to_inactive_user(self):
+        self.client.force_login(self.user)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SINGLE_QUERY=True)
+    def test_single_query_authorized_view_does_not_load_user(self):
+        self.client.force_login(self.user)
+        # Session and ViewAccess object.
+        with self.assertNumQueries(2):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_SINGLE_QUERY=True)
+    def test_single_query_by_role_view_is_forbidden_to_inactive_user(self):
+        group = Group.objects.create(name='test-group')
+        self.user.groups.add(group)
+        view_access = ViewAccess.objects.get(view='direct_access_view')
+        view_access.type = 'br'
+        view_access.save()
+        view_access.roles.add(group)
+        self.client.force_login(self.user)
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True)
+    def test_authorized_view_is_forbidden_to_anonymous_user(self):
+        response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_authenticated_recipe_does_not_load_user(self):
+        self.client.force_login(self.user)
+        self.client.get('/direct_access_view/')
+        # Session.
+        with self.assertNumQueries(1):
+            response = self.client.get('/direct_access_view/')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DJANGO_ROLES_ACCESS_SESSION_AUTH=True,
+                       DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_authorized_view_policy_does_not_load_user(self):
+        self.client.force_login(self.user)
+        request = RequestFactory().get('/direct_access_view/')
+        request.session = self.client.session
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        get_view_policies()
+        self.assertIs(get_view_access(request), True)
+        self.assertFalse(is_user_loaded(request))
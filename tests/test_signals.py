@@ -0,0 +1,145 @@
+from django.contrib.auth.models import Group
+from django.test import TestCase, RequestFactory, override_settings
+from django.contrib.auth import get_user_model
+try:
+    from unittest.mock import patch
+except:
+    from mock import patch
+
+from django_roles_access.models import TemplateAccess, ViewAccess
+from django_roles_access.signals import (connect_user_roles_changed,
+                                         user_roles_changed)
+from django_roles_access.policy import get_policy_version
+from django_roles_access.tools import get_view_access
+
+User = get_user_model()
+
+
+class TestPolicyVersionIsBumped(TestCase):
+
+    def setUp(self):
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.view_access = ViewAccess.objects.create(view='app:view',
+                                                     type='br')
+        self.template_access = TemplateAccess.objects.create(flag='flag')
+        self.version = get_policy_version()
+
+    def assertVersionChanged(self):
+        self.assertNotEqual(self.version, get_policy_version())
+
+    def test_view_access_created(self):
+        ViewAccess.objects.create(view='app:other-view', type='pu')
+        self.assertVersionChanged()
+
+    def test_view_access_saved(self):
+        self.view_access.type = 'au'
+        self.view_access.save()
+        self.assertVersionChanged()
+
+    def test_view_access_deleted(self):
+        self.view_access.delete()
+        self.assertVersionChanged()
+
+    def test_view_access_role_added(self):
+        self.view_access.roles.add(self.g1)
+        self.assertVersionChanged()
+
+    def test_view_access_role_removed(self):
+        self.view_access.roles.add(self.g1)
+        self.version = get_policy_version()
+        self.view_access.roles.remove(self.g1)
+        self.assertVersionChanged()
+
+    def test_view_access_roles_cleared(self):
+        self.view_access.roles.add(self.g1)
+        self.version = get_policy_version()
+        self.view_access.roles.clear()
+        self.assertVersionChanged()
+
+    def test_view_access_added_to_group(self):
+        self.g1.view_access.add(self.view_access)
+        self.assertVersionChanged()
+
+    def test_template_access_saved(self):
+        self.template_access.save()
+        self.assertVersionChanged()
+
+    def test_template_access_deleted(self):
+        self.template_access.delete()
+        self.assertVersionChanged()
+
+    def test_template_access_role_added(self):
+        self.template_access.roles.add(self.g1)
+        self.assertVersionChanged()
+
+    def test_group_deleted(self):
+        self.g1.delete()
+        self.assertVersionChanged()
+
+    def test_group_created_does_not_change_version(self):
+        Group.objects.create(name='test-group-2')
+        self.assertEqual(self.version, get_policy_version())
+
+
+@override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+class TestPolicyCacheIsInvalidated(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.u1.groups.add(self.g1)
+        self.view_access = ViewAccess.objects.create(
+            view='django_roles_access:view_protected_by_role', type='br')
+
+    def get_view_access(self):
+        # Policy version is read once per request.
+        request = RequestFactory().get('/role-included1/view_by_role/')
+        request.user = self.u1
+        return get_view_access(request)
+
+    def test_role_added(self):
+        self.assertFalse(self.get_view_access())
+        self.view_access.roles.add(self.g1)
+        self.assertTrue(self.get_view_access())
+
+    def test_group_deleted(self):
+        self.view_access.roles.add(self.g1)
+        self.assertTrue(self.get_view_access())
+        self.g1.delete()
+        self.assertFalse(self.get_view_access())
+
+    def test_type_changed(self):
+        self.assertFalse(self.get_view_access())
+        self.view_access.type = 'au'
+        self.view_access.save()
+        self.assertTrue(self.get_view_access())
+
+    def test_view_access_deleted(self):
+        self.assertFalse(self.get_view_access())
+        self.view_access.delete()
+        self.assertIsNone(self.get_view_access())
+
+    def test_version_is_read_from_shared_cache(self):
+        from django_roles_access.policy import (POLICY_VERSION_KEY,
+                                                get_policy_cache)
+        self.assertFalse(self.get_view_access())
+        # Change done by other process: database updated without signals
+        # and new version in the shared cache.
+        ViewAccess.objects.filter(pk=self.view_access.pk).update(type='pu')
+        self.assertFalse(self.get_view_access())
+        get_policy_cache().set(POLICY_VERSION_KEY, 'other-process', None)
+        self.assertTrue(self.get_view_access())
+
+
+class UnitTestConnectUserRolesChanged(TestCase):
+
+    @patch('django_roles_access.signals.m2m_changed')
+    def test_user_model_with_groups(self, mock_m2m_changed):
+        connect_user_roles_changed(User)
+        mock_m2m_changed.connect.assert_called_once_with(
+            user_roles_changed, sender=User.groups.through)
+
+    @patch('django_roles_access.signals.m2m_changed')
+    def test_user_model_without_groups(self, mock_m2m_changed):
+        connect_user_roles_changed(object)
+        self.assertFalse(mock_m2m_changed.connect.called)
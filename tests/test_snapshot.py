@@ -0,0 +1,171 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase as UnitTestCase
+
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+try:
+    from django.utils.six import StringIO
+except:
+    from io import StringIO
+try:
+    from unittest.mock import patch
+except:
+    from mock import patch
+
+from django_roles_access.models import ViewAccess
+from django_roles_access.policy import (ViewPolicy, clear_policies,
+                                        get_policy_version, get_view_policy)
+from django_roles_access.snapshot import (clear_policy_snapshot,
+                                          get_policy_snapshot,
+                                          open_policy_snapshot,
+                                          save_policy_snapshot,
+                                          write_policy_snapshot)
+
+
+def get_with_role_ids(snapshot, view_name):
+    """
+    Return the ViewPolicy of *view_name* with role ids instead of bitmap.
+    """
+    view_policy = snapshot.get(view_name)
+    if view_policy is None:
+        return None
+    return ViewPolicy(view_policy.type,
+                      snapshot.registry.get_role_ids(view_policy.roles))
+
+
+class SnapshotTestMixin(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'policy.snapshot')
+        clear_policy_snapshot()
+        clear_policies()
+
+    def tearDown(self):
+        clear_policy_snapshot()
+        clear_policies()
+        shutil.rmtree(self.directory)
+
+
+class UnitTestPolicySnapshot(SnapshotTestMixin, UnitTestCase):
+
+    def test_lookup(self):
+        write_policy_snapshot(self.path, {
+            u'app:view': ViewPolicy('br', frozenset([3, 1])),
+            u'nest1:nest2:view': ViewPolicy('au', frozenset()),
+            u'vista-\xf1': ViewPolicy('pu', frozenset()),
+        }, 'version')
+        snapshot = open_policy_snapshot(self.path)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.version, 'version')
+        self.assertEqual(snapshot.registry.role_ids, (1, 3))
+        self.assertEqual(get_with_role_ids(snapshot, u'app:view'),
+                         ViewPolicy('br', frozenset([1, 3])))
+        self.assertEqual(get_with_role_ids(snapshot, u'nest1:nest2:view'),
+                         ViewPolicy('au', frozenset()))
+        self.assertEqual(get_with_role_ids(snapshot, u'vista-\xf1'),
+                         ViewPolicy('pu', frozenset()))
+        self.assertIsNone(snapshot.get(u'app:other-view'))
+
+    def test_many_views(self):
+        view_policies = {u'app:view-{}'.format(i): ViewPolicy(
+            'br', frozenset([i, i + 1])) for i in range(1000)}
+        write_policy_snapshot(self.path, view_policies, 'version')
+        snapshot = open_policy_snapshot(self.path)
+        for view, view_policy in view_policies.items():
+            self.assertEqual(get_with_role_ids(snapshot, view), view_policy)
+
+    @patch('django_roles_access.snapshot.hash_view_name')
+    def test_hash_collision(self, mock_hash_view_name):
+        mock_hash_view_name.return_value = 1
+        write_policy_snapshot(self.path, {
+            u'view-1': ViewPolicy('au', frozenset()),
+            u'view-2': ViewPolicy('pu', frozenset()),
+        }, 'version')
+        snapshot = open_policy_snapshot(self.path)
+        self.assertEqual(get_with_role_ids(snapshot, u'view-2'),
+                         ViewPolicy('pu', frozenset()))
+        self.assertIsNone(snapshot.get(u'view-3'))
+
+    def test_missing_file(self):
+        self.assertIsNone(open_policy_snapshot(self.path))
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not a snapshot file')
+        self.assertIsNone(open_policy_snapshot(self.path))
+
+
+class TestGetPolicySnapshot(SnapshotTestMixin, TestCase):
+
+    def setUp(self):
+        super(TestGetPolicySnapshot, self).setUp()
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        view_access = ViewAccess.objects.create(view='app:view', type='br')
+        view_access.roles.add(self.g1)
+
+    def test_without_setting(self):
+        self.assertIsNone(get_policy_snapshot())
+
+    def test_snapshot_is_used(self):
+        save_policy_snapshot(self.path)
+        with override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT=self.path):
+            with self.assertNumQueries(0):
+                self.assertEqual(get_view_policy('app:view'),
+                                 ViewPolicy('br', 1))
+            self.assertIsNotNone(get_policy_snapshot())
+
+    def test_outdated_snapshot_is_not_used(self):
+        save_policy_snapshot(self.path)
+        ViewAccess.objects.create(view='app:other-view', type='au')
+        with override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT=self.path):
+            self.assertIsNone(get_policy_snapshot())
+            self.assertEqual(get_view_policy('app:other-view'),
+                             ViewPolicy('au', 0))
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT_INTERVAL=0)
+    def test_new_snapshot_is_used(self):
+        with override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT=self.path):
+            self.assertIsNone(get_policy_snapshot())
+            save_policy_snapshot()
+            self.assertEqual(get_policy_snapshot().version,
+                             get_policy_version()[0])
+
+    def test_file_is_checked_once_per_interval(self):
+        with override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT=self.path):
+            self.assertIsNone(get_policy_snapshot())
+            save_policy_snapshot()
+            with patch('django_roles_access.snapshot.os.stat') as stat:
+                self.assertIsNone(get_policy_snapshot())
+                stat.assert_not_called()
+            with patch('django_roles_access.snapshot._clock',
+                       return_value=float('inf')):
+                self.assertIsNotNone(get_policy_snapshot())
+
+    def test_given_policy_version_is_used(self):
+        save_policy_snapshot(self.path)
+        version = get_policy_version()
+        with override_settings(DJANGO_ROLES_ACCESS_POLICY_SNAPSHOT=self.path):
+            with patch('django_roles_access.snapshot.get_policy_version'
+                       ) as get_version:
+                self.assertIsNotNone(get_policy_snapshot(version))
+                get_version.assert_not_called()
+
+
+class TestWritePolicySnapshotCommand(SnapshotTestMixin, TestCase):
+
+    def test_write_snapshot(self):
+        ViewAccess.objects.create(view='app:view', type='au')
+        out = StringIO()
+        call_command('writepolicysnapshot', '--path', self.path, stdout=out)
+        self.assertIn(u'1 views written', out.getvalue())
+        self.assertEqual(get_with_role_ids(open_policy_snapshot(self.path),
+                                           'app:view'),
+                         ViewPolicy('au', frozenset()))
+
+    def test_without_path(self):
+        with self.assertRaises(CommandError):
+            call_command('writepolicysnapshot')
@@ -2,21 +2,29 @@ from unittest import TestCase as UnitTestCase
 import pytest
 from django.conf import settings
 from django.contrib.auth import logout, login
-from django.contrib.auth.models import User, Group
+from django.contrib.auth.models import AnonymousUser, User, Group
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.http import HttpResponseForbidden, HttpResponseRedirect
-from django.test import RequestFactory, TestCase
+from django.test import RequestFactory, TestCase, override_settings
 try:
     from unittest.mock import Mock, patch
 except:
     from mock import Mock, patch
 
 from django_roles_access.models import ViewAccess
+from django_roles_access.policy import ViewPolicy, clear_policies
+from django_roles_access.roles import ROLE_IDS_ATTRIBUTE, RoleRegistry
 from django_roles_access.tools import (get_setting_dictionary, get_view_access,
                                        check_access_by_role, get_app_type,
                                        get_forbidden_message,
                                        DEFAULT_FORBIDDEN_MESSAGE,
-                                       get_no_access_response)
+                                       get_no_access_response,
+                                       check_view_policy, get_resolver_match,
+                                       get_app_types_index,
+                                       clear_app_types_index, has_view_role,
+                                       get_view_access_single_query,
+                                       get_access_decision,
+                                       get_view_app_name, can_access_many)
 
 
 @patch('django_roles_access.tools.resolve')
@@ -25,7 +33,9 @@ class UnitTestGetViewAccess(UnitTestCase):
 
     def setUp(self):
         self.request = Mock()
+        self.request.resolver_match = None
         self.request.user = Mock()
+        setattr(self.request.user, ROLE_IDS_ATTRIBUTE, None)
 
     def test_filter_is_done_with_view_name(
             self, mock_objects, mock_resolve
@@ -84,24 +94,28 @@ class UnitTestGetViewAccess(UnitTestCase):
     ):
         view_access = Mock()
         view_access.type = 'br'
-        view_access.roles.all.return_value = ['need-access', 'fake-access']
         self.request.user.is_authenticated = True
-        self.request.user.groups.all.return_value = []
         mock_objects.filter.return_value = mock_objects
         mock_objects.first.return_value = view_access
-        assert not get_view_access(self.request)
+        with patch('django_roles_access.tools.has_view_role') as \
+                mock_has_view_role:
+            mock_has_view_role.return_value = False
+            assert not get_view_access(self.request)
+            mock_has_view_role.assert_called_once_with(self.request.user,
+                                                       view_access)
 
     def test_secured_view_by_role_user_is_authenticated_and_in_group(
             self, mock_objects, mock_resolve
     ):
         view_access = Mock()
         view_access.type = 'br'
-        view_access.roles.all.return_value = ['need-access', 'fake-access']
         self.request.user.is_authenticated = True
-        self.request.user.groups.all.return_value = ['fake-access']
         mock_objects.filter.return_value = mock_objects
         mock_objects.first.return_value = view_access
-        assert get_view_access(self.request)
+        with patch('django_roles_access.tools.has_view_role') as \
+                mock_has_view_role:
+            mock_has_view_role.return_value = True
+            assert get_view_access(self.request)
         # self.fail(u'Finish this???')
 
     def test_get_view_access_return_None_in_no_view_access_object(
@@ -112,6 +126,39 @@ class UnitTestGetViewAccess(UnitTestCase):
         self.assertEqual(get_view_access(self.request), None)
 
 
+@patch('django_roles_access.tools.resolve')
+class UnitTestGetResolverMatch(UnitTestCase):
+
+    def setUp(self):
+        self.request = Mock()
+
+    def test_resolver_match_of_request_is_used(self, mock_resolve):
+        self.assertIs(get_resolver_match(self.request),
+                      self.request.resolver_match)
+        assert not mock_resolve.called
+
+    def test_resolve_when_no_resolver_match(self, mock_resolve):
+        self.request.resolver_match = None
+        self.assertIs(get_resolver_match(self.request),
+                      mock_resolve.return_value)
+        mock_resolve.assert_called_once_with(self.request.path_info)
+
+    def test_resolve_only_once(self, mock_resolve):
+        self.request.resolver_match = None
+        get_resolver_match(self.request)
+        get_resolver_match(self.request)
+        self.assertEqual(mock_resolve.call_count, 1)
+
+    def test_check_access_by_role_and_get_view_access_resolve_once(
+            self, mock_resolve
+    ):
+        self.request.resolver_match = None
+        mock_resolve.return_value.app_name = 'fake-app-name'
+        with patch('django_roles_access.tools.ViewAccess.objects'):
+            check_access_by_role(self.request)
+        self.assertEqual(mock_resolve.call_count, 1)
+
+
 @pytest.mark.django_db
 class TestGetViewAccess(UnitTestCase):
 
@@ -226,6 +273,40 @@ class TestGetViewAccess(UnitTestCase):
         assert get_view_access(self.req1)
 
 
+class TestHasViewRole(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.view_access = ViewAccess.objects.create(view='app:view',
+                                                     type='br')
+        self.view_access.roles.add(self.g1)
+
+    def test_user_without_groups(self):
+        self.assertFalse(has_view_role(self.u1, self.view_access))
+
+    def test_user_in_other_group(self):
+        self.u1.groups.add(self.g2)
+        self.assertFalse(has_view_role(self.u1, self.view_access))
+
+    def test_user_in_role(self):
+        self.u1.groups.add(self.g1, self.g2)
+        self.assertTrue(has_view_role(self.u1, self.view_access))
+
+    def test_role_of_other_view(self):
+        other_view_access = ViewAccess.objects.create(view='app:other',
+                                                      type='br')
+        other_view_access.roles.add(self.g2)
+        self.u1.groups.add(self.g2)
+        self.assertFalse(has_view_role(self.u1, self.view_access))
+
+    def test_single_query(self):
+        self.u1.groups.add(self.g1)
+        with self.assertNumQueries(1):
+            has_view_role(self.u1, self.view_access)
+
+
 @pytest.mark.django_db
 class TestGetViewAccessWithDirectView(UnitTestCase):
 
@@ -325,6 +406,7 @@ class TestGetDictionarySettings(UnitTestCase):
         """
         """
         settings.__setattr__('SECURED', ['one_application'])
+        clear_app_types_index()
         expected_dictionary = {
             'NOT_SECURED': [],
             'PUBLIC': [],
@@ -334,12 +416,14 @@ class TestGetDictionarySettings(UnitTestCase):
         settings_dictionary = get_setting_dictionary()
         # Clear mock value to not interfere with other tests
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         self.assertEqual(expected_dictionary, settings_dictionary)
 
     def test_get_dictionary_with_settings_variables_NOT_SECURED(self):
         """
         """
         settings.__setattr__('NOT_SECURED', ['two_application'])
+        clear_app_types_index()
         expected_dictionary = {
             'NOT_SECURED': ['two_application'],
             'PUBLIC': [],
@@ -349,12 +433,14 @@ class TestGetDictionarySettings(UnitTestCase):
         settings_dictionary = get_setting_dictionary()
         # Clear mock value to not interfere with other tests
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         self.assertEqual(expected_dictionary, settings_dictionary)
 
     def test_get_dictionary_with_settings_variables_PUBLIC(self):
         """
         """
         settings.__setattr__('PUBLIC', ['last_application'])
+        clear_app_types_index()
         expected_dictionary = {
             'NOT_SECURED': [],
             'PUBLIC': ['last_application'],
@@ -364,12 +450,14 @@ class TestGetDictionarySettings(UnitTestCase):
         settings_dictionary = get_setting_dictionary()
         # Clear mock value to not interfere with other tests
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         self.assertEqual(expected_dictionary, settings_dictionary)
 
     def test_get_dictionary_with_settings_variables_DISABLED(self):
         """
         """
         settings.__setattr__('DISABLED', ['disabled_application'])
+        clear_app_types_index()
         expected_dictionary = {
             'NOT_SECURED': [],
             'PUBLIC': [],
@@ -379,14 +467,18 @@ class TestGetDictionarySettings(UnitTestCase):
         settings_dictionary = get_setting_dictionary()
         # Clear mock value to not interfere with other tests
         settings.__delattr__('DISABLED')
+        clear_app_types_index()
         self.assertEqual(expected_dictionary, settings_dictionary)
 
     def test_get_dictionary_with_settings_variables_with_combination(self):
         """
         """
         settings.__setattr__('PUBLIC', ['last_application'])
+        clear_app_types_index()
         settings.__setattr__('SECURED', ['one_application'])
+        clear_app_types_index()
         settings.__setattr__('DISABLED', ['disabled_application'])
+        clear_app_types_index()
         expected_dictionary = {
             'NOT_SECURED': [],
             'PUBLIC': ['last_application'],
@@ -396,8 +488,11 @@ class TestGetDictionarySettings(UnitTestCase):
         settings_dictionary = get_setting_dictionary()
         # Clear mock value to not interfere with other tests
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         settings.__delattr__('SECURED')
+        clear_app_types_index()
         settings.__delattr__('DISABLED')
+        clear_app_types_index()
         self.assertEqual(expected_dictionary, settings_dictionary)
 
 
@@ -407,6 +502,11 @@ class UnitTestCheckAccessByRole(UnitTestCase):
 
     def setUp(self):
         self.request = Mock()
+        self.request.resolver_match = None
+        clear_app_types_index()
+
+    def tearDown(self):
+        clear_app_types_index()
 
     def test_resolve_called_with_request_path_info(
             self, mock_get_view_access, mock_resolve
@@ -585,10 +685,40 @@ class UnitTestCheckAccessByRole(UnitTestCase):
 
 
 # Integrated tests
+class UnitTestAccessDecision(UnitTestCase):
+
+    def setUp(self):
+        self.request = Mock()
+        self.request.resolver_match = Mock()
+
+    @patch('django_roles_access.tools.evaluate_access_by_role')
+    def test_decision_is_kept_in_request(self, mock_evaluate_access_by_role):
+        mock_evaluate_access_by_role.return_value = False
+        self.assertFalse(check_access_by_role(self.request))
+        self.assertFalse(check_access_by_role(self.request))
+        mock_evaluate_access_by_role.assert_called_once_with(
+            self.request, self.request.resolver_match)
+
+    @patch('django_roles_access.tools.evaluate_access_by_role')
+    def test_decision_is_not_used_for_other_view(
+            self, mock_evaluate_access_by_role
+    ):
+        mock_evaluate_access_by_role.return_value = True
+        check_access_by_role(self.request)
+        self.request.resolver_match = Mock()
+        check_access_by_role(self.request)
+        self.assertEqual(mock_evaluate_access_by_role.call_count, 2)
+
+    def test_get_access_decision_without_decision(self):
+        self.assertIsNone(get_access_decision(
+            self.request, self.request.resolver_match))
+
+
 class TestCheckAccessByRoleWithSecuredApplications(TestCase):
 
     def setUp(self):
         settings.__setattr__('SECURED', ['django_roles_access'])
+        clear_app_types_index()
         # User
         self.u1, created = User.objects.get_or_create(username='test-1')
 
@@ -603,6 +733,7 @@ class TestCheckAccessByRoleWithSecuredApplications(TestCase):
 
     def tearDown(self):
         settings.__delattr__('SECURED')
+        clear_app_types_index()
 
     def test_not_authorized_user_can_not_access(self):
         """
@@ -626,6 +757,7 @@ class TestCheckAccessByRoleWithPublicApplications(TestCase):
 
     def setUp(self):
         settings.__setattr__('PUBLIC', ['django_role_access'])
+        clear_app_types_index()
         # User and group
         self.u1, created = User.objects.get_or_create(username='test-1')
         self.g1, created = Group.objects.get_or_create(name='test-group-1')
@@ -641,6 +773,7 @@ class TestCheckAccessByRoleWithPublicApplications(TestCase):
 
     def tearDown(self):
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
 
     def fixture_role(self, user, view_access):
         user.groups.add(self.g1)
@@ -664,6 +797,7 @@ class TestCheckAccessByRoleWithNotSecuredApplications(TestCase):
 
     def setUp(self):
         settings.__setattr__('NOT_SECURED', ['django_roles_access'])
+        clear_app_types_index()
         # User and group
         self.u1, created = User.objects.get_or_create(username='test-1')
         self.g1, created = Group.objects.get_or_create(name='test-group-1')
@@ -679,6 +813,7 @@ class TestCheckAccessByRoleWithNotSecuredApplications(TestCase):
 
     def tearDown(self):
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
 
     def test_not_secured_app_views_are_ignored_without_authentication(self):
         """
@@ -716,6 +851,7 @@ class TestCheckAccessByRoleWithDisabledApplications(TestCase):
 
     def setUp(self):
         settings.__setattr__('DISABLED', ['django_roles_access'])
+        clear_app_types_index()
         # User and group
         self.u1, created = User.objects.get_or_create(username='test-1')
         self.g1, created = Group.objects.get_or_create(name='test-group-1')
@@ -731,6 +867,7 @@ class TestCheckAccessByRoleWithDisabledApplications(TestCase):
 
     def tearDown(self):
         settings.__delattr__('DISABLED')
+        clear_app_types_index()
 
     def test_disabled_app_views_are_forbidden_without_authentication(self):
         """
@@ -824,6 +961,12 @@ class TestCheckAccessByRoleWithoutAnySettings(TestCase):
 
 class UnitTestGetAppType(UnitTestCase):
 
+    def setUp(self):
+        clear_app_types_index()
+
+    def tearDown(self):
+        clear_app_types_index()
+
     def test_detect_app_has_no_type(self):
         """
         When no configuration is given, or default case.
@@ -872,13 +1015,19 @@ class IntegratedTestGetAppType(UnitTestCase):
 
     def setUp(self):
         settings.__setattr__('NOT_SECURED', ['not_secured_app'])
+        clear_app_types_index()
         settings.__setattr__('PUBLIC', ['public_app'])
+        clear_app_types_index()
         settings.__setattr__('SECURED', ['secured_app'])
+        clear_app_types_index()
 
     def tearDown(self):
         settings.__delattr__('NOT_SECURED')
+        clear_app_types_index()
         settings.__delattr__('PUBLIC')
+        clear_app_types_index()
         settings.__delattr__('SECURED')
+        clear_app_types_index()
 
     def test_default_case_with_no_configuration(self):
         result = get_app_type('app_name')
@@ -900,6 +1049,56 @@ class IntegratedTestGetAppType(UnitTestCase):
         self.assertEqual(result, expected)
 
 
+class TestGetAppTypesIndex(UnitTestCase):
+
+    def setUp(self):
+        clear_app_types_index()
+
+    def tearDown(self):
+        clear_app_types_index()
+
+    def test_empty_index_with_no_configuration(self):
+        self.assertEqual(get_app_types_index(), {})
+
+    @override_settings(PUBLIC=['public_app', 'other_app'],
+                       SECURED=['secured_app'])
+    def test_index(self):
+        self.assertEqual(get_app_types_index(), {
+            'public_app': 'PUBLIC',
+            'other_app': 'PUBLIC',
+            'secured_app': 'SECURED',
+        })
+
+    @override_settings(PUBLIC=['app'], DISABLED=['app'], SECURED=['app'])
+    def test_app_in_many_settings_use_check_precedence(self):
+        self.assertEqual(get_app_types_index(), {'app': 'DISABLED'})
+
+    @patch('django_roles_access.tools.get_setting_dictionary')
+    def test_index_is_built_once(self, mock_get_setting_dictionary):
+        mock_get_setting_dictionary.return_value = {}
+        get_app_types_index()
+        get_app_types_index()
+        self.assertEqual(mock_get_setting_dictionary.call_count, 1)
+
+    def test_index_is_built_again_when_settings_change(self):
+        self.assertEqual(get_app_types_index(), {})
+        with override_settings(SECURED=['secured_app']):
+            self.assertEqual(get_app_types_index(),
+                             {'secured_app': 'SECURED'})
+        self.assertEqual(get_app_types_index(), {})
+
+    def test_index_is_kept_when_settings_are_assigned(self):
+        get_app_types_index()
+        settings.__setattr__('PUBLIC', ['public_app'])
+        index = get_app_types_index()
+        clear_app_types_index()
+        rebuilt_index = get_app_types_index()
+        settings.__delattr__('PUBLIC')
+        clear_app_types_index()
+        self.assertEqual(index, {})
+        self.assertEqual(rebuilt_index, {'public_app': 'PUBLIC'})
+
+
 class UnitTestGetForbiddenMessage(UnitTestCase):
 
     def test_default_forbidden_message(self):
@@ -1004,3 +1203,224 @@ class IntegratedTextGetNoAccessResponse(TestCase):
         response = get_no_access_response()
         settings.__delattr__('DJANGO_ROLES_ACCESS_REDIRECT')
         self.assertEqual(settings.LOGIN_URL, response.url)
+
+
+@override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+class TestGetViewAccessWithPolicyCache(TestCase):
+
+    def setUp(self):
+        clear_policies()
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.req1 = RequestFactory().get('/role-included1/view_by_role/')
+        self.req1.user = self.u1
+        self.view_access, created = ViewAccess.objects.get_or_create(
+            view='django_roles_access:view_protected_by_role',
+            type='br'
+        )
+        self.view_access.roles.add(self.g1)
+
+    def tearDown(self):
+        clear_policies()
+
+    def test_policy_is_not_queried_after_first_request(self):
+        self.view_access.type = 'au'
+        self.view_access.save()
+        get_view_access(self.req1)
+        with self.assertNumQueries(0):
+            self.assertTrue(get_view_access(self.req1))
+
+    def test_by_role_user_in_role(self):
+        self.u1.groups.add(self.g1)
+        self.assertTrue(get_view_access(self.req1))
+
+    def test_by_role_user_not_in_role(self):
+        self.assertFalse(get_view_access(self.req1))
+
+    def test_by_role_anonymous_user(self):
+        self.req1.user = AnonymousUser()
+        self.assertFalse(get_view_access(self.req1))
+
+    def test_no_view_access_object(self):
+        request = RequestFactory().get('/role-included1/mixin_class_view/')
+        request.user = self.u1
+        self.assertIsNone(get_view_access(request))
+
+
+class UnitTestCheckViewPolicy(UnitTestCase):
+
+    def setUp(self):
+        self.user = Mock()
+        setattr(self.user, ROLE_IDS_ATTRIBUTE, None)
+        self.registry = RoleRegistry([1, 2, 4])
+
+    def view_policy(self, _type, role_ids=()):
+        return ViewPolicy(_type, self.registry.get_bits(role_ids))
+
+    def test_public(self):
+        self.user.is_authenticated = False
+        assert check_view_policy(self.user, self.view_policy('pu'),
+                                 self.registry)
+
+    def test_authorized(self):
+        self.user.is_authenticated = True
+        assert check_view_policy(self.user, self.view_policy('au'),
+                                 self.registry)
+        self.user.is_authenticated = False
+        assert not check_view_policy(self.user, self.view_policy('au'),
+                                     self.registry)
+
+    def test_by_role(self):
+        self.user.is_authenticated = True
+        self.user.groups.values_list.return_value = [3, 4]
+        assert check_view_policy(self.user, self.view_policy('br', [1, 4]),
+                                 self.registry)
+        assert not check_view_policy(self.user,
+                                     self.view_policy('br', [1, 2]),
+                                     self.registry)
+
+    def test_by_role_not_authenticated(self):
+        self.user.is_authenticated = False
+        assert not check_view_policy(self.user, self.view_policy('br', [1]),
+                                     self.registry)
+
+    def test_unknown_type(self):
+        self.assertIsNone(check_view_policy(self.user, self.view_policy('xx'),
+                                            self.registry))
+
+
+@override_settings(DJANGO_ROLES_ACCESS_SINGLE_QUERY=True)
+class TestGetViewAccessSingleQuery(TestCase):
+
+    def setUp(self):
+        self.u1, created = User.objects.get_or_create(username='test-1')
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.g2, created = Group.objects.get_or_create(name='test-group-2')
+        self.view_access = ViewAccess.objects.create(
+            view='django_roles_access:view_protected_by_role', type='br')
+        self.view_access.roles.add(self.g1)
+        self.view_name = 'django_roles_access:view_protected_by_role'
+
+    def decide(self, user):
+        with self.assertNumQueries(1):
+            return get_view_access_single_query(user, self.view_name)
+
+    def test_no_view_access(self):
+        self.view_access.delete()
+        self.assertIsNone(self.decide(self.u1))
+        self.assertIsNone(self.decide(AnonymousUser()))
+
+    def test_public(self):
+        self.view_access.type = 'pu'
+        self.view_access.save()
+        self.assertTrue(self.decide(self.u1))
+        self.assertTrue(self.decide(AnonymousUser()))
+
+    def test_authorized(self):
+        self.view_access.type = 'au'
+        self.view_access.save()
+        self.assertTrue(self.decide(self.u1))
+        self.assertFalse(self.decide(AnonymousUser()))
+
+    def test_by_role(self):
+        self.assertFalse(self.decide(self.u1))
+        self.u1.groups.add(self.g2)
+        self.assertFalse(self.decide(self.u1))
+        self.u1.groups.add(self.g1)
+        self.assertTrue(self.decide(self.u1))
+        self.assertFalse(self.decide(AnonymousUser()))
+
+    def test_get_view_access_use_single_query(self):
+        self.u1.groups.add(self.g1)
+        request = RequestFactory().get('/role-included1/view_by_role/')
+        request.user = self.u1
+        get_resolver_match(request)
+        with self.assertNumQueries(1):
+            self.assertTrue(get_view_access(request))
+
+
+class TestGetViewAppName(UnitTestCase):
+
+    def test_view_without_namespace(self):
+        self.assertIsNone(get_view_app_name('direct_access_view'))
+
+    def test_instance_namespace(self):
+        self.assertEqual(get_view_app_name('app-ns2:middleware_view_func'),
+                         'django_roles_access')
+
+    def test_application_namespace(self):
+        self.assertEqual(
+            get_view_app_name('django_roles_access:middleware_view_func'),
+            'django_roles_access')
+
+    def test_nested_namespaces(self):
+        self.assertEqual(
+            get_view_app_name('nest1_namespace:nest2_namespace:'
+                              'view_protected_by_role'),
+            'roles-nested-namespace:roles-app-name')
+
+    def test_unknown_namespace(self):
+        self.assertIsNone(get_view_app_name('fake-namespace:fake-view'))
+
+
+@override_settings(SECURED=['django_roles_access'],
+                   DISABLED=['roles-nested-namespace:roles-app-name'])
+class TestCanAccessMany(TestCase):
+
+    view_names = ['direct_access_view', 'direct_view',
+                  'app-ns2:middleware_view_func',
+                  'django_roles_access:middleware_view_class',
+                  'nest1_namespace:nest2_namespace:view_protected_by_role']
+
+    def setUp(self):
+        clear_policies()
+        self.g1, created = Group.objects.get_or_create(name='test-group-1')
+        self.user = User.objects.create(username='test-user')
+        view_access = ViewAccess.objects.create(view='direct_access_view',
+                                                type='br')
+        view_access.roles.add(self.g1)
+        ViewAccess.objects.create(
+            view='django_roles_access:middleware_view_class', type='pu')
+
+    def tearDown(self):
+        clear_policies()
+
+    def test_anonymous_user(self):
+        self.assertEqual(can_access_many(AnonymousUser(), self.view_names), {
+            'direct_access_view': False,
+            'direct_view': True,
+            'app-ns2:middleware_view_func': False,
+            'django_roles_access:middleware_view_class': True,
+            'nest1_namespace:nest2_namespace:view_protected_by_role': False,
+        })
+
+    def test_user_without_roles(self):
+        result = can_access_many(self.user, self.view_names)
+        self.assertIs(result['direct_access_view'], False)
+        self.assertIs(result['app-ns2:middleware_view_func'], True)
+
+    def test_user_with_roles(self):
+        self.user.groups.add(self.g1)
+        result = can_access_many(self.user, self.view_names)
+        self.assertIs(result['direct_access_view'], True)
+        self.assertIs(result['nest1_namespace:nest2_namespace:'
+                             'view_protected_by_role'], False)
+
+    def test_policies_and_roles_are_loaded_once(self):
+        with self.assertNumQueries(2):
+            can_access_many(self.user, self.view_names)
+
+    @override_settings(DJANGO_ROLES_ACCESS_POLICY_CACHE=True)
+    def test_with_policy_cache(self):
+        self.user.groups.add(self.g1)
+        can_access_many(AnonymousUser(), self.view_names)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            result = can_access_many(user, self.view_names)
+        self.assertEqual(result, {
+            'direct_access_view': True,
+            'direct_view': True,
+            'app-ns2:middleware_view_func': True,
+            'django_roles_access:middleware_view_class': True,
+            'nest1_namespace:nest2_namespace:view_protected_by_role': False,
+        })
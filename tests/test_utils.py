@@ -1,4 +1,6 @@
+from collections import OrderedDict
 from importlib import import_module
+import types
 from unittest import TestCase as UnitTestCase
 
 from django.contrib.auth.models import Group
@@ -15,11 +17,14 @@ from django_roles_access.decorator import access_by_role
 from django_roles_access.mixin import RolesMixin
 from django_roles_access.models import ViewAccess
 from tests import views
-from django_roles_access.utils import (walk_site_url, get_views_by_app,
+from django_roles_access.utils import (walk_site_url, iter_site_url,
+                                       get_views_by_app,
                                        view_access_analyzer,
                                        get_view_analyze_report,
                                        check_django_roles_is_used,
-                                       analyze_by_role, APP_NAME_FOR_NONE,
+                                       analyze_by_role, get_view_accesses,
+                                       analyze_views_by_app,
+                                       APP_NAME_FOR_NONE,
                                        NOT_SECURED_DEFAULT, SECURED_DEFAULT,
                                        PUBLIC_DEFAULT, NONE_TYPE_DEFAULT,
                                        DISABLED_DEFAULT, OutputReport)
@@ -124,6 +129,11 @@ class UnitTestWalkSiteURL(UnitTestCase):
         self.assertEqual(result, [('fake-regex-pattern/', 'fake-callback',
                                    'fake-view-name', None)])
 
+    def test_iter_site_url_yields_the_same_urls(self):
+        result = iter_site_url(self.data)
+        self.assertIsInstance(result, types.GeneratorType)
+        self.assertEqual(list(result), walk_site_url(self.data))
+
     def test_first_param_list_of_patterns_and_views(self):
         pattern_2 = MockPattern()
         pattern_2.regex.pattern = 'fake-regex-pattern-2/'
@@ -520,6 +530,21 @@ class IntegratedTestAnalyzeByRoleAccess(TestCase):
         result = analyze_by_role(view_access)
         self.assertEqual(result, expected)
 
+    def test_prefetched_roles_are_analyzed_without_queries(self):
+        expected = u'Roles with access: role-1, role-2'
+        view_access = ViewAccess.objects.create(view='any-name', type='br')
+        role_1, created = Group.objects.get_or_create(name='role-1')
+        role_2, created = Group.objects.get_or_create(name='role-2')
+        view_access.roles.add(role_1, role_2)
+        ViewAccess.objects.create(view='other-name', type='br')
+        with self.assertNumQueries(2):
+            view_accesses = get_view_accesses()
+        with self.assertNumQueries(0):
+            self.assertEqual(analyze_by_role(view_accesses['any-name']),
+                             expected)
+            self.assertEqual(analyze_by_role(view_accesses['other-name']),
+                             u'ERROR: No roles configured to access de view.')
+
 
 @patch('django_roles_access.utils.ViewAccess.objects')
 class UnitTestViewAnalyzer(UnitTestCase):
@@ -746,8 +771,46 @@ class UnitTestViewAnalyzer(UnitTestCase):
         self.assertEqual(result, expected)
 
 
+class IntegratedTestAnalyzeViewsByApp(TestCase):
+
+    def test_applications_are_analyzed_in_order(self):
+        ViewAccess.objects.create(view='app-2:view-1', type='au')
+        views_by_app = OrderedDict([
+            ('app-{}'.format(index), [
+                ('/view-{}/'.format(view), views.protected_view_by_role,
+                 'app-{}:view-{}'.format(index, view))
+                for view in range(index)])
+            for index in range(6)])
+        result = list(analyze_views_by_app(views_by_app, get_view_accesses(),
+                                           True, 3))
+        self.assertEqual([app_name for app_name, _, _ in result],
+                         list(views_by_app))
+        self.assertEqual([len(analyses) for _, _, analyses in result],
+                         list(range(6)))
+        self.assertEqual(result[2][2][0], u'\t' + NONE_TYPE_DEFAULT)
+        self.assertEqual(result[2][2][1], u'View access is of type '
+                                          u'Authorized.')
+
+
 class IntegratedTestViewAnalyzezr(TestCase):
 
+    def test_view_access_is_taken_from_view_accesses(self):
+        expected = u'View access is of type Authorized.'
+        ViewAccess.objects.create(
+            view='django_roles_access:middleware_view_class',
+            type='au')
+        view_accesses = get_view_accesses()
+        with self.assertNumQueries(0):
+            result = view_access_analyzer(
+                'SECURED', views.MiddlewareView.as_view,
+                'django_roles_access:middleware_view_class',
+                True, view_accesses)
+            self.assertEqual(result, expected)
+            result = view_access_analyzer(
+                'SECURED', views.MiddlewareView.as_view,
+                'django_roles_access:other_view', True, view_accesses)
+            self.assertEqual(result, u'\t' + SECURED_DEFAULT)
+
     def test_with_middleware_SECURED_without_view_access_object(self):
         expected = u'\t' + SECURED_DEFAULT
         result = view_access_analyzer(
@@ -954,6 +1017,18 @@ class UnitTestOutputReport(UnitTestCase):
         self.assertIn('text', self._output._row)
         self.assertIn('other', self._output._row)
 
+    def test_add_to_row_after_reset(self):
+        self._output.add_to_row('fake-app,fake-type,fake-view,fake-url,')
+        self._output.set_format('csv')
+        self._output.write_view_access_analyzer('fake-report')
+        self._output.add_to_row('other-view,other-url,')
+        self.assertEqual(self._output._row,
+                         u'fake-app,fake-type,other-view,other-url,')
+
+    def test_flush_output(self):
+        self._output.flush()
+        self.mock_stdout.flush.assert_called_once_with()
+
     def test_write_method_write_to_stdout(self):
         self._output.write(u'some text')
         assert self.mock_stdout.write.called